@@ -0,0 +1,77 @@
+"""Compares the memory held by a list of Tweet objects and by columnar TweetBatch objects.
+
+Run with `python -m benchmarks.batches`. No network access is needed, the tweets of the bundled
+test page are copied to the requested count, with fresh strings for every copy as a real crawl
+would have.
+"""
+import argparse
+import json
+import tracemalloc
+
+from nitter_scraper.batches import TweetBatch
+from nitter_scraper.parsers import get_backend
+from nitter_scraper.paths import DATA_DIRECTORY
+from nitter_scraper.schema import Tweet
+from nitter_scraper.tweets import parse_tweet, timeline_parser
+
+PAGE = get_backend("lxml").parse((DATA_DIRECTORY / "testpage.html").read_bytes())
+
+
+def tweet_dicts(count):
+    """Copies the parsed tweet dicts of the test page up to count dicts."""
+    items = [item for item in timeline_parser(PAGE).find(".timeline-item")]
+    parsed = [parse_tweet(item) for item in items if "show-more" not in item.attrs["class"]]
+
+    dicts = []
+    while len(dicts) < count:
+        for data in parsed[: count - len(dicts)]:
+            copy = json.loads(json.dumps({**data, "time": None}))
+            copy["time"] = data["time"].replace()
+            dicts.append(copy)
+    return dicts
+
+
+def measure(build, count):
+    """Returns the bytes still held by the result of build(), once the parsed dicts are gone."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(tweet_dicts(count))
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return held
+
+
+def build_tweets(dicts):
+    return [Tweet.from_dict(data) for data in dicts]
+
+
+def build_batches(dicts, batch_size=10_000):
+    batches = []
+    for start in range(0, len(dicts), batch_size):
+        batch = TweetBatch()
+        end = start + batch_size
+        for data in dicts[start:end]:
+            batch.append(data)
+        batches.append(batch)
+    return batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tweets", type=int, default=100_000, help="number of tweets held")
+    args = parser.parse_args()
+
+    results = {}
+    for name, build in [("list of Tweet", build_tweets), ("TweetBatch", build_batches)]:
+        held = measure(build, args.tweets)
+        results[name] = held
+        per_million = held / args.tweets * 1_000_000 / 1024 ** 2
+        print(f"{name:<15} {held / args.tweets:9.0f} B/tweet {per_million:9.0f} MB/million tweets")
+
+    ratio = results["list of Tweet"] / results["TweetBatch"]
+    print(f"{'reduction':<15} {ratio:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
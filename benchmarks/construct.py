@@ -0,0 +1,69 @@
+"""Compares building Tweet and Profile objects with and without pydantic validation.
+
+Run with `python -m benchmarks.construct`. No network access is needed, the objects are built
+from the parsed dicts of the bundled test page.
+"""
+import argparse
+import timeit
+import tracemalloc
+
+from nitter_scraper.parsers import get_backend
+from nitter_scraper.paths import DATA_DIRECTORY
+from nitter_scraper.profile import html_parser, profile_parser
+from nitter_scraper.schema import Profile, Tweet
+from nitter_scraper.tweets import parse_tweet, timeline_parser
+
+PAGE = get_backend("lxml").parse((DATA_DIRECTORY / "testpage.html").read_bytes())
+
+
+def tweet_dicts():
+    """The parsed dicts of the tweets of the test page."""
+    items = [item for item in timeline_parser(PAGE).find(".timeline-item")]
+    return [parse_tweet(item) for item in items if "show-more" not in item.attrs["class"]]
+
+
+def profile_dicts():
+    """The parsed dict of the profile of the test page, without the banner dependent user id."""
+    elements = html_parser(PAGE)
+    elements.pop("banner_photo", None)
+    return [profile_parser(elements)]
+
+
+def bytes_per_object(model, dicts, validate, count=5000):
+    """Measures the memory held by count objects."""
+    dicts = (dicts * (count // len(dicts) + 1))[:count]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [model.from_dict(data, validate=validate) for data in dicts]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(objects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20000, help="objects built per repeat")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats, best is kept")
+    args = parser.parse_args()
+
+    for model, dicts in [(Tweet, tweet_dicts()), (Profile, profile_dicts())]:
+        rates = {}
+        for validate in [True, False]:
+            rounds = args.number // len(dicts)
+
+            def build():
+                for data in dicts:
+                    model.from_dict(data, validate=validate)
+
+            best = min(timeit.Timer(build).repeat(repeat=args.repeat, number=rounds))
+            rates[validate] = rounds * len(dicts) / best
+            size = bytes_per_object(model, dicts, validate)
+            mode = f"validate={validate}"
+            rate = rates[validate]
+            print(f"{model.__name__:<8} {mode:<15} {rate:12,.0f} obj/s {size:8.0f} B/obj")
+
+        print(f"{model.__name__:<8} {'speedup':<15} {rates[False] / rates[True]:12.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
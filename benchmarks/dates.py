@@ -0,0 +1,58 @@
+"""Compares tweets.parse_date with dateutil on the tweet dates of the bundled test page.
+
+Run with `python -m benchmarks.dates`. No network access is needed. The test page uses the older
+"27/4/2019, 05:45:08" format, so the same dates are also rendered in the current
+"Aug 7, 2020 · 8:36 PM UTC" format. parse_date is measured with its memo cache cleared before
+every run, and again with a warm cache, as when the same pages are crawled again.
+"""
+import argparse
+import re
+import timeit
+
+import dateutil.parser
+
+from nitter_scraper.paths import DATA_DIRECTORY  # noqa: I100, I202
+from nitter_scraper.tweets import parse_date
+
+PAGE = (DATA_DIRECTORY / "testpage.html").read_text()
+OLD_DATES = re.findall(r'class="tweet-date"><a [^>]*title="([^"]+)"', PAGE)
+NEW_DATES = [parse_date(date).strftime("%b %-d, %Y · %-I:%M %p UTC") for date in OLD_DATES]
+
+
+def with_dateutil(dates):
+    for date in dates:
+        dateutil.parser.parse(date.replace("·", "-"), dayfirst=True)
+
+
+def cold(dates):
+    parse_date.cache_clear()
+    for date in dates:
+        parse_date(date)
+
+
+def warm(dates):
+    for date in dates:
+        parse_date(date)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=500, help="runs per measurement")
+    args = parser.parse_args()
+
+    for label, dates in [("old format", OLD_DATES), ("new format", NEW_DATES)]:
+        results = {}
+        for name, func in [("dateutil", with_dateutil), ("cold", cold), ("warm", warm)]:
+            seconds = min(timeit.repeat(lambda: func(dates), number=args.number, repeat=3))
+            results[name] = seconds / args.number / len(dates) * 1e6
+        print(
+            f"{label}: {len(dates)} dates, dateutil {results['dateutil']:.2f} us/date, "
+            f"parse_date {results['cold']:.2f} us/date cold "
+            f"({results['dateutil'] / results['cold']:.1f}x), "
+            f"{results['warm']:.2f} us/date warm "
+            f"({results['dateutil'] / results['warm']:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Compares the requests_html and lxml parser backends on the bundled test page.
+
+Run with `python -m benchmarks.parsers`. No network access is needed.
+"""
+import argparse
+import timeit
+
+from nitter_scraper.parsers import get_backend
+from nitter_scraper.paths import DATA_DIRECTORY
+from nitter_scraper.profile import html_parser, profile_parser
+from nitter_scraper.tweets import pagination_parser, parse_tweet, timeline_parser
+
+PAGE = (DATA_DIRECTORY / "testpage.html").read_bytes()
+
+
+def parse_timeline_page(backend):
+    """Parses every tweet and the pagination cursor of a timeline page."""
+    timeline = timeline_parser(backend.parse(PAGE, "https://nitter.net/dgnsrekt"))
+    pagination_parser(timeline, "https://nitter.net", "dgnsrekt")
+    return [parse_tweet(item) for item in timeline.find(".timeline-item")]
+
+
+def parse_profile_page(backend):
+    """Parses the profile card of a page, without the banner dependent user id."""
+    elements = html_parser(backend.parse(PAGE, "https://nitter.net/dgnsrekt"))
+    elements.pop("banner_photo", None)
+    return profile_parser(elements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats, best is kept")
+    parser.add_argument("--number", type=int, default=10, help="pages parsed per repeat")
+    args = parser.parse_args()
+
+    for name, func in [("timeline", parse_timeline_page), ("profile", parse_profile_page)]:
+        results = {}
+        for backend_name in ["requests_html", "lxml"]:
+            backend = get_backend(backend_name)
+            timer = timeit.Timer(lambda: func(backend))
+            best = min(timer.repeat(repeat=args.repeat, number=args.number)) / args.number
+            results[backend_name] = best
+            print(f"{name:<10} {backend_name:<15} {best * 1000:9.2f} ms/page")
+
+        speedup = results["requests_html"] / results["lxml"]
+        print(f"{name:<10} {'speedup':<15} {speedup:9.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
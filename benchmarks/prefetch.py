@@ -0,0 +1,37 @@
+"""Compares a sequential and a prefetching get_tweets crawl against a slow local server.
+
+Run with `python -m benchmarks.prefetch`. A MockNitter serves the bundled test page for every
+page of the crawl, after waiting `--latency` seconds. No network access is needed.
+"""
+import argparse
+import time
+
+from nitter_scraper.mock import MockNitter
+from nitter_scraper.tweets import get_tweets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.3, help="server latency in seconds")
+    parser.add_argument("--parser", default="requests_html", help="parser backend")
+    args = parser.parse_args()
+
+    with MockNitter(pages=args.pages, latency=args.latency) as nitter:
+        address = nitter.address
+        for prefetch in [0, 1, 2]:
+            start = time.perf_counter()
+            tweets = get_tweets(
+                "dgnsrekt",
+                pages=args.pages,
+                address=address,
+                parser=args.parser,
+                prefetch=prefetch,
+            )
+            count = sum(1 for _ in tweets)
+            elapsed = time.perf_counter() - start
+            print(f"prefetch={prefetch}  {count} tweets  {elapsed:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
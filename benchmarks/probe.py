@@ -0,0 +1,88 @@
+"""Compares probe_timeline with get_tweets(pages=1) for checking accounts for new tweets.
+
+Run with `python -m benchmarks.probe`. No network access is needed: the accounts are polled
+from a MockNitter serving the bundled test page, with a high-water mark above every tweet, as
+in a poll that finds nothing new. The CPU time is measured with time.thread_time, so it only
+counts the polling thread and not the mock server threads.
+
+The parse only numbers time the work done on a page already in memory: scanning the bytes
+against building the DOM and running the TweetFilter.
+"""
+import argparse
+import time
+import timeit
+
+from nitter_scraper.mock import MockNitter  # noqa: I100, I202
+from nitter_scraper.parsers import get_backend
+from nitter_scraper.paths import DATA_DIRECTORY
+from nitter_scraper.probe import probe_timeline, scan_timeline
+from nitter_scraper.session import NitterSession
+from nitter_scraper.tweets import get_tweets, timeline_parser, TweetFilter
+
+PAGE = (DATA_DIRECTORY / "testpage.html").read_bytes()
+MARK = 1291835605643599878
+
+
+def poll_with_get_tweets(session, address, username, parser):
+    return list(
+        get_tweets(
+            username, pages=1, since_tweet_id=MARK, address=address, session=session, parser=parser
+        )
+    )
+
+
+def poll_with_probe(session, address, username, parser):
+    probe = probe_timeline(username, address=address, session=session)
+    if probe.new_tweets(MARK):
+        return probe.parse(since_tweet_id=MARK, parser=parser)
+    return []
+
+
+def parse_page(parser):
+    backend = get_backend(parser)
+    timeline = timeline_parser(backend.parse(PAGE, "https://nitter.net/dgnsrekt"))
+    return list(TweetFilter("dgnsrekt", since_tweet_id=MARK).filter(timeline))
+
+
+def measure_polls(func, address, accounts, parser):
+    with NitterSession() as session:
+        func(session, address, "warmup", parser)
+        cpu, wall = time.thread_time(), time.perf_counter()
+        for index in range(accounts):
+            func(session, address, f"account{index}", parser)
+        cpu, wall = time.thread_time() - cpu, time.perf_counter() - wall
+    return cpu / accounts * 1000, wall / accounts * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=200, help="accounts polled per run")
+    parser.add_argument("--parsers", nargs="+", default=["requests_html", "lxml"])
+    parser.add_argument("--number", type=int, default=50, help="runs of the parse only timing")
+    args = parser.parse_args()
+
+    scan = min(timeit.repeat(lambda: scan_timeline(PAGE), number=args.number, repeat=3))
+    scan = scan / args.number * 1000
+    print(f"parse only, scan_timeline: {scan:.3f} ms/page")
+
+    with MockNitter() as nitter:
+        probe_cpu, probe_wall = measure_polls(
+            poll_with_probe, nitter.address, args.accounts, args.parsers[0]
+        )
+        print(f"probe_timeline: {probe_cpu:.2f} ms cpu, {probe_wall:.2f} ms wall per account")
+
+        for name in args.parsers:
+            full = min(timeit.repeat(lambda: parse_page(name), number=args.number, repeat=3))
+            full = full / args.number * 1000
+            print(f"parse only, {name} DOM: {full:.3f} ms/page ({full / scan:.1f}x)")
+
+            cpu, wall = measure_polls(poll_with_get_tweets, nitter.address, args.accounts, name)
+            print(
+                f"get_tweets(pages=1, parser={name!r}): {cpu:.2f} ms cpu, {wall:.2f} ms wall "
+                f"per account, the probe saves {cpu - probe_cpu:.2f} ms cpu "
+                f"({cpu / probe_cpu:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compares writing tweets with tweet.json() one at a time against the batched JSONLSink.
+
+Run with `python -m benchmarks.sinks`. No network access is needed, the tweets of the bundled
+test page are repeated to the requested count.
+"""
+import argparse
+import os
+import tempfile
+import timeit
+
+from nitter_scraper.parsers import get_backend
+from nitter_scraper.paths import DATA_DIRECTORY
+from nitter_scraper.schema import Tweet
+from nitter_scraper.sinks import CSVSink, JSONLSink
+from nitter_scraper.tweets import parse_tweet, timeline_parser
+
+PAGE = (DATA_DIRECTORY / "testpage.html").read_bytes()
+
+
+def load_tweets(count):
+    """Parses the test page and repeats its tweets up to count tweets."""
+    timeline = timeline_parser(get_backend("lxml").parse(PAGE))
+    items = [item for item in timeline.find(".timeline-item")]
+    items = [item for item in items if "show-more" not in item.attrs["class"]]
+    tweets = [Tweet.from_dict(parse_tweet(item)) for item in items]
+    return (tweets * (count // len(tweets) + 1))[:count]
+
+
+def write_pydantic(tweets, path):
+    """The pattern used so far: one tweet.json() and one write per tweet."""
+    with open(path, "w", encoding="utf-8") as handle:
+        for tweet in tweets:
+            handle.write(tweet.json() + "\n")
+
+
+def write_sink(sink_class):
+    def write(tweets, path):
+        with sink_class(path) as sink:
+            sink.write_all(tweets)
+
+    return write
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tweets", type=int, default=20000, help="tweets written per repeat")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats, best is kept")
+    args = parser.parse_args()
+
+    tweets = load_tweets(args.tweets)
+    writers = [
+        ("tweet.json()", write_pydantic),
+        ("JSONLSink", write_sink(JSONLSink)),
+        ("CSVSink", write_sink(CSVSink)),
+    ]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tweets")
+        for name, writer in writers:
+            timer = timeit.Timer(lambda: writer(tweets, path))
+            best = min(timer.repeat(repeat=args.repeat, number=1))
+            results[name] = best
+            rate = args.tweets / best
+            print(f"{name:<15} {best * 1000:9.1f} ms {rate:12,.0f} tweets/s")
+
+    speedup = results["tweet.json()"] / results["JSONLSink"]
+    print(f"{'speedup':<15} {speedup:9.1f}x (JSONLSink over tweet.json())")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Times the parsing and pagination hot paths and saves the results as JSON.
+
+Run with `python -m benchmarks.suite --output results.json`. No network access is needed: the
+parsers run over the bundled test page and over a synthetic large page made by repeating its
+timeline items, and get_tweets crawls a MockNitter serving the test page.
+
+Two result files, for example from two commits, are compared with
+`python -m benchmarks.suite --compare before.json after.json`. The comparison prints the time
+ratio of every benchmark, and exits with status 1 when one got slower than `--threshold`.
+
+Every result holds the best and median seconds per call over the repeats, and the number of
+items (tweets, dates, pages) handled per call, so `seconds / items` gives the time per item.
+"""
+import argparse
+import copy
+from datetime import datetime
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+
+import lxml.html
+
+from nitter_scraper.mock import MockNitter  # noqa: I100, I202
+from nitter_scraper.parsers import get_backend
+from nitter_scraper.paths import DATA_DIRECTORY
+from nitter_scraper.profile import html_parser, profile_parser
+from nitter_scraper.schema import Tweet
+from nitter_scraper.tweets import (
+    date_parser,
+    get_tweets,
+    LazyTweet,
+    parse_date,
+    parse_tweet,
+    stats_parser,
+    timeline_parser,
+)
+
+PAGE = (DATA_DIRECTORY / "testpage.html").read_bytes()
+
+
+def synthetic_page(items: int) -> bytes:
+    """Builds a timeline page holding `items` tweets, by repeating the test page tweets."""
+    document = lxml.html.fromstring(PAGE)
+    timeline = document.find_class("timeline")[0]
+    tweets = [item for item in timeline if "show-more" not in item.get("class", "")]
+    more = [item for item in timeline if "show-more" in item.get("class", "")]
+    for item in tweets + more:
+        timeline.remove(item)
+    for index in range(items):
+        timeline.append(copy.deepcopy(tweets[index % len(tweets)]))
+    for item in more:
+        timeline.append(item)
+    return lxml.html.tostring(document, doctype="<!DOCTYPE html>", encoding="utf-8")
+
+
+def tweet_items(timeline):
+    items = timeline.find(".timeline-item")
+    return [item for item in items if "show-more" not in item.attrs["class"]]
+
+
+def measure(func, repeat: int):
+    """Times func, calling it often enough per repeat to last at least 0.2 seconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = [seconds / number for seconds in timer.repeat(repeat=repeat, number=number)]
+    return min(times), statistics.median(times)
+
+
+def parser_cases(backend_name: str, fixture: str, page: bytes):
+    """Yields the name, function and items per call of every parser benchmark of a page."""
+    backend = get_backend(backend_name)
+    html = backend.parse(page, "https://nitter.net/dgnsrekt")
+    timeline = timeline_parser(html)
+    items = tweet_items(timeline)
+    stats = [item.find(".tweet-stats", first=True) for item in items]
+    dates = [item.find(".tweet-date a", first=True).attrs["title"] for item in items]
+    dicts = [parse_tweet(item) for item in items]
+    prefix = f"{backend_name}/{fixture}"
+
+    def uncached_dates():
+        parse_date.cache_clear()
+        for date in dates:
+            date_parser(date)
+
+    def profile():
+        elements = html_parser(html)
+        elements.pop("banner_photo", None)
+        return profile_parser(elements)
+
+    yield f"{prefix}/parse_html", lambda: backend.parse(page, "https://nitter.net/dgnsrekt"), 1
+    yield f"{prefix}/timeline_parser", lambda: tweet_items(timeline_parser(html)), len(items)
+    yield f"{prefix}/parse_tweet", lambda: [parse_tweet(item) for item in items], len(items)
+    yield f"{prefix}/lazy_tweet_id", lambda: [LazyTweet(i).tweet_id for i in items], len(items)
+    yield f"{prefix}/stats_parser", lambda: [stats_parser(stat) for stat in stats], len(stats)
+    yield f"{prefix}/date_parser", uncached_dates, len(dates)
+    yield f"{prefix}/profile_parser", profile, 1
+    yield f"{fixture}/Tweet.from_dict", lambda: [Tweet.from_dict(d) for d in dicts], len(dicts)
+
+
+def git_commit() -> str:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict:
+    results = {}
+
+    def record(name, func, items):
+        best, median = measure(func, args.repeat)
+        results[name] = {"seconds": best, "median": median, "items": items}
+        print(f"{name:<48} {best * 1000:10.3f} ms {best / items * 1e6:10.2f} us/item")
+
+    fixtures = [("testpage", PAGE), (f"synthetic{args.items}", synthetic_page(args.items))]
+    seen = set()
+    for backend_name in args.parsers:
+        for fixture, page in fixtures:
+            for name, func, items in parser_cases(backend_name, fixture, page):
+                # Tweet.from_dict doesn't depend on the backend, time it once per fixture.
+                if name not in seen:
+                    seen.add(name)
+                    record(name, func, items)
+
+    with MockNitter(pages=args.pages) as nitter:
+        address = nitter.address
+        for backend_name in args.parsers:
+
+            def crawl(backend_name=backend_name):
+                tweets = get_tweets(
+                    "dgnsrekt", pages=args.pages, address=address, parser=backend_name
+                )
+                return sum(1 for _ in tweets)
+
+            record(f"{backend_name}/get_tweets/{args.pages}pages", crawl, crawl())
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(before_path: str, after_path: str, threshold: float) -> int:
+    """Prints the time ratio of every benchmark found in both files.
+
+    Returns:
+        1 if a benchmark got slower by more than the threshold, else 0.
+    """
+    with open(before_path) as file:
+        before = json.load(file)
+    with open(after_path) as file:
+        after = json.load(file)
+
+    print(f"{before['meta']['commit']} -> {after['meta']['commit']}")
+    status = 0
+    for name, result in after["results"].items():
+        if name not in before["results"]:
+            continue
+        ratio = result["seconds"] / before["results"][name]["seconds"]
+        flag = ""
+        if ratio > threshold:
+            flag, status = "  SLOWER", 1
+        elif ratio < 1 / threshold:
+            flag = "  faster"
+        print(f"{name:<48} {ratio:8.2f}x{flag}")
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", help="json file the results are saved to")
+    parser.add_argument("--parsers", nargs="+", default=["requests_html", "lxml"])
+    parser.add_argument("--items", type=int, default=500, help="tweets of the synthetic page")
+    parser.add_argument("--pages", type=int, default=5, help="pages of the get_tweets crawl")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    parser.add_argument(
+        "--threshold", type=float, default=1.2, help="slowdown ratio counted as a regression"
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+
+    results = run(args)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
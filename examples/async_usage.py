@@ -0,0 +1,22 @@
+import asyncio
+
+from nitter_scraper import async_get_tweets, AsyncSession
+
+users = ["dgnsrekt", "NielsOerbaek"]
+
+
+async def latest_tweets(username, session):
+    return [tweet async for tweet in async_get_tweets(username, pages=1, session=session)]
+
+
+async def main():
+    async with AsyncSession(concurrency=50) as session:
+        results = await asyncio.gather(*[latest_tweets(user, session) for user in users])
+
+    for user, tweets in zip(users, results):
+        print(f"{user}: {len(tweets)} tweets")
+        for tweet in tweets:
+            print(tweet.json(indent=4))
+
+
+asyncio.run(main())
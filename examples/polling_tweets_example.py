@@ -1,24 +1,22 @@
-import time
+from nitter_scraper import NitterScraper, Watcher
 
-from nitter_scraper import NitterScraper
 
-last_tweet_id = None
+def on_tweet(tweet):
+    print(tweet.json(indent=4))
 
-with NitterScraper(port=8008) as nitter:
-    while True:
-        for tweet in nitter.get_tweets("dgnsrekt", pages=1, break_on_tweet_id=last_tweet_id):
-
-            if tweet.is_pinned is True:
-                continue
-
-            if tweet.is_retweet is True:
-                continue
 
-            if tweet.tweet_id != last_tweet_id:
-                print(tweet.json(indent=4))
+usernames = ["dgnsrekt", "NielsOerbaek"]
 
-            last_tweet_id = tweet.tweet_id
-
-            break
-
-        time.sleep(0.1)
+with NitterScraper(port=8008) as nitter:
+    # Each account is polled about as often as it posts, between 30 seconds and 30 minutes.
+    watcher = Watcher(
+        usernames,
+        callback=on_tweet,
+        address=nitter.address,
+        session=nitter.session,
+        min_interval=30,
+        max_interval=1800,
+        include_retweets=False,
+    )
+    with watcher:
+        watcher.join()
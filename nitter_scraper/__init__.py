@@ -1,8 +1,20 @@
-from nitter_scraper.nitter import NitterScraper
+from nitter_scraper.aio import async_get_profile, async_get_tweets, AsyncSession
+from nitter_scraper.nitter import NitterPoolScraper, NitterScraper
 from nitter_scraper.profile import get_profile
 from nitter_scraper.tweets import get_tweets
 import nitter_scraper.utils as utils
+from nitter_scraper.watcher import Watcher
 
-__all__ = ["get_profile", "get_tweets", "NitterScraper", "utils"]
+__all__ = [
+    "async_get_profile",
+    "async_get_tweets",
+    "AsyncSession",
+    "get_profile",
+    "get_tweets",
+    "NitterPoolScraper",
+    "NitterScraper",
+    "utils",
+    "Watcher",
+]
 
 __version__ = "0.5.2"
@@ -0,0 +1,289 @@
+"""Module for scraping tweets and profiles from an asyncio event loop"""
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Optional, Union
+
+from requests_html import AsyncHTMLSession
+
+from nitter_scraper.archive import PageArchive  # noqa: I100, I202
+from nitter_scraper.cache import ResponseCache
+from nitter_scraper.checkpoint import CheckpointStore
+from nitter_scraper.dedup import BloomFilter, LRUSet
+from nitter_scraper.metrics import Hooks
+from nitter_scraper.probe import is_timeline_response
+from nitter_scraper.profile import parse_profile
+from nitter_scraper.retry import async_fetch, DEFAULT_RETRY_POLICY, RateLimiter, RetryPolicy
+from nitter_scraper.schema import Profile, Tweet
+from nitter_scraper.session import mount_pools, preference_cookies
+from nitter_scraper.tweets import build_timeline_url, TimelineCrawl, TweetFilter
+
+
+class AsyncSession:
+    """An asyncio session shared between many scraping coroutines.
+
+    Requests are run on a thread pool sized to the concurrency limit, and a semaphore makes
+    sure no more than `concurrency` requests are in flight at once, no matter how many
+    timelines are being scraped from the event loop. Like NitterSession, connections are
+    kept alive per host and the nitter preference cookies are set once.
+
+    Args:
+        concurrency: Max number of requests in flight at once.
+        pool_connections: Number of hosts to keep a connection pool for.
+        retry_policy: How failed requests are retried. If None, DEFAULT_RETRY_POLICY is used.
+        rate_limiter: A rate limiter, possibly shared with other sessions. If None, requests
+            are not rate limited.
+        cache: A ResponseCache, possibly shared with other sessions. If None, responses are
+            not cached.
+        metrics: Instrumentation hooks, like a Metrics instance, see nitter_scraper.metrics.
+        archive: A PageArchive every fetched page is added to, see nitter_scraper.archive.
+
+    Example:
+    ```
+        async with AsyncSession(concurrency=200) as session:
+            coros = [collect(async_get_tweets(user, session=session)) for user in users]
+            await asyncio.gather(*coros)
+    ```
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 100,
+        pool_connections: int = 10,
+        retry_policy: RetryPolicy = None,
+        rate_limiter: RateLimiter = None,
+        cache: ResponseCache = None,
+        metrics: Hooks = None,
+        archive: PageArchive = None,
+    ):
+        self.concurrency = concurrency
+        self.pool_connections = pool_connections
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.metrics = metrics
+        self.archive = archive
+        self._session = None
+        self._semaphore = None
+
+    def _get_session(self) -> AsyncHTMLSession:
+        if self._session is None:
+            loop = asyncio.get_running_loop()
+            self._session = AsyncHTMLSession(loop=loop, workers=self.concurrency)
+            mount_pools(self._session, self.pool_connections, pool_maxsize=self.concurrency)
+            self._session.headers.update({"Cookie": preference_cookies()})
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    async def get(self, url: str, **kwargs):
+        """Sends a GET request once a concurrency slot is free.
+
+        Args:
+            url: The url to request.
+            **kwargs: Passed on to requests.
+
+        Returns:
+            HTMLResponse
+        """
+        session = self._get_session()
+        async with self._semaphore:
+            return await session.get(url, **kwargs)
+
+    async def close(self):
+        """Closes the underlying session and its thread pool."""
+        if self._session is not None:
+            await self._session.close()
+            self._session.thread_pool.shutdown(wait=False)
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncSession":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+async def async_get_with_retry(
+    session: AsyncSession, url: str, retries: int = None, parser="requests_html", **kwargs
+):
+    """Async version of nitter_scraper.tweets.get_with_retry().
+
+    Pages are checked on their raw bytes, see nitter_scraper.probe.is_timeline_response, so
+    no DOM is built on the event loop. The parser argument is kept for compatibility.
+    """
+    policy = session.retry_policy or DEFAULT_RETRY_POLICY
+    if retries is not None:
+        policy = policy.copy(update={"max_retries": retries})
+
+    return await async_fetch(
+        session, url, retry_policy=policy, validate=is_timeline_response, **kwargs
+    )
+
+
+async def async_get_tweets(
+    username: str = None,
+    search: str = None,
+    pages: int = 25,
+    limit: int = None,
+    break_on_tweet_id: Optional[int] = None,
+    address="https://nitter.net",
+    original_urls: bool = False,
+    since_time: datetime = None,
+    until_time: datetime = None,
+    session: AsyncSession = None,
+    parser: str = "requests_html",
+    since_tweet_id: Optional[int] = None,
+    checkpoint: CheckpointStore = None,
+    checkpoint_key: str = None,
+    dedup: Union[bool, LRUSet, BloomFilter] = None,
+    validate: bool = True,
+    seek: bool = False,
+    lazy: bool = False,
+) -> AsyncIterator[Tweet]:
+    """Gets the target users tweets without blocking the event loop.
+
+    This is an async version of nitter_scraper.tweets.get_tweets() and takes the same filters.
+    Pages are parsed on the default executor of the event loop, so parsing doesn't hold up
+    the other coroutines.
+
+    Args:
+        username: Targeted users username.
+        search: Search query, used instead of a username.
+        pages: Max number of pages to lookback starting from the latest tweet.
+        limit: Max number of tweets to yield.
+        break_on_tweet_id: Gives the ability to break out of a loop if a tweets id is found.
+        address: The address to scrape from. The default is https://nitter.net which should
+            be used as a fallback address.
+        original_urls: If True, the original urls will be used instead of the nitter, piped,
+            teddit alternatives.
+        since_time: The earliest time to scrape tweets from.
+        until_time: The latest time to scrape tweets from.
+        session: A shared AsyncSession. If None, a session is created and closed for this call.
+        parser: The html parser backend, "requests_html" or the faster "lxml".
+        since_tweet_id: Only yields tweets newer than this id, and stops at the first older
+            tweet.
+        checkpoint: A CheckpointStore the position of the crawl is saved to after every page.
+        checkpoint_key: Identifies the crawl in the checkpoint store. Defaults to the url of
+            the first page.
+        dedup: Drops tweets that were already yielded. True drops the duplicates of this call,
+            a shared LRUSet or BloomFilter also drops tweets seen by other calls.
+        validate: If False, Tweet objects are built without pydantic validation.
+        seek: If True, a user timeline with a since_time or until_time is read from a search
+            for the users tweets in the window.
+        lazy: If True, yields LazyTweet proxies that parse each field on first access. Only
+            the fields the filters need are parsed on the executor, the others are parsed by
+            whoever reads them, so read them or call to_tweet() on an executor to keep the
+            parsing off the event loop.
+
+    Yields:
+        Tweet Objects, or LazyTweet proxies in lazy mode.
+    """
+    address, url, endpoint = build_timeline_url(
+        address, username, search, since_time, until_time, seek
+    )
+
+    owns_session = session is None
+    if owns_session:
+        session = AsyncSession()
+
+    # The session already carries the default preferences, only override them when needed.
+    headers = {"Cookie": preference_cookies(original_urls)} if original_urls else {}
+    if isinstance(dedup, bool):
+        dedup = LRUSet() if dedup else None
+    tweet_filter = TweetFilter(
+        endpoint,
+        limit,
+        break_on_tweet_id,
+        since_time,
+        until_time,
+        since_tweet_id,
+        dedup,
+        hooks=session.metrics,
+        lazy=lazy,
+    )
+    crawl = TimelineCrawl(
+        url,
+        address,
+        endpoint,
+        pages,
+        tweet_filter,
+        parser,
+        session.metrics,
+        checkpoint,
+        checkpoint_key,
+    )
+    loop = asyncio.get_running_loop()
+
+    def parse_page(response):
+        tweet_page, next_url = crawl.parse_page(response)
+        if not lazy:
+            tweet_page = [Tweet.from_dict(data, validate=validate) for data in tweet_page]
+        return tweet_page, next_url
+
+    try:
+        while crawl.next_url:
+            response = await async_get_with_retry(
+                session, crawl.next_url, parser=crawl.backend, headers=headers
+            )
+            if response is None:
+                break
+
+            tweet_page, next_url = await loop.run_in_executor(None, parse_page, response)
+            for tweet in tweet_page:
+                yield tweet
+
+            crawl.page_done(next_url)
+
+    finally:
+        if owns_session:
+            await session.close()
+
+
+async def async_get_profile(
+    username: str,
+    not_found_ok: bool = False,
+    address: str = "https://nitter.net",
+    session: AsyncSession = None,
+    parser: str = "requests_html",
+    validate: bool = True,
+) -> Optional[Profile]:
+    """Scrapes nitter for the target users profile information without blocking the event loop.
+
+    This is an async version of nitter_scraper.profile.get_profile(). The page is parsed on
+    the default executor of the event loop.
+
+    Args:
+        username: The target profiles username.
+        not_found_ok: If not_found_ok is false (the default), a ValueError is raised if the target
+            profile doesn't exist. If not_found_ok is true, None will be returned instead.
+        address: The address to scrape profile data from.
+        session: A shared AsyncSession. If None, a session is created and closed for this call.
+        parser: The html parser backend, "requests_html" or the faster "lxml".
+        validate: If False, the Profile object is built without pydantic validation.
+
+    Returns:
+        Profile object if successfully scraped, otherwise None.
+
+    Raises:
+        ValueError: If the target profile does not exist and the not_found_ok argument is false.
+    """
+    url = f"{address}/{username}"
+
+    owns_session = session is None
+    if owns_session:
+        session = AsyncSession()
+
+    try:
+        response = await async_fetch(session, url)
+    finally:
+        if owns_session:
+            await session.close()
+
+    if response.status_code == 200:  # user exists
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, parse_profile, response, parser, validate)
+
+    if not_found_ok:
+        return None
+
+    else:
+        raise ValueError(f'Oops! Either "{username}" does not exist or is private.')
@@ -0,0 +1,374 @@
+"""Module for archiving the raw nitter pages, to parse them again without scraping.
+
+Datasets are built from what the parsers understood at the time of the crawl. When a parser
+changes, like a new date format or a field that wasn't read before, the pages have to be
+scraped again, unless they were kept. A PageArchive set on a session keeps every timeline,
+search and profile page fetched through it:
+
+* The pages are appended to compressed segment files, each page compressed on its own so it
+  can be read back without decompressing the rest of its segment. Segments are never
+  rewritten, a new one is started once the current one is full.
+* A SQLite index points to every page, by url, username, cursor and fetch time.
+
+The archive is read back page by page with `pages()` and `read()`, or replayed: a session
+mounted with `mount_replay()` answers requests from the archive instead of the network, so
+get_tweets and get_profile rebuild a dataset with the current parsers and zero requests.
+
+Pages are compressed with gzip, about 9 times smaller, or with zstd when the optional
+zstandard package is installed, which compresses and decompresses faster.
+
+Example:
+```
+    archive = PageArchive("~/nitter_archive")
+    with NitterSession(archive=archive) as session:
+        tweets = list(get_tweets("dgnsrekt", pages=10, session=session))
+
+    with NitterSession() as session:
+        mount_replay(session, archive)
+        tweets = list(get_tweets("dgnsrekt", pages=10, session=session))  # no requests
+```
+"""
+import gzip
+import json
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Iterator, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
+from pydantic import BaseModel as Base
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+COMPRESSIONS = ["gzip", "zstd"]
+"""* The page compressions, zstd needs the zstandard package."""
+
+EXTENSIONS = {"gzip": "gz", "zstd": "zst"}
+
+
+class ArchivedPage(Base):
+    """The index entry of an archived page.
+
+    Attributes:
+        id: Position of the page in the archive, in the order pages were added.
+        url: The requested url.
+        path: The path and query of the url, without the nitter address.
+        username: The username of a timeline or profile page, None for searches.
+        cursor: The pagination cursor, None for first pages.
+        kind: "search" for search pages, otherwise "timeline". Profile pages share their url
+            with the first timeline page.
+        fetched: Unix time the page was fetched.
+        status: The status code of the response.
+        encoding: The encoding of the response.
+        headers: The headers of the response.
+        segment: The segment file holding the page.
+        offset: Offset of the compressed page in the segment.
+        length: Length of the compressed page.
+        size: Length of the page.
+    """
+
+    id: int
+    url: str
+    path: str
+    username: Optional[str]
+    cursor: Optional[str]
+    kind: str
+    fetched: float
+    status: int
+    encoding: Optional[str]
+    headers: dict
+    segment: str
+    offset: int
+    length: int
+    size: int
+
+
+def describe_url(url: str) -> dict:
+    """Reads the path, username, cursor and kind of a nitter url, for the index."""
+    parsed = urlparse(url)
+    path = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+    cursor = parse_qs(parsed.query).get("cursor", [None])[0]
+    parts = [part for part in parsed.path.split("/") if part]
+    if parts[-1:] == ["search"]:
+        return {"path": path, "username": None, "cursor": cursor, "kind": "search"}
+    username = parts[-1] if parts else None
+    return {"path": path, "username": username, "cursor": cursor, "kind": "timeline"}
+
+
+def _codec(compression: str):
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r}, choose from {COMPRESSIONS}")
+    if compression == "gzip":
+        return gzip.compress, gzip.decompress
+
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "The zstd compression needs zstandard, install it with "
+            "pip install nitter_scraper[zstd]"
+        )
+    return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+
+
+class PageArchive:
+    """An append-only archive of raw nitter pages, compressed in segment files.
+
+    Args:
+        path: Directory of the segment files and of the index.sqlite index.
+        compression: "gzip", or "zstd" with the zstandard package installed. Segments
+            written with the other compression stay readable.
+        segment_bytes: Size after which the current segment is closed and a new one started.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        compression: str = "gzip",
+        segment_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.path = Path(path).expanduser()
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
+        self.segment_bytes = segment_bytes
+        self._compress, _ = _codec(compression)
+        self._decompressors = {}
+        self._lock = threading.Lock()
+        self._segment = None
+        self._file = None
+
+        self._db = sqlite3.connect(str(self.path / "index.sqlite"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "id INTEGER PRIMARY KEY, url TEXT, path TEXT, username TEXT, cursor TEXT, "
+            "kind TEXT, fetched REAL, status INTEGER, encoding TEXT, headers TEXT, "
+            "segment TEXT, offset INTEGER, length INTEGER, size INTEGER)"
+        )
+        for column in ["url", "path", "username", "cursor", "fetched"]:
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS pages_{column} ON pages ({column})")
+        self._db.commit()
+
+    def add(self, url: str, response, fetched: float = None) -> ArchivedPage:
+        """Appends the page of a response to the archive.
+
+        Args:
+            url: The requested url.
+            response: The response holding the page.
+            fetched: Unix time the page was fetched. Defaults to now.
+
+        Returns:
+            The index entry of the page.
+        """
+        content = response.content
+        compressed = self._compress(content)
+        values = {
+            **describe_url(url),
+            "url": url,
+            "fetched": time.time() if fetched is None else fetched,
+            "status": response.status_code,
+            "encoding": response.encoding,
+            "headers": json.dumps(dict(response.headers)),
+            "length": len(compressed),
+            "size": len(content),
+        }
+
+        with self._lock:
+            segment_file = self._writable_segment()
+            values["segment"] = self._segment
+            values["offset"] = segment_file.tell()
+            segment_file.write(compressed)
+            # The page is on disk before the index points to it.
+            segment_file.flush()
+
+            columns = ", ".join(values)
+            marks = ", ".join("?" * len(values))
+            cursor = self._db.execute(
+                f"INSERT INTO pages ({columns}) VALUES ({marks})", list(values.values())
+            )
+            self._db.commit()
+            values["id"] = cursor.lastrowid
+
+        values["headers"] = dict(response.headers)
+        return ArchivedPage(**values)
+
+    def _writable_segment(self):
+        if self._file is not None and self._file.tell() < self.segment_bytes:
+            return self._file
+
+        extension = EXTENSIONS[self.compression]
+        segments = sorted(self.path.glob("segment-*.*"))
+        last = segments[-1] if segments else None
+        if (
+            self._file is None
+            and last is not None
+            and last.suffix == f".{extension}"
+            and last.stat().st_size < self.segment_bytes
+        ):
+            # Reopened archives keep appending to their last segment.
+            segment = last
+        else:
+            if self._file is not None:
+                self._file.close()
+            number = int(last.name.split("-")[1].split(".")[0]) if last is not None else 0
+            segment = self.path / f"segment-{number + 1:06d}.{extension}"
+
+        self._segment = segment.name
+        self._file = open(segment, "ab")
+        return self._file
+
+    def pages(
+        self,
+        username: str = None,
+        kind: str = None,
+        since: float = None,
+        until: float = None,
+        url: str = None,
+        cursor: str = None,
+    ) -> Iterator[ArchivedPage]:
+        """Lists archived pages, in the order they were added.
+
+        Args:
+            username: Only pages of this username, case insensitive.
+            kind: Only "timeline" or "search" pages.
+            since: Only pages fetched at or after this unix time.
+            until: Only pages fetched before this unix time.
+            url: Only pages of this url.
+            cursor: Only pages of this pagination cursor.
+
+        Yields:
+            ArchivedPage index entries.
+        """
+        filters, params = [], []
+        for clause, value in [
+            ("username = ? COLLATE NOCASE", username),
+            ("kind = ?", kind),
+            ("fetched >= ?", since),
+            ("fetched < ?", until),
+            ("url = ?", url),
+            ("cursor = ?", cursor),
+        ]:
+            if value is not None:
+                filters.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+        with self._lock:
+            rows = self._db.execute(f"SELECT * FROM pages {where} ORDER BY id", params)
+            names = [column[0] for column in rows.description]
+            rows = rows.fetchall()
+
+        for row in rows:
+            yield self._page(names, row)
+
+    def latest(self, url: str) -> Optional[ArchivedPage]:
+        """The last archived page of an url.
+
+        If the url itself was never archived, the last page with the same path and query is
+        returned, so pages archived from any nitter address are found.
+        """
+        with self._lock:
+            for column, value in [("url", url), ("path", describe_url(url)["path"])]:
+                rows = self._db.execute(
+                    f"SELECT * FROM pages WHERE {column} = ? ORDER BY id DESC LIMIT 1", (value,)
+                )
+                row = rows.fetchone()
+                if row is not None:
+                    return self._page([column[0] for column in rows.description], row)
+        return None
+
+    @staticmethod
+    def _page(names, row) -> ArchivedPage:
+        values = dict(zip(names, row))
+        values["headers"] = json.loads(values["headers"])
+        return ArchivedPage(**values)
+
+    def read(self, page: ArchivedPage) -> bytes:
+        """Reads the raw page of an index entry."""
+        extension = page.segment.rsplit(".", 1)[1]
+        compression = next(name for name, ext in EXTENSIONS.items() if ext == extension)
+        if compression not in self._decompressors:
+            self._decompressors[compression] = _codec(compression)[1]
+
+        with open(self.path / page.segment, "rb") as segment_file:
+            segment_file.seek(page.offset)
+            compressed = segment_file.read(page.length)
+        return self._decompressors[compression](compressed)
+
+    def response(self, page: ArchivedPage, request=None) -> Response:
+        """Rebuilds the response of an archived page."""
+        response = Response()
+        response.url = page.url
+        response.status_code = page.status
+        response.headers = CaseInsensitiveDict(page.headers)
+        response.encoding = page.encoding
+        response._content = self.read(page)
+        response.request = request
+        return response
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        """Closes the current segment and the index."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __enter__(self) -> "PageArchive":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """A transport answering requests from a PageArchive, without network access.
+
+    Requests are answered with the last archived page of their url, or of their path and
+    query when the url was archived from another nitter address. Urls that were never
+    archived get an empty 404.
+
+    Args:
+        archive: The archive to replay.
+    """
+
+    def __init__(self, archive: PageArchive):
+        super().__init__()
+        self.archive = archive
+
+    def send(self, request, **kwargs) -> Response:
+        page = self.archive.latest(request.url)
+        if page is None:
+            response = Response()
+            response.url = request.url
+            response.status_code = 404
+            response.encoding = "utf-8"
+            response._content = b""
+            response.request = request
+            return response
+
+        response = self.archive.response(page, request)
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def mount_replay(session, archive: PageArchive):
+    """Mounts a ReplayAdapter, so every http and https request of a session is replayed.
+
+    Args:
+        session: The session to configure, like a NitterSession.
+        archive: The archive to replay.
+    """
+    adapter = ReplayAdapter(archive)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
@@ -0,0 +1,261 @@
+"""Module for crawling timelines into columnar batches.
+
+get_tweets_batches yields TweetBatch objects built straight from the parsed tweet dicts,
+without building a Tweet object per tweet. Columns use the Arrow memory layout:
+
+* Integer and boolean columns are `array.array` objects, usable as numpy arrays with
+  `numpy.frombuffer(batch.likes, dtype=numpy.int64)`.
+* Tweets whose date couldn't be parsed have no time. Their time is stored as 0 and marked
+  with a 0 in the `time_valid` int8 array, the validity array of the time column.
+* Text columns are StringColumn objects, the utf-8 bytes of every value in one buffer plus an
+  int32 array of offsets.
+* Entries columns are ListColumn objects, the items of every list in one StringColumn plus an
+  int32 array of offsets.
+
+A million tweets held this way take about 330 MB against about 3 GB for a list of Tweet
+objects, see benchmarks/batches.py.
+"""
+from array import array
+import calendar
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from nitter_scraper.checkpoint import CheckpointStore  # noqa: I100, I202
+from nitter_scraper.dedup import BloomFilter, LRUSet
+from nitter_scraper.session import NitterSession
+from nitter_scraper.tweets import iter_tweet_pages
+
+INT_COLUMNS = ["tweet_id", "time", "replies", "retweets", "quotes", "likes"]
+"""* Columns stored as int64 arrays. The time is in seconds since the epoch, in UTC, and 0
+where `time_valid` is 0."""
+
+BOOL_COLUMNS = ["is_retweet", "is_pinned"]
+"""* Columns stored as int8 arrays of 0 and 1."""
+
+STRING_COLUMNS = ["tweet_url", "username", "text"]
+"""* Columns stored as StringColumn objects."""
+
+LIST_COLUMNS = ["hashtags", "cashtags", "urls", "photos", "videos"]
+"""* Columns of the tweet entries, stored as ListColumn objects."""
+
+
+class StringColumn:
+    """A column of strings, stored as one utf-8 buffer and the offsets of each value."""
+
+    __slots__ = ["data", "offsets"]
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("i", [0])
+
+    def append(self, value: str):
+        self.data += value.encode()
+        self.offsets.append(len(self.data))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.data[start:end].decode()
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+class ListColumn:
+    """A column of lists of strings, stored as one StringColumn and the offsets of each list."""
+
+    __slots__ = ["values", "offsets"]
+
+    def __init__(self):
+        self.values = StringColumn()
+        self.offsets = array("i", [0])
+
+    def append(self, items: Iterable[str]):
+        for item in items:
+            self.values.append(item)
+        self.offsets.append(len(self.values))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> List[str]:
+        if index < 0:
+            index += len(self)
+        values = self.values
+        return [values[i] for i in range(self.offsets[index], self.offsets[index + 1])]
+
+    def __iter__(self) -> Iterator[List[str]]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+def epoch_seconds(time: datetime) -> int:
+    """Converts a datetime to seconds since the epoch. Naive datetimes are taken as UTC."""
+    return calendar.timegm(time.utctimetuple())
+
+
+class TweetBatch:
+    """A batch of tweets stored column by column.
+
+    Every column listed in INT_COLUMNS, BOOL_COLUMNS, STRING_COLUMNS and LIST_COLUMNS is an
+    attribute of the batch, and all columns have the same length.
+
+    Attributes:
+        time_valid: int8 array, 1 for the tweets that have a time and 0 for the ones whose
+            date couldn't be parsed. The missing times are None in to_pylist and null in
+            to_arrow.
+
+    Example:
+    ```
+        for batch in get_tweets_batches("dgnsrekt", pages=100, batch_size=10_000):
+            likes = numpy.frombuffer(batch.likes, dtype=numpy.int64)
+            print(len(batch), likes.mean())
+    ```
+    """
+
+    def __init__(self):
+        for name in INT_COLUMNS:
+            setattr(self, name, array("q"))
+        for name in BOOL_COLUMNS:
+            setattr(self, name, array("b"))
+        for name in STRING_COLUMNS:
+            setattr(self, name, StringColumn())
+        for name in LIST_COLUMNS:
+            setattr(self, name, ListColumn())
+        self.time_valid = array("b")
+
+    def __len__(self) -> int:
+        return len(self.tweet_id)
+
+    def append(self, tweet_data: Dict):
+        """Appends a tweet dict, as returned by parse_tweet."""
+        self.tweet_id.append(int(tweet_data["tweet_id"]))
+        time = tweet_data["time"]
+        self.time.append(epoch_seconds(time) if time is not None else 0)
+        self.time_valid.append(time is not None)
+        for name in ["replies", "retweets", "quotes", "likes"]:
+            getattr(self, name).append(tweet_data[name])
+        for name in BOOL_COLUMNS:
+            getattr(self, name).append(tweet_data[name])
+        for name in STRING_COLUMNS:
+            getattr(self, name).append(tweet_data[name])
+        entries = tweet_data["entries"]
+        for name in LIST_COLUMNS:
+            getattr(self, name).append(entries[name])
+
+    @property
+    def columns(self) -> Dict[str, object]:
+        """Every column by name."""
+        names = INT_COLUMNS + BOOL_COLUMNS + STRING_COLUMNS + LIST_COLUMNS
+        return {name: getattr(self, name) for name in names}
+
+    def to_pylist(self) -> List[Dict]:
+        """Converts the batch to a list of row dicts, with the entries flattened."""
+        columns = {name: list(column) for name, column in self.columns.items()}
+        columns["time"] = [
+            time if valid else None for time, valid in zip(columns["time"], self.time_valid)
+        ]
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+    def to_arrow(self):
+        """Converts the batch to a pyarrow RecordBatch. Needs the parquet extra."""
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError(
+                "TweetBatch.to_arrow needs pyarrow, install it with "
+                "pip install nitter_scraper[parquet]"
+            )
+
+        arrays, names = [], []
+        for name, column in self.columns.items():
+            if name == "time":
+                missing = [not valid for valid in self.time_valid]
+                timestamp = pyarrow.timestamp("s", tz="UTC")
+                arrays.append(pyarrow.array(column, timestamp, mask=missing))
+            elif name in BOOL_COLUMNS:
+                arrays.append(pyarrow.array([bool(value) for value in column]))
+            elif name in STRING_COLUMNS or name in LIST_COLUMNS:
+                arrays.append(pyarrow.array(list(column)))
+            else:
+                arrays.append(pyarrow.array(column, pyarrow.int64()))
+            names.append(name)
+        return pyarrow.RecordBatch.from_arrays(arrays, names=names)
+
+
+def get_tweets_batches(
+    username: str = None,
+    search: str = None,
+    batch_size: int = 10_000,
+    pages: int = 25,
+    limit: int = None,
+    break_on_tweet_id: Optional[int] = None,
+    address="https://nitter.net",
+    original_urls: bool = False,
+    since_time: datetime = None,
+    until_time: datetime = None,
+    session: NitterSession = None,
+    parser: str = "requests_html",
+    prefetch: int = 0,
+    since_tweet_id: Optional[int] = None,
+    checkpoint: CheckpointStore = None,
+    checkpoint_key: str = None,
+    dedup: Union[bool, LRUSet, BloomFilter] = None,
+    seek: bool = False,
+) -> Iterator[TweetBatch]:
+    """Gets the target users tweets in columnar batches.
+
+    Takes the same arguments as nitter_scraper.tweets.get_tweets(), plus the batch size.
+
+    Args:
+        batch_size: Max number of tweets in a batch. With a checkpoint store, a batch is also
+            yielded at the end of every page, so a saved position never skips tweets of a
+            batch that wasn't yielded yet.
+
+    Yields:
+        TweetBatch objects. Only the last batch, and batches cut at page ends, hold fewer
+        than batch_size tweets.
+    """
+    tweet_pages = iter_tweet_pages(
+        username=username,
+        search=search,
+        pages=pages,
+        limit=limit,
+        break_on_tweet_id=break_on_tweet_id,
+        address=address,
+        original_urls=original_urls,
+        since_time=since_time,
+        until_time=until_time,
+        session=session,
+        parser=parser,
+        prefetch=prefetch,
+        since_tweet_id=since_tweet_id,
+        checkpoint=checkpoint,
+        checkpoint_key=checkpoint_key,
+        dedup=dedup,
+        seek=seek,
+    )
+
+    batch = TweetBatch()
+    try:
+        for tweet_page in tweet_pages:
+            for tweet_data in tweet_page:
+                batch.append(tweet_data)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = TweetBatch()
+
+            if checkpoint is not None and len(batch):
+                yield batch
+                batch = TweetBatch()
+
+        if len(batch):
+            yield batch
+
+    finally:
+        tweet_pages.close()
@@ -0,0 +1,268 @@
+"""Module for caching nitter responses between scraping calls.
+
+Jobs often request the same profile, timeline and search pages within minutes of each other.
+A ResponseCache set on a session lets every fetch made through it answer those requests
+without downloading and parsing the page again.
+
+* The memory tier keeps the most recently used responses, parsed pages included.
+* The optional disk tier keeps the raw pages in a SQLite database, shared between processes
+  and kept between runs.
+
+Entries expire after a TTL that depends on the kind of page: pagination cursor pages reach
+back into history that rarely changes, so they are kept much longer than first pages.
+"""
+from collections import OrderedDict
+import json
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Union
+from urllib.parse import urlparse
+
+from pydantic import BaseModel as Base
+from requests.structures import CaseInsensitiveDict
+from requests_html import HTMLResponse
+
+DEFAULT_TTLS = {"timeline": 300.0, "search": 120.0, "cursor": 86400.0}
+"""* Seconds an entry is kept, by kind of page."""
+
+
+def page_kind(url: str) -> str:
+    """Classifies a nitter url for the TTL lookup.
+
+    Args:
+        url: The requested url.
+
+    Returns:
+        "cursor" for pagination pages, "search" for first search pages, otherwise "timeline".
+        Profile pages share their url with the first timeline page.
+    """
+    parsed = urlparse(url)
+    if "cursor=" in parsed.query:
+        return "cursor"
+    if parsed.path.endswith("/search"):
+        return "search"
+    return "timeline"
+
+
+class CacheStats(Base):
+    """Hit and miss counters of a ResponseCache.
+
+    Attributes:
+        memory_hits: Lookups answered by the memory tier.
+        disk_hits: Lookups answered by the disk tier.
+        misses: Lookups that had to be fetched.
+        stores: Responses added to the cache.
+        evictions: Entries dropped to stay within the size limits.
+    """
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """A two tier cache of successful nitter responses.
+
+    Args:
+        ttls: Per page kind overrides of DEFAULT_TTLS, keyed by "timeline", "search" or
+            "cursor".
+        max_entries: Max number of responses kept in memory.
+        path: SQLite database file of the disk tier. If None, only the memory tier is used.
+        max_bytes: Max size of the pages kept on disk. The least recently used pages are
+            dropped first.
+
+    Example:
+    ```
+        cache = ResponseCache(path="~/.cache/nitter_scraper.sqlite")
+        with NitterSession(cache=cache) as session:
+            profile = get_profile("dgnsrekt", session=session)
+            tweets = list(get_tweets("dgnsrekt", pages=1, session=session))  # cache hit
+        print(cache.stats)
+    ```
+    """
+
+    def __init__(
+        self,
+        ttls: Dict[str, float] = None,
+        max_entries: int = 256,
+        path: Union[str, Path] = None,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path is not None:
+            path = Path(path).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, encoding TEXT, "
+                "content BLOB, size INTEGER, expires REAL, accessed REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS accessed ON responses (accessed)")
+            self._db.commit()
+
+    @staticmethod
+    def key(url: str, headers: Optional[dict] = None) -> str:
+        """Builds the cache key of a request. The nitter preference cookies change the page."""
+        cookie = (headers or {}).get("Cookie", "")
+        return f"{url}\n{cookie}" if cookie else url
+
+    def ttl(self, url: str) -> float:
+        """Seconds a response of an url is kept."""
+        return self.ttls[page_kind(url)]
+
+    def get(self, url: str, headers: Optional[dict] = None, session=None, validate=None):
+        """Looks up a cached response.
+
+        Args:
+            url: The requested url.
+            headers: The request headers passed to session.get(), if any.
+            session: The session set on responses rebuilt from the disk tier.
+            validate: Called with the cached response, returns False for responses the
+                caller can't use, like an empty timeline cached by a profile fetch. Rejected
+                responses count as misses.
+
+        Returns:
+            The cached response, or None.
+        """
+        response, tier = self._lookup(self.key(url, headers), session)
+        if response is not None and validate is not None and not validate(response):
+            response = None
+
+        with self._lock:
+            if response is None:
+                self.stats.misses += 1
+            elif tier == "memory":
+                self.stats.memory_hits += 1
+            else:
+                self.stats.disk_hits += 1
+        return response
+
+    def _lookup(self, key: str, session):
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires, response = entry
+                if expires > now:
+                    self._memory.move_to_end(key)
+                    return response, "memory"
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT url, status, headers, encoding, content, expires FROM responses "
+                    "WHERE key = ? AND expires > ?",
+                    (key, now),
+                ).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    response = self._build_response(row, session)
+                    self._remember(key, row[5], response)
+                    return response, "disk"
+
+        return None, None
+
+    def set(self, url: str, response, headers: Optional[dict] = None):
+        """Caches a successful response.
+
+        Args:
+            url: The requested url.
+            response: The response to cache.
+            headers: The request headers passed to session.get(), if any.
+        """
+        key = self.key(url, headers)
+        now = time.time()
+        expires = now + self.ttl(url)
+
+        with self._lock:
+            self._remember(key, expires, response)
+            self.stats.stores += 1
+
+            if self._db is not None:
+                content = response.content
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        response.url,
+                        response.status_code,
+                        json.dumps(dict(response.headers)),
+                        response.encoding,
+                        content,
+                        len(content),
+                        expires,
+                        now,
+                    ),
+                )
+                self._evict_disk(now)
+                self._db.commit()
+
+    def _remember(self, key: str, expires: float, response):
+        self._memory[key] = (expires, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _evict_disk(self, now: float):
+        self._db.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+        (size,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if size <= self.max_bytes:
+            return
+
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall()
+        for key, entry_size in rows:
+            if size <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            size -= entry_size
+            self.stats.evictions += 1
+
+    @staticmethod
+    def _build_response(row, session) -> HTMLResponse:
+        url, status, headers, encoding, content, _ = row
+        response = HTMLResponse(session=session)
+        response.url = url
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response.encoding = encoding
+        response._content = content
+        return response
+
+    def clear(self):
+        """Drops every cached response."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self):
+        """Closes the disk tier."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
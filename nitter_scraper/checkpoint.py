@@ -0,0 +1,117 @@
+"""Module for saving the position of long crawls so they can resume after a restart"""
+from datetime import datetime
+from pathlib import Path
+import sqlite3
+import threading
+from typing import Optional, Union
+
+from pydantic import BaseModel as Base
+
+
+class Checkpoint(Base):
+    """The position of a crawl after its last finished page.
+
+    Attributes:
+        key: Identifies the crawl.
+        next_url: The url of the next page, None once the crawl is finished.
+        num_yielded: Number of tweets yielded so far.
+        pages: Number of pages finished so far.
+        updated_at: When the checkpoint was saved.
+    """
+
+    key: str
+    next_url: Optional[str]
+    num_yielded: int = 0
+    pages: int = 0
+    updated_at: datetime
+
+    @property
+    def finished(self) -> bool:
+        return self.next_url is None
+
+
+class CheckpointStore:
+    """Saves crawl checkpoints in a SQLite database.
+
+    get_tweets saves a checkpoint after every page, once the tweets of the page have been
+    consumed. A crawl restarted with the same key starts from the saved page, so only the page
+    in progress when the process stopped is fetched again, and its tweets may be yielded twice.
+
+    Args:
+        path: The database file. ":memory:" keeps the checkpoints for the process lifetime.
+
+    Example:
+    ```
+        store = CheckpointStore("backfill.sqlite")
+        for tweet in get_tweets(search="python", pages=500, checkpoint=store):
+            save(tweet)
+    ```
+    """
+
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        if str(path) != ":memory:":
+            path = Path(path).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "key TEXT PRIMARY KEY, next_url TEXT, num_yielded INTEGER, pages INTEGER, "
+            "updated_at TEXT)"
+        )
+        self._db.commit()
+
+    def load(self, key: str) -> Optional[Checkpoint]:
+        """Loads the checkpoint of a crawl.
+
+        Args:
+            key: Identifies the crawl.
+
+        Returns:
+            The checkpoint, or None if the crawl has none.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT key, next_url, num_yielded, pages, updated_at FROM checkpoints "
+                "WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        key, next_url, num_yielded, pages, updated_at = row
+        return Checkpoint(
+            key=key,
+            next_url=next_url,
+            num_yielded=num_yielded,
+            pages=pages,
+            updated_at=datetime.fromisoformat(updated_at),
+        )
+
+    def save(self, key: str, next_url: Optional[str], num_yielded: int, pages: int):
+        """Saves the checkpoint of a crawl, replacing the previous one.
+
+        Args:
+            key: Identifies the crawl.
+            next_url: The url of the next page, None once the crawl is finished.
+            num_yielded: Number of tweets yielded so far.
+            pages: Number of pages finished so far.
+        """
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?)",
+                (key, next_url, num_yielded, pages, datetime.now().isoformat()),
+            )
+            self._db.commit()
+
+    def delete(self, key: str):
+        """Deletes the checkpoint of a crawl, so it starts over the next time."""
+        with self._lock:
+            self._db.execute("DELETE FROM checkpoints WHERE key = ?", (key,))
+            self._db.commit()
+
+    def close(self):
+        """Closes the database."""
+        with self._lock:
+            self._db.close()
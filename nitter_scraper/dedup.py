@@ -0,0 +1,158 @@
+"""Module for dropping tweets that were already seen, in bounded memory.
+
+Nitter returns the same tweet more than once: the pinned tweet on every first page, and
+overlapping items when the timeline shifts during a crawl. A deduplicator passed to get_tweets
+drops those before the Tweet object is built. Sharing one deduplicator between calls, and
+saving it between runs, also drops tweets seen on other accounts or by earlier runs.
+
+* LRUSet remembers the most recent `maxsize` tweet ids exactly.
+* BloomFilter remembers up to `capacity` tweet ids in a fixed size bit array, at the cost of
+  dropping an unseen tweet with probability `error_rate`.
+"""
+from collections import OrderedDict
+import hashlib
+import math
+from pathlib import Path
+import struct
+import threading
+from typing import Iterable, Union
+
+
+class LRUSet:
+    """A set of the most recently seen keys.
+
+    Args:
+        maxsize: Max number of keys kept. The least recently seen keys are dropped first.
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key) -> bool:
+        """Adds a key.
+
+        Args:
+            key: The key to add.
+
+        Returns:
+            True if the key was not seen before.
+        """
+        with self._lock:
+            if key in self._keys:
+                self._keys.move_to_end(key)
+                return False
+            self._keys[key] = None
+            if len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+            return True
+
+    def update(self, keys: Iterable):
+        """Adds many keys."""
+        for key in keys:
+            self.add(key)
+
+    def save(self, path: Union[str, Path]):
+        """Saves the keys to a file, oldest first, one per line."""
+        with self._lock:
+            Path(path).write_text("".join(f"{key}\n" for key in self._keys))
+
+    @classmethod
+    def load(cls, path: Union[str, Path], maxsize: int = 100_000) -> "LRUSet":
+        """Loads integer keys saved with save(). A missing file gives an empty set."""
+        lru = cls(maxsize)
+        path = Path(path)
+        if path.exists():
+            lru.update(int(line) for line in path.read_text().split())
+        return lru
+
+
+class BloomFilter:
+    """A Bloom filter, a fixed size set that may report unseen keys as seen.
+
+    Args:
+        capacity: Number of keys the filter is sized for. Past it, the false positive rate
+            grows.
+        error_rate: Probability of reporting an unseen key as seen, at capacity.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        if not 0 < error_rate < 1:
+            raise ValueError("The error rate must be between 0 and 1")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(str(key).encode(), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, key) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, key) -> bool:
+        """Adds a key.
+
+        Args:
+            key: The key to add.
+
+        Returns:
+            True if the key was not seen before. A false positive returns False.
+        """
+        positions = self._positions(key)
+        with self._lock:
+            bits = self._bits
+            new = False
+            for pos in positions:
+                mask = 1 << (pos & 7)
+                if not bits[pos >> 3] & mask:
+                    bits[pos >> 3] |= mask
+                    new = True
+            if new:
+                self.count += 1
+            return new
+
+    def update(self, keys: Iterable):
+        """Adds many keys."""
+        for key in keys:
+            self.add(key)
+
+    def save(self, path: Union[str, Path]):
+        """Saves the filter to a file."""
+        with self._lock:
+            header = struct.pack("<QdQ", self.capacity, self.error_rate, self.count)
+            Path(path).write_bytes(header + bytes(self._bits))
+
+    @classmethod
+    def load(
+        cls, path: Union[str, Path], capacity: int = 1_000_000, error_rate: float = 0.001
+    ) -> "BloomFilter":
+        """Loads a filter saved with save(). A missing file gives an empty filter."""
+        path = Path(path)
+        if not path.exists():
+            return cls(capacity, error_rate)
+
+        data = path.read_bytes()
+        header = struct.calcsize("<QdQ")
+        capacity, error_rate, count = struct.unpack("<QdQ", data[:header])
+        bloom = cls(capacity, error_rate)
+        bloom.count = count
+        bloom._bits[:] = data[header:]
+        return bloom
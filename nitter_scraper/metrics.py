@@ -0,0 +1,220 @@
+"""Module for instrumenting requests, retries and parsing.
+
+A session created with `metrics=` calls its hooks at every step of a crawl:
+
+* `on_request(url)` before every network request, retries included.
+* `on_response(url, response, seconds, cached)` after every response, with the time it took.
+  Responses answered by the session's ResponseCache have `cached=True`.
+* `on_retry(url, attempt, delay, reason)` before waiting to retry a request.
+* `on_page_parsed(page, tweets, seconds)` once the tweets of a timeline page are parsed and
+  filtered, with the number of tweets kept and the time it took.
+* `on_tweet(tweet_data, outcome)` for every tweet parsed, with one of TWEET_OUTCOMES.
+
+Without metrics, each step only costs a `None` check. Metrics implements the hooks with counters
+and latency histograms, and exports them in the Prometheus text format.
+
+Example:
+```
+    metrics = Metrics()
+    with NitterSession(metrics=metrics) as session:
+        tweets = list(get_tweets("dgnsrekt", pages=10, session=session))
+    print(metrics.to_prometheus())
+```
+"""
+from bisect import bisect_left
+import threading
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import urlparse
+
+TWEET_OUTCOMES = ["yielded", "duplicate", "too_new", "too_old", "seen", "break"]
+"""* What happened to a parsed tweet: yielded, dropped as a duplicate, dropped for being
+newer than until_time, older than since_time, at or below since_tweet_id, or matching
+break_on_tweet_id."""
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""* Upper bounds in seconds of the latency histogram buckets."""
+
+
+class Hooks:
+    """Base class of the instrumentation hooks, every hook does nothing.
+
+    Subclass it and override the hooks of interest. Hooks are called from the threads making
+    the requests, so they must be thread safe, and should be quick.
+    """
+
+    def on_request(self, url: str):
+        """Called before a network request is sent."""
+
+    def on_response(self, url: str, response, seconds: float, cached: bool = False):
+        """Called with a response and the seconds it took, or the cache lookup took."""
+
+    def on_retry(self, url: str, attempt: int, delay: float, reason: str):
+        """Called before waiting `delay` seconds to retry a request.
+
+        The reason is the status code, "invalid" for a 200 rejected by the validator, or the
+        name of the connection error.
+        """
+
+    def on_page_parsed(self, page: int, tweets: int, seconds: float):
+        """Called once the tweets of a timeline page, counting from 1, are parsed and filtered."""
+
+    def on_tweet(self, tweet_data: Dict, outcome: str):
+        """Called for every tweet parsed, with one of TWEET_OUTCOMES."""
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """A thread safe counter with labels.
+
+    Args:
+        name: The metric name.
+        description: The metric description.
+    """
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        """The value of a label set, 0 if it was never incremented."""
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+    def total(self) -> float:
+        """The sum over every label set."""
+        return sum(self.values.values())
+
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in self.values.items()]
+
+
+class Histogram:
+    """A thread safe histogram of durations, without labels.
+
+    Args:
+        name: The metric name.
+        description: The metric description.
+        buckets: Upper bounds of the buckets, in increasing order.
+    """
+
+    def __init__(self, name: str, description: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        with self._lock:
+            counts, count, total = list(self.counts), self.count, self.sum
+
+        samples, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + [float("inf")], counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            samples.append((f"{self.name}_bucket", (("le", le),), cumulative))
+        samples.append((f"{self.name}_sum", (), total))
+        samples.append((f"{self.name}_count", (), count))
+        return samples
+
+
+def format_sample(name: str, labels: Labels, value: float) -> str:
+    if labels:
+        escaped = (
+            (key, str(val).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for key, val in labels
+        )
+        name += "{" + ",".join(f'{key}="{val}"' for key, val in escaped) + "}"
+    if isinstance(value, float) and not value.is_integer():
+        return f"{name} {value!r}"
+    return f"{name} {int(value)}"
+
+
+class Metrics(Hooks):
+    """Hooks counting requests, retries, pages and tweets, and timing fetches and parsing.
+
+    Args:
+        buckets: Upper bounds in seconds of the latency histogram buckets.
+
+    Attributes:
+        requests: Network requests sent, by host.
+        responses: Responses received, by status code. Cached responses have status "cached".
+        retries: Retries made, by reason.
+        pages: Timeline pages parsed.
+        tweets: Tweets parsed, by outcome, see TWEET_OUTCOMES.
+        fetch_seconds: Histogram of the network request latencies.
+        parse_seconds: Histogram of the time spent parsing and filtering a page.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.requests = Counter("nitter_requests_total", "Network requests sent.")
+        self.responses = Counter("nitter_responses_total", "Responses received.")
+        self.retries = Counter("nitter_retries_total", "Retries made.")
+        self.pages = Counter("nitter_pages_parsed_total", "Timeline pages parsed.")
+        self.tweets = Counter("nitter_tweets_total", "Tweets parsed.")
+        self.fetch_seconds = Histogram(
+            "nitter_fetch_seconds", "Latency of the network requests.", buckets
+        )
+        self.parse_seconds = Histogram(
+            "nitter_parse_seconds", "Time spent parsing and filtering a page.", buckets
+        )
+
+    @property
+    def metrics(self) -> List:
+        return [
+            self.requests,
+            self.responses,
+            self.retries,
+            self.pages,
+            self.tweets,
+            self.fetch_seconds,
+            self.parse_seconds,
+        ]
+
+    def on_request(self, url: str):
+        self.requests.inc(host=urlparse(url).netloc)
+
+    def on_response(self, url: str, response, seconds: float, cached: bool = False):
+        if cached:
+            self.responses.inc(status="cached")
+            return
+        self.responses.inc(status=str(response.status_code))
+        self.fetch_seconds.observe(seconds)
+
+    def on_retry(self, url: str, attempt: int, delay: float, reason: str):
+        self.retries.inc(reason=reason)
+
+    def on_page_parsed(self, page: int, tweets: int, seconds: float):
+        self.pages.inc()
+        self.parse_seconds.observe(seconds)
+
+    def on_tweet(self, tweet_data: Dict, outcome: str):
+        self.tweets.inc(outcome=outcome)
+
+    def to_prometheus(self) -> str:
+        """Exports every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            kind = "histogram" if isinstance(metric, Histogram) else "counter"
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {kind}")
+            lines.extend(format_sample(*sample) for sample in metric.samples())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,265 @@
+"""Module for a local stand-in of a nitter instance, for load and fault injection testing.
+
+MockNitter serves recorded nitter pages over http on localhost, so get_tweets, get_profile and
+the rest of the package can be pointed at it through `address=` on a machine without network:
+
+* `/<username>` serves the recorded timeline page, which also holds the profile card.
+* `/search?f=tweets&q=...` serves the recorded search page.
+* Both follow a chain of `pages` pages: every page links the next one through its "Load more"
+  `?cursor=` link, and the last page has no link.
+* `/` answers 200, like the nitter home page, for health checks.
+* Anything else, and usernames missing from `usernames` when it is set, answer 404.
+
+Timeline, search and profile requests can be delayed and made to fail, either at random with
+the given rates or in the order given by `faults`. The random faults draw from a generator
+seeded with `seed`, so runs are repeatable.
+
+Example:
+```
+    with MockNitter(latency=0.05, rate_limit_rate=0.1, seed=1) as nitter:
+        tweets = list(get_tweets("dgnsrekt", pages=5, address=nitter.address))
+        print(nitter.stats)
+```
+"""
+from collections import Counter
+import html
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import random
+import re
+import threading
+import time
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from nitter_scraper.paths import DATA_DIRECTORY  # noqa: I100, I202
+
+FAULTS = ["ok", "error", "rate_limit", "timeline_none"]
+"""* The outcomes a request to a timeline, search or profile page can be given."""
+
+SHOW_MORE = re.compile(rb'<div class="show-more"><a href="[^"]*">Load more</a></div>')
+
+TIMELINE_NONE_PAGE = (
+    b'<!DOCTYPE html><html><head><title>nitter</title></head><body><div class="timeline">'
+    b'<div class="timeline-item timeline-none">No items found</div></div></body></html>'
+)
+
+ERROR_PAGE = b"<!DOCTYPE html><html><head><title>Error | nitter</title></head></html>"
+
+HOME_PAGE = b"<!DOCTYPE html><html><head><title>nitter</title></head></html>"
+
+
+def recorded_page() -> bytes:
+    """The bundled test page, a recorded nitter timeline page of dgnsrekt."""
+    return (DATA_DIRECTORY / "testpage.html").read_bytes()
+
+
+class MockNitter:
+    """Serves recorded nitter pages on localhost, with configurable latency and faults.
+
+    Args:
+        host: The interface to listen on.
+        port: The port to listen on. 0 picks a free port, see the address attribute.
+        page: The recorded timeline page. Defaults to the bundled test page.
+        search_page: The recorded search page. Defaults to the timeline page.
+        pages: Number of pages in every timeline and search pagination chain.
+        usernames: If set, other usernames answer 404, like missing accounts.
+        latency: Seconds every request waits before it is answered.
+        jitter: Max random seconds added to the latency.
+        error_rate: Fraction of page requests answered with a status of error_statuses.
+        rate_limit_rate: Fraction of page requests answered with a 429.
+        timeline_none_rate: Fraction of page requests answered with an empty `.timeline-none`
+            timeline, like nitter does when it failed to load a timeline.
+        error_statuses: The statuses error responses are drawn from.
+        retry_after: Retry-After header of the 429 responses, in seconds. None leaves it out.
+        faults: Outcomes given to the first page requests, in order, before the rates apply.
+            Each is one of "ok", "error", "rate_limit" or "timeline_none".
+        seed: Seeds the random latency and faults.
+
+    Attributes:
+        requests: The path of every request received.
+        connections: The client address of every connection made, to check connection reuse.
+        stats: Number of responses per outcome: "ok", "error", "rate_limit", "timeline_none",
+            "not_found" and "home".
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        page: bytes = None,
+        search_page: bytes = None,
+        pages: int = 5,
+        usernames: Iterable[str] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        timeline_none_rate: float = 0.0,
+        error_statuses: Sequence[int] = (500, 502, 503),
+        retry_after: Optional[int] = 0,
+        faults: Iterable[str] = (),
+        seed: int = None,
+    ):
+        faults = list(faults)
+        unknown = set(faults) - set(FAULTS)
+        if unknown:
+            raise ValueError(f"Unknown faults {sorted(unknown)}, choose from {FAULTS}")
+        if error_rate + rate_limit_rate + timeline_none_rate > 1:
+            raise ValueError("The error, rate limit and timeline none rates add up to over 1")
+
+        self.host = host
+        self.port = port
+        self.page = page if page is not None else recorded_page()
+        self.search_page = search_page if search_page is not None else self.page
+        self.pages = pages
+        self.usernames = {name.lower() for name in usernames} if usernames is not None else None
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.timeline_none_rate = timeline_none_rate
+        self.error_statuses = list(error_statuses)
+        self.retry_after = retry_after
+        self.faults = faults
+
+        self.requests: List[str] = []
+        self.connections: Set[Tuple[str, int]] = set()
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def address(self) -> str:
+        """The address to pass to get_tweets and get_profile, once the server is started."""
+        return f"http://{self.host}:{self.port}"
+
+    def _outcome(self) -> str:
+        with self._lock:
+            if self.faults:
+                return self.faults.pop(0)
+            draw = self._random.random()
+        for outcome, rate in [
+            ("error", self.error_rate),
+            ("rate_limit", self.rate_limit_rate),
+            ("timeline_none", self.timeline_none_rate),
+        ]:
+            if draw < rate:
+                return outcome
+            draw -= rate
+        return "ok"
+
+    def _delay(self) -> float:
+        with self._lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def render_page(self, page: bytes, index: int, query: dict) -> bytes:
+        """Rewrites the "Load more" link of a recorded page to point at the next page.
+
+        Args:
+            page: The recorded page.
+            index: Position of the page in the chain, starting at 0.
+            query: The query string of the request, kept in the link of search pages.
+
+        Returns:
+            The page, without a "Load more" link if it is the last page of the chain.
+        """
+        if index + 1 >= self.pages:
+            return SHOW_MORE.sub(b"", page)
+
+        query = {key: values[0] for key, values in query.items() if key != "cursor"}
+        link = "?" + urlencode({**query, "cursor": f"page-{index + 1}"})
+        show_more = f'<div class="show-more"><a href="{html.escape(link)}">Load more</a></div>'
+        return SHOW_MORE.sub(lambda match: show_more.encode(), page)
+
+    def respond(self, path: str):
+        """Builds the response to a request.
+
+        Args:
+            path: The path and query string of the request.
+
+        Returns:
+            The status, the headers and the body.
+        """
+        with self._lock:
+            self.requests.append(path)
+
+        url = urlsplit(path)
+        query = parse_qs(url.query)
+        parts = [part for part in url.path.split("/") if part]
+
+        if not parts:
+            return self._count("home", 200, {}, HOME_PAGE)
+
+        if parts == ["search"]:
+            page = self.search_page
+        elif len(parts) == 1 and (self.usernames is None or parts[0].lower() in self.usernames):
+            page = self.page
+        else:
+            return self._count("not_found", 404, {}, ERROR_PAGE)
+
+        time.sleep(self._delay())
+
+        outcome = self._outcome()
+        if outcome == "error":
+            with self._lock:
+                status = self._random.choice(self.error_statuses)
+            return self._count(outcome, status, {}, ERROR_PAGE)
+        if outcome == "rate_limit":
+            headers = {} if self.retry_after is None else {"Retry-After": str(self.retry_after)}
+            return self._count(outcome, 429, headers, ERROR_PAGE)
+        if outcome == "timeline_none":
+            return self._count(outcome, 200, {}, TIMELINE_NONE_PAGE)
+
+        cursor = query.get("cursor", [""])[0]
+        index = int(cursor[5:]) if re.fullmatch(r"page-\d+", cursor) else 0
+        return self._count(outcome, 200, {}, self.render_page(page, index, query))
+
+    def _count(self, outcome: str, status: int, headers: dict, body: bytes):
+        with self._lock:
+            self.stats[outcome] += 1
+        return status, headers, body
+
+    def start(self):
+        """Starts serving on a background thread."""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):  # noqa: N802
+                with mock._lock:
+                    mock.connections.add(self.client_address)
+                status, headers, body = mock.respond(self.path)
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_port
+        thread = threading.Thread(
+            target=self._server.serve_forever, name="nitter-mock", daemon=True
+        )
+        thread.start()
+
+    def stop(self):
+        """Stops serving."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "MockNitter":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
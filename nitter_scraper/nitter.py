@@ -1,9 +1,11 @@
 from contextlib import contextmanager
+import hashlib
 from ipaddress import IPv4Address
-from tempfile import _TemporaryFileWrapper as TemporaryFile
-from tempfile import NamedTemporaryFile
+import itertools
+from pathlib import Path
+import threading
 import time
-from typing import ClassVar, Optional
+from typing import ClassVar, Dict, Iterable, List, Optional
 
 import docker
 from docker.client import DockerClient
@@ -11,11 +13,19 @@ from docker.models.containers import Container
 from jinja2 import Environment, FileSystemLoader
 from loguru import logger
 from pydantic import BaseModel as Base
+import requests
 
-from nitter_scraper.paths import PROJECT_ROOT, TEMPLATES_DIRECTORY  # noqa: I202, I100
-from nitter_scraper.profile import get_profile  # noqa: I202, I100
+from nitter_scraper.paths import CONFIG_DIRECTORY, TEMPLATES_DIRECTORY  # noqa: I202, I100
+from nitter_scraper.profile import get_profile, profile_exists, ProfileCache  # noqa: I202, I100
+from nitter_scraper.session import NitterSession  # noqa: I202, I100
 from nitter_scraper.tweets import get_tweets  # noqa: I202, I100
 
+NITTER_IMAGE = "zedeus/nitter:20b5cce5dc6437ffc06ea53e9efd884f2fc66abe-arm64"
+"""* The nitter docker image."""
+
+CONFIG_LABEL = "nitter_scraper.config"
+"""* Docker label holding the config key of a container started by nitter_scraper."""
+
 
 class DockerBase(Base):
     """Provides helper methods for connecting to the docker client."""
@@ -39,15 +49,36 @@ class Nitter(DockerBase):
     Args:
         host (IPv4Address): The host address the docker container will bind too.
         port (int): The port the docker container will listen to.
+        session (NitterSession): An optional session shared by every scrape made through
+            this container.
+        profile_cache (ProfileCache): An optional cache of the profiles and existence checks
+            made through this container. One cache can be shared by the instances of a pool.
+        network (str): An optional docker network the container joins, used to reach a redis
+            container by name.
+        redis_host (str): Host name of the redis server nitter caches to. If None, nitter
+            runs without a working cache.
+        redis_port (int): Port of the redis server.
+        redis_connections (int): Redis connection pool size.
+        redis_max_connections (int): Max number of redis connections.
+        list_minutes (int): How long nitter caches list info.
+        rss_minutes (int): How long nitter caches rss queries.
+        reuse (bool): If True, start() attaches to a running container started with the same
+            config, image and port instead of starting a new one, and stop() leaves the
+            container running for the next job.
+        startup_timeout (float): Seconds start() waits for the container to answer http
+            requests.
 
     Attributes:
-        tempfile (TemporaryFile): A TemporaryFile file generated from a template.
+        config_path (Path): The config file rendered from the template, named after its
+            config key.
         container (Container): Local representation of a container object.
             Holds the started instance of a docker container.
+        started (bool): True if start() ran the container, False if it attached to a running
+            one.
         address (str): The full address of the docker container.
         ports (dict[int, int]): Binds the listening port to the nitter docker container's
             internal port 8080.
-        config_filepath (str): Path name to the generated tempfile.
+        config_filepath (str): Path name to the generated config file.
         volumes (dict[str, dict[str, str]]): used to configure a bind volume.
 
 
@@ -56,8 +87,21 @@ class Nitter(DockerBase):
     host: IPv4Address
     port: int
 
-    tempfile: TemporaryFile = None
+    config_path: Optional[Path] = None
     container: Optional[Container]
+    started: bool = False
+    session: Optional[NitterSession] = None
+    profile_cache: Optional[ProfileCache] = None
+    reuse: bool = False
+    startup_timeout: float = 30.0
+
+    network: Optional[str] = None
+    redis_host: Optional[str] = None
+    redis_port: int = 6379
+    redis_connections: int = 20
+    redis_max_connections: int = 30
+    list_minutes: int = 240
+    rss_minutes: int = 10
 
     class Config:
         arbitrary_types_allowed = True
@@ -68,8 +112,8 @@ class Nitter(DockerBase):
 
     @property
     def config_filepath(self):
-        if self.tempfile:
-            return self.tempfile.name
+        if self.config_path:
+            return str(self.config_path)
 
     @property
     def ports(self):
@@ -83,13 +127,35 @@ class Nitter(DockerBase):
     def _render_config(self):
         env = Environment(loader=FileSystemLoader(TEMPLATES_DIRECTORY))
         template = env.get_template("nitter.conf")
-        return template.render(self.dict())
+        exclude = {"session", "profile_cache", "container", "started"}
+        return template.render(self.dict(exclude=exclude))
+
+    def config_key(self, config: str = None) -> str:
+        """Hashes everything a running container must match to be reused.
+
+        Args:
+            config: The rendered config. Rendered from the template if None.
 
-    def _create_configfile(self):
+        Returns:
+            A hex digest of the config, image, host and port.
+        """
+        config = config if config is not None else self._render_config()
+        key = "\n".join([NITTER_IMAGE, str(self.host), str(self.port), self.network or "", config])
+        return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+    def _create_configfile(self) -> str:
         config = self._render_config()
-        self.tempfile = NamedTemporaryFile(dir=PROJECT_ROOT)
-        self.tempfile.write(config.encode())
-        self.tempfile.seek(0)
+        key = self.config_key(config)
+
+        CONFIG_DIRECTORY.mkdir(parents=True, exist_ok=True)
+        self.config_path = CONFIG_DIRECTORY / f"nitter-{key}.conf"
+        if not self.config_path.exists():
+            self.config_path.write_text(config)
+        return key
+
+    def _find_running(self, client: DockerClient, key: str) -> Optional[Container]:
+        running = client.containers.list(filters={"label": f"{CONFIG_LABEL}={key}"})
+        return running[0] if running else None
 
     def get_profile(self, username: str, not_found_ok: bool = False):
         """Scrapes nitter for the target users profile information.
@@ -111,9 +177,24 @@ class Nitter(DockerBase):
             ValueError: If the target profile does not exist and the not_found_ok argument is
                 false.
         """
-        return get_profile(username=username, not_found_ok=not_found_ok, address=self.address)
+        if self.profile_cache is not None:
+            return self.profile_cache.get(
+                username, not_found_ok=not_found_ok, address=self.address, session=self.session
+            )
+        return get_profile(
+            username=username,
+            not_found_ok=not_found_ok,
+            address=self.address,
+            session=self.session,
+        )
 
-    def get_tweets(self, username: str, pages: int = 25, break_on_tweet_id: Optional[int] = None):
+    def get_tweets(
+        self,
+        username: str,
+        pages: int = 25,
+        break_on_tweet_id: Optional[int] = None,
+        **kwargs,
+    ):
         """Gets the target users tweets
 
         This is a modified version of nitter_scraper.tweets.get_tweets().
@@ -124,8 +205,8 @@ class Nitter(DockerBase):
             username: Targeted users username.
             pages: Max number of pages to lookback starting from the latest tweet.
             break_on_tweet_id: Gives the ability to break out of a loop if a tweets id is found.
-            address: The address to scrape from. The default is https://nitter.net which should
-                be used as a fallback address.
+            **kwargs: Any other nitter_scraper.tweets.get_tweets() argument, like limit or
+                since_time.
 
         Yields:
             Tweet Objects
@@ -137,44 +218,247 @@ class Nitter(DockerBase):
             pages=pages,
             break_on_tweet_id=break_on_tweet_id,
             address=self.address,
+            session=self.session,
+            **kwargs,
         )
 
     def profile_exists(self, username: str) -> bool:
         """Checks if a user exists on nitter
 
+        Only the status and title of the profile page are inspected, or the profile cache
+        answers.
+
         Args:
             username: The target profiles username.
 
         Returns:
             True if the profile exists, otherwise False.
         """
-        return self.get_profile(username=username, not_found_ok=True) is not None
+        if self.profile_cache is not None:
+            return self.profile_cache.exists(username, address=self.address, session=self.session)
+        return profile_exists(username, address=self.address, session=self.session)
+
+    def is_healthy(self, timeout: float = 2.0) -> bool:
+        """Checks if the nitter instance answers http requests.
+
+        Args:
+            timeout: Seconds to wait for an answer.
+
+        Returns:
+            True if the instance answered without a server error, otherwise False.
+        """
+        try:
+            response = (self.session or requests).get(self.address, timeout=timeout)
+        except requests.RequestException:
+            return False
+        return response.status_code < 500
+
+    def wait_until_ready(self, timeout: float = 30.0, interval: float = 0.1):
+        """Polls the container until it answers http requests.
+
+        Args:
+            timeout: Max number of seconds to wait.
+            interval: Seconds between two probes.
+
+        Raises:
+            TimeoutError: If the container isn't ready after timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while not self.is_healthy(timeout=max(interval, 1.0)):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Nitter at {self.address} not ready after {timeout}s.")
+            time.sleep(interval)
+
+    def start(self, wait: bool = True):
+        """Starts the docker the container
+
+        Args:
+            wait: If True, waits until the container answers http requests.
+
+        Raises:
+            TimeoutError: If the container isn't ready after startup_timeout seconds. A
+                container started by this call is stopped first.
+        """
+        key = self._create_configfile()
+        client = self._get_client()
+
+        if self.reuse:
+            self.container = self._find_running(client, key)
+            if self.container:
+                logger.info(f"Reusing container {self.container.name} {self.container.short_id}.")
+
+        if not self.container:
+            self.container = client.containers.run(
+                image=NITTER_IMAGE,
+                auto_remove=True,
+                ports=self.ports,
+                detach=True,
+                volumes=self.volumes,
+                network=self.network,
+                labels={CONFIG_LABEL: key},
+            )
+            self.started = True
+            logger.info(f"Running container {self.container.name} {self.container.short_id}.")
+
+        if wait:
+            try:
+                self.wait_until_ready(timeout=self.startup_timeout)
+            except Exception:
+                self._abort_start()
+                raise
+
+    def _abort_start(self):
+        # Stops the container if start() ran it, it never became usable.
+        if self.started:
+            self.stop(force=True)
+        self.container = None
+        self.started = False
+
+    def stop(self, force: bool = False):
+        """Stops the docker the container
+
+        Args:
+            force: Stops the container even in reuse mode.
+        """
+        if not self.container:
+            return
+
+        if self.reuse and not force:
+            logger.info(f"Leaving container {self.container.name} running for reuse.")
+            return
+
+        logger.info(f"Stopping container {self.container.name} {self.container.short_id}.")
+        self.container.stop(timeout=5)
+        logger.info(f"Container {self.container.name} {self.container.short_id} Destroyed.")
+
+
+class Redis(DockerBase):
+    """Redis Docker container object, used as the cache of nitter containers.
+
+    The container joins a docker network so nitter containers on the same network reach it
+    by its name.
+
+    Args:
+        name (str): The container name, used by nitter as the redis host name.
+        network (str): The docker network to join. It is created if it doesn't exist.
+        port (int): The port redis listens to inside the network.
+        reuse (bool): If True, start() attaches to a running container with the same name,
+            and stop() leaves the container running for the next job.
+
+    Attributes:
+        container (Container): Local representation of a container object.
+            Holds the started instance of a docker container.
+        started (bool): True if start() ran the container, False if it attached to a running
+            one. Only containers this object started are ever stopped.
+    """
+
+    name: str = "nitter_redis"
+    network: str = "nitter_scraper"
+    port: int = 6379
+    reuse: bool = False
+
+    container: Optional[Container]
+    started: bool = False
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_network(self, client: DockerClient):
+        networks = client.networks.list(names=[self.network])
+        if networks:
+            return networks[0]
+        logger.info(f"Creating docker network {self.network}.")
+        return client.networks.create(self.network, driver="bridge")
 
     def start(self):
-        """Starts the docker the container"""
-        self._create_configfile()
+        """Starts the docker the container, or attaches to a running one in reuse mode."""
         client = self._get_client()
+        self._get_network(client)
+
+        if self.reuse:
+            running = client.containers.list(filters={"name": f"^{self.name}$"})
+            if running:
+                self.container = running[0]
+                logger.info(f"Reusing container {self.container.name} {self.container.short_id}.")
+                return
 
         self.container = client.containers.run(
-            image="zedeus/nitter:20b5cce5dc6437ffc06ea53e9efd884f2fc66abe-arm64",
+            image="redis:6-alpine",
+            name=self.name,
+            command=["redis-server", "--port", str(self.port), "--save", ""],
             auto_remove=True,
-            ports=self.ports,
             detach=True,
-            volumes=self.volumes,
+            network=self.network,
         )
-        time.sleep(1)
+        self.started = True
         logger.info(f"Running container {self.container.name} {self.container.short_id}.")
 
-    def stop(self):
-        """Stops the docker the container"""
-        logger.info(f"Stopping container {self.container.name} {self.container.short_id}.")
-        if self.container:
+    def stop(self, force: bool = False):
+        """Stops the docker the container, if this object started it.
+
+        Args:
+            force: Stops the container even in reuse mode.
+        """
+        if self.container and not self.started:
+            logger.info(f"Leaving container {self.container.name} running, it wasn't ours.")
+        elif self.container and self.reuse and not force:
+            logger.info(f"Leaving container {self.container.name} running for reuse.")
+        elif self.container:
+            logger.info(f"Stopping container {self.container.name} {self.container.short_id}.")
             self.container.stop(timeout=5)
             logger.info(f"Container {self.container.name} {self.container.short_id} Destroyed.")
 
 
 @contextmanager
-def NitterScraper(host: str = "0.0.0.0", port: int = 8080):
+def redis_cache(
+    redis: bool = False,
+    redis_host: str = None,
+    redis_port: int = 6379,
+    network: str = None,
+    reuse: bool = False,
+):
+    """Provides the redis settings of nitter containers, starting a redis container if asked.
+
+    Args:
+        redis: If True and no redis_host is given, a redis container is started for the
+            lifetime of the context manager.
+        redis_host: Host name of an existing redis server.
+        redis_port: Port of the redis server.
+        network: The docker network shared by nitter and redis.
+        reuse: If True, the redis container is left running on exit for the next job.
+
+    Yields:
+        dict: Redis fields to pass on to Nitter. Empty when no cache is used.
+    """
+    if redis_host:
+        yield {"redis_host": redis_host, "redis_port": redis_port, "network": network}
+        return
+
+    if not redis:
+        yield {}
+        return
+
+    sidecar = Redis(port=redis_port, reuse=reuse, **({"network": network} if network else {}))
+    sidecar.start()
+
+    try:
+        yield {"redis_host": sidecar.name, "redis_port": sidecar.port, "network": sidecar.network}
+
+    finally:
+        sidecar.stop()
+
+
+@contextmanager
+def NitterScraper(
+    host: str = "0.0.0.0",
+    port: int = 8080,
+    session: NitterSession = None,
+    redis: bool = False,
+    redis_host: str = None,
+    redis_port: int = 6379,
+    network: str = None,
+    reuse: bool = False,
+):
     """The NitterScraper context manager.
 
     Takes care of configuring, starting, and stopping a docker instance of nitter.
@@ -182,15 +466,277 @@ def NitterScraper(host: str = "0.0.0.0", port: int = 8080):
     Args:
         host: The host address the docker container will bind too.
         port: The port the docker container will listen to.
+        session: A session to share with other scrapers. If None, a session is created for the
+            lifetime of the context manager.
+        redis: If True, a redis container is started next to nitter so repeated timeline and
+            profile requests are served from nitter's cache.
+        redis_host: Host name of an existing redis server to use instead of starting one.
+        redis_port: Port of the redis server.
+        network: The docker network shared by nitter and redis.
+        reuse: If True, a running container started with the same settings is reused, and
+            the container is left running on exit for the next job.
 
     Yields:
         Nitter: An object representing a started nitter docker container.
     """
-    nitter = Nitter(host=host, port=port)
-    nitter.start()
+    owns_session = session is None
+    if owns_session:
+        session = NitterSession()
 
-    try:
-        yield nitter
+    with redis_cache(redis, redis_host, redis_port, network, reuse) as cache:
+        nitter = Nitter(host=host, port=port, session=session, reuse=reuse, **cache)
 
-    finally:
-        nitter.stop()
+        try:
+            nitter.start()
+            yield nitter
+
+        finally:
+            nitter.stop()
+            if owns_session:
+                session.close()
+
+
+class NitterPool:
+    """A pool of nitter docker containers sharing the scraping load.
+
+    Every get_tweets / get_profile call is routed to one healthy instance, either in turn
+    (round_robin) or to the instance with the fewest scrapes in progress (least_loaded).
+    Instances failing a health check, or raising a connection error while scraping, are taken
+    out of rotation until a later health check passes.
+
+    Args:
+        instances: The nitter instances of the pool.
+        strategy: "round_robin" or "least_loaded".
+        health_check_interval: Seconds between background health checks of every instance.
+            None disables the background checks.
+
+    Attributes:
+        healthy (dict[int, bool]): Health of each instance, keyed by port.
+        load (dict[int, int]): Number of scrapes in progress on each instance, keyed by port.
+    """
+
+    def __init__(
+        self,
+        instances: List[Nitter],
+        strategy: str = "round_robin",
+        health_check_interval: Optional[float] = 30.0,
+    ):
+        if strategy not in ("round_robin", "least_loaded"):
+            raise ValueError(f"Unknown strategy {strategy!r}")
+
+        self.instances = instances
+        self.strategy = strategy
+        self.health_check_interval = health_check_interval
+        self.healthy = {instance.port: True for instance in instances}
+        self.load = {instance.port: 0 for instance in instances}
+
+        self._lock = threading.Lock()
+        self._rotation = itertools.cycle(instances)
+        self._stopped = threading.Event()
+
+    @classmethod
+    def from_ports(
+        cls,
+        host: str = "0.0.0.0",
+        ports: Iterable[int] = range(8080, 8084),
+        session: NitterSession = None,
+        nitter_options: Dict = None,
+        **kwargs,
+    ) -> "NitterPool":
+        """Creates a pool with one nitter instance per port.
+
+        Args:
+            host: The host address the docker containers will bind too.
+            ports: The ports the docker containers will listen to.
+            session: A session shared by every instance.
+            nitter_options: Other Nitter fields shared by every instance, like redis_host.
+            **kwargs: Passed on to NitterPool.
+
+        Returns:
+            NitterPool
+        """
+        options = nitter_options or {}
+        instances = [Nitter(host=host, port=port, session=session, **options) for port in ports]
+        return cls(instances=instances, **kwargs)
+
+    def check_health(self, timeout: float = 2.0) -> Dict[int, bool]:
+        """Checks every instance and updates the rotation.
+
+        Args:
+            timeout: Seconds to wait for each instance to answer.
+
+        Returns:
+            Health of each instance, keyed by port.
+        """
+        for instance in self.instances:
+            healthy = instance.is_healthy(timeout=timeout)
+            if healthy != self.healthy[instance.port]:
+                state = "back in rotation" if healthy else "out of rotation"
+                logger.warning(f"Nitter instance {instance.address} is {state}.")
+            self.healthy[instance.port] = healthy
+        return dict(self.healthy)
+
+    def mark_unhealthy(self, instance: Nitter):
+        """Takes an instance out of rotation until the next passing health check."""
+        logger.warning(f"Nitter instance {instance.address} is out of rotation.")
+        self.healthy[instance.port] = False
+
+    def choose(self) -> Nitter:
+        """Picks the instance for the next scrape.
+
+        Returns:
+            A healthy nitter instance.
+
+        Raises:
+            RuntimeError: If no instance is healthy.
+        """
+        with self._lock:
+            candidates = [i for i in self.instances if self.healthy[i.port]]
+            if not candidates:
+                raise RuntimeError("No healthy nitter instance in the pool.")
+
+            if self.strategy == "least_loaded":
+                return min(candidates, key=lambda instance: self.load[instance.port])
+
+            for instance in self._rotation:
+                if self.healthy[instance.port]:
+                    return instance
+
+    @contextmanager
+    def _track(self, instance: Nitter):
+        with self._lock:
+            self.load[instance.port] += 1
+        try:
+            yield
+        except requests.ConnectionError:
+            self.mark_unhealthy(instance)
+            raise
+        finally:
+            with self._lock:
+                self.load[instance.port] -= 1
+
+    def get_profile(self, username: str, not_found_ok: bool = False):
+        """Scrapes the target users profile information on one of the pool's instances.
+
+        See Nitter.get_profile().
+        """
+        instance = self.choose()
+        with self._track(instance):
+            return instance.get_profile(username=username, not_found_ok=not_found_ok)
+
+    def get_tweets(self, username: str, **kwargs):
+        """Gets the target users tweets from one of the pool's instances.
+
+        See Nitter.get_tweets(). The instance counts as loaded until the generator is
+        exhausted or closed.
+
+        Yields:
+            Tweet Objects
+        """
+        instance = self.choose()
+        with self._track(instance):
+            yield from instance.get_tweets(username, **kwargs)
+
+    def profile_exists(self, username: str) -> bool:
+        """Checks if a user exists on nitter, see Nitter.profile_exists()."""
+        instance = self.choose()
+        with self._track(instance):
+            return instance.profile_exists(username)
+
+    def _health_loop(self):
+        while not self._stopped.wait(self.health_check_interval):
+            self.check_health()
+
+    def start(self):
+        """Starts every docker container and the background health checks.
+
+        Raises:
+            TimeoutError: If a container isn't ready after its startup_timeout. The containers
+                started by this call are stopped first.
+        """
+        try:
+            for instance in self.instances:
+                instance.start(wait=False)
+
+            for instance in self.instances:
+                instance.wait_until_ready(timeout=instance.startup_timeout)
+        except Exception:
+            for instance in self.instances:
+                instance._abort_start()
+            raise
+
+        self.check_health()
+
+        if self.health_check_interval:
+            self._stopped.clear()
+            thread = threading.Thread(target=self._health_loop, name="nitter-health", daemon=True)
+            thread.start()
+
+    def stop(self):
+        """Stops the background health checks and every docker container."""
+        self._stopped.set()
+        for instance in self.instances:
+            instance.stop()
+
+
+@contextmanager
+def NitterPoolScraper(
+    host: str = "0.0.0.0",
+    ports: Iterable[int] = range(8080, 8084),
+    strategy: str = "round_robin",
+    health_check_interval: Optional[float] = 30.0,
+    session: NitterSession = None,
+    redis: bool = False,
+    redis_host: str = None,
+    redis_port: int = 6379,
+    network: str = None,
+    reuse: bool = False,
+):
+    """The NitterPoolScraper context manager.
+
+    Takes care of configuring, starting, and stopping a pool of docker instances of nitter,
+    one per port.
+
+    Args:
+        host: The host address the docker containers will bind too.
+        ports: The ports the docker containers will listen to.
+        strategy: "round_robin" or "least_loaded".
+        health_check_interval: Seconds between background health checks. None disables them.
+        session: A session to share with other scrapers. If None, a session is created for the
+            lifetime of the context manager.
+        redis: If True, one redis container is started and shared as the cache of every
+            nitter container.
+        redis_host: Host name of an existing redis server to use instead of starting one.
+        redis_port: Port of the redis server.
+        network: The docker network shared by nitter and redis.
+        reuse: If True, running containers started with the same settings are reused, and
+            the containers are left running on exit for the next job.
+
+    Yields:
+        NitterPool: An object routing scrapes to the started nitter docker containers.
+    """
+    ports = list(ports)
+
+    owns_session = session is None
+    if owns_session:
+        # Every port is a separate connection pool.
+        session = NitterSession(pool_connections=len(ports))
+
+    with redis_cache(redis, redis_host, redis_port, network, reuse) as cache:
+        pool = NitterPool.from_ports(
+            host=host,
+            ports=ports,
+            session=session,
+            nitter_options={"reuse": reuse, **cache},
+            strategy=strategy,
+            health_check_interval=health_check_interval,
+        )
+
+        try:
+            pool.start()
+            yield pool
+
+        finally:
+            pool.stop()
+            if owns_session:
+                session.close()
@@ -0,0 +1,170 @@
+"""Module for the html parser backends used by the tweet and profile parsers.
+
+The tweet and profile parsers only rely on a small part of the requests_html Element
+interface: `find()`, `text`, `links` and `attrs`. A backend turns a response into an object
+providing that interface.
+
+* `requests_html` (the default) parses pages with requests_html. Every `find()` builds pyquery
+  objects, translates the CSS selector to XPath and re-parses the found element.
+* `lxml` parses the raw response bytes once with lxml and runs precompiled XPath expressions
+  over that tree. It produces the same results for the nitter pages the parsers target.
+"""
+from functools import lru_cache
+from typing import Dict, Optional, Set, Union
+
+from cssselect import HTMLTranslator
+from lxml.etree import XPath
+import lxml.html
+from pyquery.text import extract_text
+from requests_html import HTML
+from w3lib.encoding import html_to_unicode
+
+
+@lru_cache(maxsize=None)
+def compile_selector(selector: str) -> XPath:
+    """Compiles a CSS selector to an XPath expression once.
+
+    Like pyquery, the selector also matches the element it is run against.
+
+    Args:
+        selector: CSS selector.
+
+    Returns:
+        A compiled XPath expression.
+    """
+    return XPath(HTMLTranslator().css_to_xpath(selector, prefix="descendant-or-self::"))
+
+
+class LxmlElement:
+    """A lightweight stand-in for requests_html.Element over an lxml element.
+
+    Args:
+        element: The lxml element to wrap.
+    """
+
+    __slots__ = ["element", "_attrs"]
+
+    def __init__(self, element):
+        self.element = element
+        self._attrs = None
+
+    def __repr__(self) -> str:
+        return f"<LxmlElement {self.element.tag!r} {self.attrs}>"
+
+    def find(self, selector: str = "*", first: bool = False):
+        """Finds elements matching a CSS selector.
+
+        Args:
+            selector: CSS selector.
+            first: If True, only the first found element or None is returned.
+
+        Returns:
+            A list of LxmlElement objects, or a single one if first is True.
+        """
+        found = compile_selector(selector)(self.element)
+        if first:
+            return LxmlElement(found[0]) if found else None
+        return [LxmlElement(element) for element in found]
+
+    @property
+    def text(self) -> str:
+        """The text content of the element, whitespace squashed the same way as pyquery."""
+        if self.element.tag == "textarea":
+            return self.element.text or ""
+        return extract_text(self.element)
+
+    @property
+    def links(self) -> Set[str]:
+        """All links found in the element, skipping anchors, javascript and mailto links."""
+        links = set()
+        for link in compile_selector("a")(self.element):
+            href = link.get("href", "").strip()
+            if href and not href.startswith(("#", "javascript:", "mailto:")):
+                links.add(href)
+        return links
+
+    @property
+    def attrs(self) -> Dict[str, Union[str, tuple]]:
+        """The attributes of the element, with class and rel split into tuples."""
+        if self._attrs is None:
+            self._attrs = dict(self.element.items())
+            for attr in ["class", "rel"]:
+                if attr in self._attrs:
+                    self._attrs[attr] = tuple(self._attrs[attr].split())
+        return self._attrs
+
+
+class RequestsHTMLBackend:
+    """Parses pages with requests_html."""
+
+    name = "requests_html"
+
+    def parse(self, content: bytes, url: Optional[str] = None) -> HTML:
+        """Parses a page.
+
+        Args:
+            content: Raw page bytes.
+            url: The url the page was fetched from.
+
+        Returns:
+            requests_html HTML object.
+        """
+        if url:
+            return HTML(html=content, url=url)
+        return HTML(html=content)
+
+    def page(self, response) -> HTML:
+        """Returns the parsed page of a response, parsing it only once."""
+        return response.html
+
+
+class LxmlBackend:
+    """Parses the raw page bytes with lxml."""
+
+    name = "lxml"
+
+    def parse(self, content: bytes, url: Optional[str] = None) -> LxmlElement:
+        """Parses a page.
+
+        Args:
+            content: Raw page bytes.
+            url: The url the page was fetched from.
+
+        Returns:
+            LxmlElement wrapping the document root.
+        """
+        # Decode the same way requests_html does: BOM, then declared encoding, then utf-8.
+        _, text = html_to_unicode(None, content)
+        return LxmlElement(lxml.html.document_fromstring(text))
+
+    def page(self, response) -> LxmlElement:
+        """Returns the parsed page of a response, parsing it only once."""
+        page = getattr(response, "lxml_page", None)
+        if page is None:
+            page = self.parse(response.content, response.url)
+            response.lxml_page = page
+        return page
+
+
+BACKENDS = {backend.name: backend for backend in [RequestsHTMLBackend(), LxmlBackend()]}
+"""* Available parser backends by name."""
+
+
+def get_backend(backend: Union[str, object] = "requests_html"):
+    """Gets a parser backend.
+
+    Args:
+        backend: A backend name from BACKENDS, or a backend object.
+
+    Returns:
+        The parser backend.
+
+    Raises:
+        ValueError: If no backend with that name exists.
+    """
+    if not isinstance(backend, str):
+        return backend
+    try:
+        return BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown parser backend {backend!r}, choose from {list(BACKENDS)}.")
@@ -1,4 +1,5 @@
 from pathlib import Path
+from tempfile import gettempdir
 
 SOURCE_ROOT = Path(__file__).parent
 """* A path to the nitter_scraper source code directory."""
@@ -10,5 +11,14 @@ TEMPLATES_DIRECTORY = SOURCE_ROOT / "templates"
 """* A path to the template directory. The template is used by
 jinja2 to render docker config files."""
 
+DATA_DIRECTORY = SOURCE_ROOT / "data"
+"""* A path to the package data directory. It holds testpage.html, a recorded nitter timeline
+page served by nitter_scraper.mock.MockNitter."""
+
 TEST_DIRECTORY = PROJECT_ROOT / "tests"
 """* A path to the nitter_scraper test directory"""
+
+CONFIG_DIRECTORY = Path(gettempdir()) / "nitter_scraper"
+"""* A path to the directory holding the rendered nitter config files. The files are
+named after a hash of their contents, so containers started with the same config share
+the same file."""
@@ -0,0 +1,213 @@
+"""Module for cheaply checking timelines for new tweets.
+
+Polling thousands of accounts with get_tweets builds the DOM of every page, parses every
+field of every tweet and validates the Tweet objects, only to learn that nothing changed.
+probe_timeline fetches the first page of a timeline and scans the raw response bytes with a
+few regular expressions for the tweet ids, dates and the pinned and retweet flags. When the
+probe finds tweets above a high-water mark, TimelineProbe.parse builds the Tweet objects from
+the same response, so the full parse only runs when there is something new and no page is
+fetched twice.
+
+Example:
+```
+    probe = probe_timeline("dgnsrekt", session=session)
+    if probe and probe.new_tweets(last_tweet_id):
+        tweets = probe.parse(since_tweet_id=last_tweet_id)
+```
+"""
+from datetime import datetime
+import html
+import re
+from typing import List, Optional, Union
+
+from pydantic import BaseModel as Base
+
+from nitter_scraper.dedup import BloomFilter, LRUSet  # noqa: I100, I202
+from nitter_scraper.metrics import Hooks
+from nitter_scraper.parsers import get_backend
+from nitter_scraper.retry import fetch
+from nitter_scraper.schema import Tweet
+from nitter_scraper.session import NitterSession, preference_cookies
+from nitter_scraper.tweets import parse_date, timeline_parser, TweetFilter
+
+TIMELINE_ITEM = re.compile(rb'<div class="timeline-item[ "]')
+TWEET_LINK = re.compile(rb'class="tweet-link" href="/([^/"]+)/status/(\d+)')
+TWEET_DATE = re.compile(rb'class="tweet-date"><a [^>]*?title="([^"]*)"')
+PINNED = b'class="pinned"'
+RETWEET = b'class="retweet-header"'
+TIMELINE_NONE = re.compile(rb'class="[^"]*\btimeline-none\b')
+
+
+class TweetStub(Base):
+    """The few fields of a tweet the probe reads from the raw page.
+
+    Attributes:
+        tweet_id: Twitter assigned id associated with the tweet.
+        username: The author of the tweet, the retweeted user for retweets.
+        time: Time the user sent the tweet, None if the date couldn't be parsed.
+        is_pinned: Represents if the user has pinned the tweet.
+        is_retweet: Represents if the tweet is a retweet.
+    """
+
+    tweet_id: int
+    username: str
+    time: Optional[datetime]
+    is_pinned: bool
+    is_retweet: bool
+
+
+def scan_timeline(content: bytes) -> List[TweetStub]:
+    """Reads the tweet stubs of a timeline page from its raw bytes, without building a DOM.
+
+    Args:
+        content: The raw html of a timeline or search page.
+
+    Returns:
+        The stubs of the tweets on the page, in page order.
+    """
+    starts = [match.start() for match in TIMELINE_ITEM.finditer(content)]
+    stubs = []
+    for start, end in zip(starts, starts[1:] + [len(content)]):
+        item = content[start:end]
+        link = TWEET_LINK.search(item)
+        if link is None:
+            # The "Load more" item and items of deleted tweets have no link.
+            continue
+
+        date = TWEET_DATE.search(item)
+        time = None
+        if date is not None:
+            title = date.group(1).decode("utf-8", "replace")
+            try:
+                time = parse_date(html.unescape(title) if "&" in title else title)
+            except ValueError:
+                pass
+
+        stubs.append(
+            TweetStub.construct(
+                tweet_id=int(link.group(2)),
+                username=link.group(1).decode("utf-8", "replace"),
+                time=time,
+                is_pinned=PINNED in item,
+                is_retweet=RETWEET in item,
+            )
+        )
+    return stubs
+
+
+def is_timeline_response(response) -> bool:
+    """Same as tweets.is_valid_response, but checks the raw bytes instead of the DOM."""
+    return bool(
+        response and response.status_code == 200 and not TIMELINE_NONE.search(response.content)
+    )
+
+
+class TimelineProbe:
+    """The tweet stubs of a timeline page, and the response they were read from.
+
+    Args:
+        response: The timeline page response.
+        endpoint: The username the page belongs to.
+        hooks: Instrumentation hooks, called with the outcome of every tweet parsed by parse.
+
+    Attributes:
+        tweets: The stubs of the tweets on the page, in page order.
+    """
+
+    def __init__(self, response, endpoint: str, hooks: Hooks = None):
+        self.response = response
+        self.endpoint = endpoint
+        self.hooks = hooks
+        self.tweets = scan_timeline(response.content)
+
+    @property
+    def latest_tweet_id(self) -> Optional[int]:
+        """The highest tweet id on the page, None for an empty page."""
+        return max((stub.tweet_id for stub in self.tweets), default=None)
+
+    def new_tweets(self, since_tweet_id: Optional[int]) -> List[TweetStub]:
+        """The stubs of the tweets above a high-water mark, every stub if it is None."""
+        if since_tweet_id is None:
+            return list(self.tweets)
+        return [stub for stub in self.tweets if stub.tweet_id > since_tweet_id]
+
+    def reaches(self, since_tweet_id: int) -> bool:
+        """True if the page goes back to a high-water mark, so it holds every newer tweet.
+
+        Pinned tweets and retweets can be older than the tweets below them, they don't count.
+        """
+        return any(
+            stub.tweet_id <= since_tweet_id and not stub.is_pinned and not stub.is_retweet
+            for stub in self.tweets
+        )
+
+    def parse(
+        self,
+        since_tweet_id: Optional[int] = None,
+        parser: str = "lxml",
+        validate: bool = True,
+        dedup: Union[LRUSet, BloomFilter] = None,
+        lazy: bool = False,
+    ) -> List[Tweet]:
+        """Fully parses the tweets of the probed page, without fetching it again.
+
+        Args:
+            since_tweet_id: Only returns tweets with a higher id, like get_tweets.
+            parser: The html parser backend, "lxml" or "requests_html".
+            validate: If False, Tweet objects are built without pydantic validation.
+            dedup: An LRUSet or BloomFilter of the tweet ids already seen, see
+                nitter_scraper.dedup. Tweets found in it are dropped.
+            lazy: If True, returns LazyTweet proxies instead of Tweet objects.
+
+        Returns:
+            Tweet objects, in page order.
+        """
+        timeline = timeline_parser(get_backend(parser).page(self.response))
+        tweet_filter = TweetFilter(
+            self.endpoint,
+            since_tweet_id=since_tweet_id,
+            dedup=dedup,
+            validate=validate,
+            hooks=self.hooks,
+            lazy=lazy,
+        )
+        return list(tweet_filter.filter(timeline))
+
+
+def probe_timeline(
+    username: str,
+    address: str = "https://nitter.net",
+    session: NitterSession = None,
+    original_urls: bool = False,
+) -> Optional[TimelineProbe]:
+    """Fetches the first page of a users timeline and reads its tweet stubs.
+
+    Requests follow the session's retry policy and rate limiter, like get_tweets.
+
+    Args:
+        username: Targeted users username.
+        address: The address to scrape from.
+        session: A shared NitterSession. If None, a session is created and closed for this call.
+        original_urls: If True, the original urls will be used instead of the nitter, piped,
+            teddit alternatives, when the probe is parsed.
+
+    Returns:
+        The probe, or None if no usable timeline page was fetched.
+    """
+    address = address.rstrip("/")
+    owns_session = session is None
+    if owns_session:
+        session = NitterSession(original_urls=original_urls)
+    headers = {"Cookie": preference_cookies(original_urls)} if original_urls else {}
+
+    try:
+        response = fetch(
+            session, f"{address}/{username}", validate=is_timeline_response, headers=headers
+        )
+    finally:
+        if owns_session:
+            session.close()
+
+    if response is None:
+        return None
+    return TimelineProbe(response, username, getattr(session, "metrics", None))
@@ -1,8 +1,22 @@
+from collections import OrderedDict
+import re
+import threading
+import time
 from typing import Dict, Optional
 
-from requests_html import HTML, HTMLSession
+from pydantic import BaseModel as Base
+from requests_html import HTML
 
-from nitter_scraper.schema import Profile  # noqa: I100, I202
+from nitter_scraper.parsers import get_backend  # noqa: I100, I202
+from nitter_scraper.retry import fetch
+from nitter_scraper.schema import Profile
+from nitter_scraper.session import NitterSession
+
+ERROR_TITLE = re.compile(rb"<title>\s*Error \| nitter\s*</title>")
+"""* The title of the nitter page of a missing account."""
+
+BANNER_USER_ID = re.compile(r"profile_banners(?:%2F|/)(\d+)")
+"""* The user id in a banner url, with the path quoted or not."""
 
 
 def username_cleaner(username: str) -> str:
@@ -59,7 +73,9 @@ def parse_user_id_from_banner(banner_url: str) -> str:
 
     """
     if banner_url:
-        return banner_url.split("%2F")[4]
+        match = BANNER_USER_ID.search(banner_url)
+        if match:
+            return match.group(1)
 
 
 def stat_cleaner(stat: str) -> int:
@@ -180,8 +196,29 @@ def html_parser(html: HTML) -> Dict:
     return elements
 
 
+def parse_profile(response, parser: str = "requests_html", validate: bool = True) -> Profile:
+    """Parses the profile page of a successful response.
+
+    Args:
+        response: The response to a profile page request.
+        parser: The html parser backend, "requests_html" or the faster "lxml".
+        validate: If False, the Profile object is built without pydantic validation.
+
+    Returns:
+        Profile object.
+    """
+    elements = html_parser(get_backend(parser).page(response))
+    parsed_elements = profile_parser(elements)
+    return Profile.from_dict(parsed_elements, validate=validate)
+
+
 def get_profile(
-    username: str, not_found_ok: bool = False, address: str = "https://nitter.net"
+    username: str,
+    not_found_ok: bool = False,
+    address: str = "https://nitter.net",
+    session: NitterSession = None,
+    parser: str = "requests_html",
+    validate: bool = True,
 ) -> Optional[Profile]:
     """Scrapes nitter for the target users profile information.
 
@@ -192,6 +229,11 @@ def get_profile(
         address: The address to scrape profile data from. The default scrape location is
             'https://nitter.net' which should be used as a backup. This value will normally be
             replaced by the address of a local docker container instance of nitter.
+        session: A shared NitterSession. If None, a session is created and closed for this call.
+        parser: The html parser backend, "requests_html" or the faster "lxml".
+            See nitter_scraper.parsers.
+        validate: If False, the Profile object is built without pydantic validation, which is
+            faster. .dict() and .json() work the same.
 
     Returns:
         Profile object if successfully scraped, otherwise None.
@@ -201,17 +243,283 @@ def get_profile(
 
 
     """
-    url = f"{address}/{username}"
-    session = HTMLSession()
-    response = session.get(url)
+    response = _fetch_profile_page(username, address, session)
 
     if response.status_code == 200:  # user exists
-        elements = html_parser(response.html)
-        parsed_elements = profile_parser(elements)
-        return Profile.from_dict(parsed_elements)
+        return parse_profile(response, parser, validate)
 
     if not_found_ok:
         return None
 
     else:
         raise ValueError(f'Oops! Either "{username}" does not exist or is private.')
+
+
+def _fetch_profile_page(username: str, address: str, session: Optional[NitterSession]):
+    url = f"{address}/{username}"
+    if session is None:
+        with NitterSession() as session:
+            return fetch(session, url)
+    return fetch(session, url)
+
+
+def profile_status(response) -> Optional[bool]:
+    """Tells from the raw bytes of a profile page response whether the account exists.
+
+    Args:
+        response: The response to a profile page request.
+
+    Returns:
+        True if the account exists, False if nitter answered that it doesn't, and None for
+        any other answer, like a server error once the retries are spent.
+    """
+    if response.status_code == 404:
+        return False
+    if response.status_code != 200:
+        return None
+    return not ERROR_TITLE.search(response.content)
+
+
+def profile_exists(
+    username: str,
+    address: str = "https://nitter.net",
+    session: NitterSession = None,
+) -> bool:
+    """Checks if a user exists on nitter, without parsing the profile.
+
+    Only the status and the title of the page are inspected.
+
+    Args:
+        username: The target profiles username.
+        address: The address to scrape profile data from.
+        session: A shared NitterSession. If None, a session is created and closed for this call.
+
+    Returns:
+        True if the profile exists, otherwise False.
+    """
+    return bool(profile_status(_fetch_profile_page(username, address, session)))
+
+
+class ProfileCacheStats(Base):
+    """Counters of a ProfileCache.
+
+    Attributes:
+        hits: Lookups answered by the cache, negative entries included.
+        misses: Lookups that had to be fetched.
+        shared: Lookups that waited for the same lookup of another thread instead of fetching.
+        evictions: Entries dropped to stay within the size limit.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    shared: int = 0
+    evictions: int = 0
+
+
+_MISSING = object()
+
+
+class _Flight:
+    """A lookup in progress, that other threads asking for the same entry wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ProfileCache:
+    """A thread safe cache of profiles and account existence, keyed by username.
+
+    Profile counts change slowly, so profiles are kept for `ttl` seconds. Missing and private
+    accounts are cached as well, for `negative_ttl` seconds, as they are looked up again just
+    as often and can change state. Answers that don't settle anything, like server errors,
+    are never cached.
+
+    Concurrent lookups of the same username share one request: the first thread fetches, the
+    others wait for its result. Existence checks are answered from cached profiles, or from the
+    status and title of the profile page, without parsing it.
+
+    Entries are keyed by username only, so one cache can be shared by every nitter instance of
+    a pool.
+
+    Args:
+        ttl: Seconds a profile or an existing account is kept.
+        negative_ttl: Seconds a missing account or a private profile is kept.
+        max_entries: Max number of entries kept. The least recently used are dropped first.
+
+    Example:
+    ```
+        cache = ProfileCache(ttl=3600)
+        with NitterSession() as session:
+            if cache.exists("dgnsrekt", session=session):
+                profile = cache.get("dgnsrekt", session=session)
+    ```
+    """
+
+    def __init__(
+        self, ttl: float = 3600.0, negative_ttl: float = 300.0, max_entries: int = 10_000
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.stats = ProfileCacheStats()
+        self._entries = OrderedDict()
+        self._flights: Dict[tuple, _Flight] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(username: str) -> str:
+        """Usernames are case insensitive, and may start with an @."""
+        return username_cleaner(username).lower()
+
+    def get(
+        self,
+        username: str,
+        not_found_ok: bool = False,
+        address: str = "https://nitter.net",
+        session: NitterSession = None,
+        parser: str = "requests_html",
+        validate: bool = True,
+    ) -> Optional[Profile]:
+        """Gets a profile from the cache, or scrapes it like get_profile() on a miss.
+
+        Args:
+            See get_profile().
+
+        Returns:
+            Profile object if the profile exists, otherwise None.
+
+        Raises:
+            ValueError: If the target profile does not exist and the not_found_ok argument is
+                false.
+        """
+        key = self.key(username)
+
+        def load():
+            response = _fetch_profile_page(username, address, session)
+            status = profile_status(response)
+            if not status:
+                # A server error settles nothing and isn't cached.
+                return None, (None if status is None else self.negative_ttl)
+
+            profile = parse_profile(response, parser, validate)
+            return profile, (self.negative_ttl if profile.is_private else self.ttl)
+
+        # A known missing account needs no request.
+        if self._cached(("exists", key)) is False:
+            self._hit()
+            profile = None
+        else:
+            profile = self._lookup(("profile", key), load)
+
+        if profile is None and not not_found_ok:
+            raise ValueError(f'Oops! Either "{username}" does not exist or is private.')
+        return profile
+
+    def exists(
+        self,
+        username: str,
+        address: str = "https://nitter.net",
+        session: NitterSession = None,
+    ) -> bool:
+        """Checks if a user exists, from the cache or from the status and title of its page.
+
+        Args:
+            See profile_exists().
+
+        Returns:
+            True if the profile exists, otherwise False.
+        """
+        key = self.key(username)
+
+        def load():
+            status = profile_status(_fetch_profile_page(username, address, session))
+            if status is None:
+                return False, None
+            return status, (self.ttl if status else self.negative_ttl)
+
+        profile = self._cached(("profile", key))
+        if profile is not _MISSING:
+            self._hit()
+            return profile is not None
+        return self._lookup(("exists", key), load)
+
+    def invalidate(self, username: str):
+        """Drops the cached profile and existence of a username."""
+        key = self.key(username)
+        with self._lock:
+            self._entries.pop(("profile", key), None)
+            self._entries.pop(("exists", key), None)
+
+    def clear(self):
+        """Drops every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cached(self, entry_key: tuple):
+        """The value of a fresh entry, or _MISSING."""
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self._entries[entry_key]
+                return _MISSING
+            self._entries.move_to_end(entry_key)
+            return entry[1]
+
+    def _hit(self):
+        with self._lock:
+            self.stats.hits += 1
+
+    def _lookup(self, entry_key: tuple, load):
+        """Returns the value of an entry, loading it once for every thread that asks at once.
+
+        load returns the value and the seconds to keep it, None to not cache it.
+        """
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(entry_key)
+                self.stats.hits += 1
+                return entry[1]
+
+            flight = self._flights.get(entry_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[entry_key] = _Flight()
+                self.stats.misses += 1
+            else:
+                self.stats.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value, ttl = load()
+        except BaseException as error:
+            flight.error = error
+            raise
+        else:
+            if ttl is not None:
+                self._store(entry_key, flight.value, ttl)
+        finally:
+            with self._lock:
+                del self._flights[entry_key]
+            flight.done.set()
+        return flight.value
+
+    def _store(self, entry_key: tuple, value, ttl: float):
+        with self._lock:
+            self._entries[entry_key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
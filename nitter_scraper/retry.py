@@ -0,0 +1,409 @@
+"""Module for retrying failed requests and rate limiting requests per host"""
+import asyncio
+import random
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, Optional
+from urllib.parse import urlparse
+
+from loguru import logger
+from pydantic import BaseModel as Base
+import requests
+
+
+class RetryPolicy(Base):
+    """Decides which failed requests are retried, and how long to wait before retrying.
+
+    Delays grow exponentially with each attempt and are randomized with jitter, so many
+    streams failing at once don't retry in lockstep.
+
+    Attributes:
+        max_retries: Max number of retries after the first attempt.
+        backoff: Delay in seconds before the first retry.
+        backoff_factor: Multiplier applied to the delay after every retry.
+        max_backoff: Upper bound of a single delay in seconds.
+        jitter: Fraction of each delay that is randomized. 0 disables jitter, 1 draws the
+            delay uniformly between 0 and the computed backoff.
+        max_elapsed: Stops retrying once this many seconds have passed since the first attempt.
+            None disables the limit.
+        retry_statuses: Status codes that are retried. Any other non 200 status is returned
+            to the caller straight away.
+        status_backoff: Per status code override of the base backoff, for example a longer
+            wait after a 429 rate limit response.
+        retry_invalid: Retry successful responses rejected by the caller's validator, like
+            nitter timelines that come back empty.
+        retry_errors: Retry connection errors and timeouts.
+        respect_retry_after: Use a Retry-After header in seconds when the server sends one.
+    """
+
+    max_retries: int = 5
+    backoff: float = 0.5
+    backoff_factor: float = 2.0
+    max_backoff: float = 30.0
+    jitter: float = 0.5
+    max_elapsed: Optional[float] = 60.0
+    retry_statuses: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+    status_backoff: Dict[int, float] = {429: 5.0}
+    retry_invalid: bool = True
+    retry_errors: bool = True
+    respect_retry_after: bool = True
+
+    def should_retry(self, response=None, error: Exception = None, valid: bool = True) -> bool:
+        """Checks if an attempt should be retried.
+
+        Args:
+            response: The response of the attempt, if any.
+            error: The exception raised by the attempt, if any.
+            valid: The result of the caller's validator for a 200 response.
+
+        Returns:
+            True if the attempt should be retried.
+        """
+        if error is not None:
+            return self.retry_errors and isinstance(error, requests.RequestException)
+        if response.status_code == 200:
+            return self.retry_invalid and not valid
+        return response.status_code in self.retry_statuses
+
+    def delay(self, attempt: int, response=None) -> float:
+        """Computes how long to wait before a retry.
+
+        Args:
+            attempt: Number of the retry, starting at 0.
+            response: The response of the failed attempt, if any.
+
+        Returns:
+            Delay in seconds.
+        """
+        status = getattr(response, "status_code", None)
+
+        if self.respect_retry_after and response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.strip().isdigit():
+                return min(float(retry_after), self.max_backoff)
+
+        backoff = self.status_backoff.get(status, self.backoff)
+        delay = min(backoff * self.backoff_factor ** attempt, self.max_backoff)
+        return delay * (1 - self.jitter * random.random())
+
+    def give_up(self, attempt: int, started: float, delay: float) -> bool:
+        """Checks if the retry budget is spent.
+
+        Args:
+            attempt: Number of the retry about to be made, starting at 0.
+            started: time.monotonic() of the first attempt.
+            delay: The delay before the retry about to be made.
+
+        Returns:
+            True if no more retries should be made.
+        """
+        if attempt >= self.max_retries:
+            return True
+        if self.max_elapsed is not None:
+            return time.monotonic() - started + delay > self.max_elapsed
+        return False
+
+
+class TokenBucket:
+    """A thread safe token bucket.
+
+    Tokens are added at `rate` per second, up to `burst` tokens. Taking a token reserves it
+    straight away and returns how long the caller has to wait for it, so the same bucket
+    works for threads and for coroutines.
+
+    Args:
+        rate: Tokens added per second.
+        burst: Max number of tokens that can be taken at once after an idle period.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("The rate must be positive")
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token.
+
+        Returns:
+            Seconds to wait before the token may be used.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        """Takes a token, sleeping until it may be used."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def async_acquire(self):
+        """Takes a token, sleeping without blocking the event loop until it may be used."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class RateLimiter:
+    """Keeps a token bucket per host, shared by every request made through it.
+
+    Args:
+        rate: Default requests per second for each host.
+        burst: Default burst size for each host.
+        host_rates: Per host overrides of the rate, keyed by host[:port].
+
+    Example:
+    ```
+        limiter = RateLimiter(rate=20, host_rates={"nitter.net": 2})
+        session = NitterSession(rate_limiter=limiter)
+    ```
+    """
+
+    def __init__(self, rate: float = 5.0, burst: int = 1, host_rates: Dict[str, float] = None):
+        self.rate = rate
+        self.burst = burst
+        self.host_rates = host_rates or {}
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        """Gets the token bucket of the host of an url."""
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self.buckets:
+                rate = self.host_rates.get(host, self.rate)
+                self.buckets[host] = TokenBucket(rate, self.burst)
+            return self.buckets[host]
+
+    def acquire(self, url: str):
+        """Waits for a request slot for the host of an url."""
+        self.bucket(url).acquire()
+
+    async def async_acquire(self, url: str):
+        """Waits for a request slot for the host of an url without blocking the event loop."""
+        await self.bucket(url).async_acquire()
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+"""* The retry policy used when a session doesn't define one."""
+
+
+def _is_valid(response, error, validate) -> bool:
+    """Checks an attempt: a 200 response that passes the caller's validator, if any."""
+    valid = error is None and response.status_code == 200
+    if valid and validate is not None:
+        valid = validate(response)
+    return valid
+
+
+def _retry_delay(policy, attempt, started, response, error, valid) -> Optional[float]:
+    """Returns the delay before the next attempt, or None if this attempt is the last one."""
+    if valid or not policy.should_retry(response, error, valid):
+        return None
+
+    delay = policy.delay(attempt, response)
+    if policy.give_up(attempt, started, delay):
+        return None
+    return delay
+
+
+def _retry_reason(response, error) -> str:
+    if error is not None:
+        return type(error).__name__
+    if response.status_code == 200:
+        return "invalid"
+    return str(response.status_code)
+
+
+class _FetchState:
+    """The settings and progress of a fetch() or async_fetch() call.
+
+    Holds everything but the I/O, so both loops only send requests, wait and sleep.
+    """
+
+    def __init__(self, session, url, retry_policy, rate_limiter, validate, cache, headers):
+        self.session = session
+        self.url = url
+        self.policy = (
+            retry_policy or getattr(session, "retry_policy", None) or DEFAULT_RETRY_POLICY
+        )
+        self.limiter = rate_limiter or getattr(session, "rate_limiter", None)
+        self.validate = validate
+        self.cache = cache or getattr(session, "cache", None)
+        self.hooks = getattr(session, "metrics", None)
+        self.archive = getattr(session, "archive", None)
+        self.headers = headers
+        self.started = time.monotonic()
+        self.attempt = 0
+
+    def cached(self):
+        """Looks the url up in the cache, returns the cached response or None."""
+        if self.cache is None:
+            return None
+        lookup = time.perf_counter()
+        cached = self.cache.get(self.url, self.headers, self.session, self.validate)
+        if cached is not None and self.hooks is not None:
+            elapsed = time.perf_counter() - lookup
+            self.hooks.on_response(self.url, cached, elapsed, cached=True)
+        return cached
+
+    def on_request(self) -> float:
+        """Reports a request about to be sent, returns the time it is sent at."""
+        if self.hooks is not None:
+            self.hooks.on_request(self.url)
+        return time.perf_counter()
+
+    def finish_attempt(self, response, error, sent: float):
+        """Checks an attempt and decides whether to retry it.
+
+        Args:
+            response: The response, None if the request failed.
+            error: The connection error the request failed with, if any.
+            sent: The time the request was sent at, from on_request().
+
+        Returns:
+            A (done, result, delay) tuple. Once done, result is the response to return, None
+            for an unsuccessful or rejected one when there is a validator. Otherwise delay is
+            the seconds to sleep before the next attempt.
+
+        Raises:
+            requests.RequestException: If the last attempt failed with a connection error.
+        """
+        if self.hooks is not None and response is not None:
+            self.hooks.on_response(self.url, response, time.perf_counter() - sent)
+
+        valid = _is_valid(response, error, self.validate)
+        delay = _retry_delay(self.policy, self.attempt, self.started, response, error, valid)
+        if delay is None:
+            if error is not None:
+                raise error
+            if not valid and self.validate is not None:
+                return True, None, None
+            return True, response, None
+
+        self.attempt += 1
+        if self.hooks is not None:
+            self.hooks.on_retry(self.url, self.attempt, delay, _retry_reason(response, error))
+
+        reason = error or f"status {response.status_code}"
+        logger.debug(f"Retrying {self.url} in {delay:.2f}s ({reason}), retry {self.attempt}")
+        return False, None, delay
+
+    def store(self, response):
+        """Caches and archives the result of a fetch, if it passed the attempt check.
+
+        Any 200 result passed it: with a validator, rejected responses are never returned.
+        """
+        if response is None or response.status_code != 200:
+            return
+        if self.cache is not None:
+            self.cache.set(self.url, response, self.headers)
+        if self.archive is not None:
+            self.archive.add(self.url, response)
+
+
+def fetch(
+    session,
+    url: str,
+    retry_policy: RetryPolicy = None,
+    rate_limiter: RateLimiter = None,
+    validate: Callable = None,
+    cache=None,
+    **kwargs,
+):
+    """Sends a GET request, retrying it according to a retry policy.
+
+    Args:
+        session: Session used to send the request.
+        url: The url to request.
+        retry_policy: The retry policy. Defaults to the session's, then DEFAULT_RETRY_POLICY.
+        rate_limiter: The rate limiter. Defaults to the session's, if any.
+        validate: Called once with each 200 response, returns False for responses to retry.
+        cache: A ResponseCache answering repeated requests. Defaults to the session's, if any.
+            Cached responses are checked with validate too.
+        **kwargs: Passed on to session.get().
+
+    The session's metrics hooks, if any, are called for every request, response and retry, see
+    nitter_scraper.metrics. Successful responses are added to the session's PageArchive, if
+    any, see nitter_scraper.archive. Cached responses were archived when they were fetched.
+
+    Returns:
+        The last response. It may not be successful once the retries are spent. With a
+        validate function, None is returned instead of an unsuccessful or rejected last
+        response, so callers don't need to validate the page again.
+
+    Raises:
+        requests.RequestException: If the last attempt failed with a connection error.
+    """
+    state = _FetchState(
+        session, url, retry_policy, rate_limiter, validate, cache, kwargs.get("headers")
+    )
+    cached = state.cached()
+    if cached is not None:
+        return cached
+
+    while True:
+        if state.limiter is not None:
+            state.limiter.acquire(url)
+
+        sent = state.on_request()
+        response, error = None, None
+        try:
+            response = session.get(url, **kwargs)
+        except requests.RequestException as exc:
+            error = exc
+
+        done, result, delay = state.finish_attempt(response, error, sent)
+        if done:
+            state.store(result)
+            return result
+        time.sleep(delay)
+
+
+async def async_fetch(
+    session,
+    url: str,
+    retry_policy: RetryPolicy = None,
+    rate_limiter: RateLimiter = None,
+    validate: Callable = None,
+    cache=None,
+    **kwargs,
+):
+    """Async version of fetch(), for an AsyncSession.
+
+    The cache lookup and the caching and archiving of the response block on sqlite, the disk
+    and the page compression, so they run on the default executor of the event loop.
+    """
+    state = _FetchState(
+        session, url, retry_policy, rate_limiter, validate, cache, kwargs.get("headers")
+    )
+    loop = asyncio.get_running_loop()
+    if state.cache is not None:
+        cached = await loop.run_in_executor(None, state.cached)
+        if cached is not None:
+            return cached
+
+    while True:
+        if state.limiter is not None:
+            await state.limiter.async_acquire(url)
+
+        sent = state.on_request()
+        response, error = None, None
+        try:
+            response = await session.get(url, **kwargs)
+        except requests.RequestException as exc:
+            error = exc
+
+        done, result, delay = state.finish_attempt(response, error, sent)
+        if done:
+            if state.cache is not None or state.archive is not None:
+                await loop.run_in_executor(None, state.store, result)
+            return result
+        await asyncio.sleep(delay)
@@ -61,17 +61,26 @@ class Tweet(Base):
     entries: Entries
 
     @classmethod
-    def from_dict(cls, elements: Dict[str, Any]) -> "Tweet":
+    def from_dict(cls, elements: Dict[str, Any], validate: bool = True) -> "Tweet":
         """Creates Tweet object from a dictionary of processed text elements.
 
         Args:
             elements: Preprocessed attributes of a tweet object.
+            validate: If False, the object is built without pydantic validation, which is
+                about three times faster. Only use it for dictionaries made by parse_tweet, whose
+                values already have the right types.
 
         Returns:
             Tweet object.
 
         """
-        return cls(**elements)
+        if validate:
+            return cls(**elements)
+
+        values = dict(elements)
+        values["tweet_id"] = int(values["tweet_id"])
+        values["entries"] = Entries.construct(**values["entries"])
+        return cls.construct(**values)
 
 
 class Profile(Base):
@@ -116,14 +125,23 @@ class Profile(Base):
     website: Optional[str] = None
 
     @classmethod
-    def from_dict(cls, elements: Dict[str, Any]) -> "Profile":
+    def from_dict(cls, elements: Dict[str, Any], validate: bool = True) -> "Profile":
         """Creates Profile object from a dictionary of processed text elements.
 
         Args:
             elements: Preprocessed attributes of a profile object.
+            validate: If False, the object is built without pydantic validation. Only use it
+                for dictionaries made by profile_parser, whose values already have the right
+                types.
 
         Returns:
             Profile object.
 
         """
-        return cls(**elements)
+        if validate:
+            return cls(**elements)
+
+        values = dict(elements)
+        if values.get("user_id") is not None:
+            values["user_id"] = int(values["user_id"])
+        return cls.construct(**values)
@@ -0,0 +1,99 @@
+"""Module for sharing pooled http sessions between scraping calls"""
+from requests.adapters import HTTPAdapter
+from requests_html import HTMLSession
+
+from nitter_scraper.archive import PageArchive  # noqa: I100, I202
+from nitter_scraper.cache import ResponseCache
+from nitter_scraper.metrics import Hooks
+from nitter_scraper.retry import RateLimiter, RetryPolicy
+
+
+def preference_cookies(original_urls: bool = False) -> str:
+    """Builds the nitter preference cookies sent with every timeline request.
+
+    Args:
+        original_urls: If True, the original urls will be used instead of the nitter, piped,
+            teddit alternatives.
+
+    Returns:
+        A Cookie header value.
+    """
+    cookies = (
+        "infiniteScroll=; stickyProfile=; mp4Playback=; hlsPlayback=; proxyVideos=; autoplayGifs="
+    )
+    if original_urls:
+        cookies += "; replaceTwitter=; replaceYouTube=; replaceReddit="
+    return cookies
+
+
+def mount_pools(
+    session, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False
+):
+    """Mounts keep-alive connection pools on a requests session.
+
+    Args:
+        session: The session to configure.
+        pool_connections: Number of hosts to keep a connection pool for.
+        pool_maxsize: Max number of connections kept alive per host.
+        pool_block: If True, requests wait for a free connection instead of opening
+            connections past pool_maxsize.
+    """
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+
+class NitterSession(HTMLSession):
+    """A reusable HTMLSession for nitter.
+
+    Connections are kept alive in per host pools and the nitter preference cookies are set
+    once on the session, so a batch of get_tweets / get_profile calls sharing the session
+    reuses a few sockets instead of doing a new handshake for every call. The retry policy,
+    rate limiter and response cache are used by every fetch made through the session.
+
+    Args:
+        pool_connections: Number of hosts to keep a connection pool for.
+        pool_maxsize: Max number of connections kept alive per host.
+        pool_block: If True, requests wait for a free connection instead of opening
+            connections past pool_maxsize.
+        original_urls: If True, the original urls will be used instead of the nitter, piped,
+            teddit alternatives.
+        retry_policy: How failed requests are retried. If None, DEFAULT_RETRY_POLICY is used.
+        rate_limiter: A rate limiter, possibly shared with other sessions. If None, requests
+            are not rate limited.
+        cache: A ResponseCache, possibly shared with other sessions. If None, responses are
+            not cached.
+        metrics: Instrumentation hooks, like a Metrics instance, see nitter_scraper.metrics.
+        archive: A PageArchive every fetched page is added to, see nitter_scraper.archive.
+
+    Example:
+    ```
+        with NitterSession() as session:
+            for username in usernames:
+                profile = get_profile(username, not_found_ok=True, session=session)
+    ```
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        original_urls: bool = False,
+        retry_policy: RetryPolicy = None,
+        rate_limiter: RateLimiter = None,
+        cache: ResponseCache = None,
+        metrics: Hooks = None,
+        archive: PageArchive = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        mount_pools(self, pool_connections, pool_maxsize, pool_block)
+        self.headers.update({"Cookie": preference_cookies(original_urls)})
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.metrics = metrics
+        self.archive = archive
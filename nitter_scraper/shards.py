@@ -0,0 +1,196 @@
+"""Module for crawling long search windows as parallel time shards.
+
+A search is one chain of pages, each page needs the cursor of the previous one, so a single
+get_tweets call over a month long window can't fetch two pages at once. get_tweets_sharded
+splits the window into shards of whole days and crawls them concurrently, each shard being an
+independent search limited with the `since` and `until` search parameters. The throughput of
+a large backfill then grows with the number of workers.
+
+Nitter's `since` and `until` parameters are dates, so shards are whole days. Tweets are
+filtered to the exact window, and a tweet at the boundary of two shards is only yielded once.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import queue
+import threading
+from typing import Iterator, List, Tuple, Union
+
+from nitter_scraper.dedup import BloomFilter, LRUSet  # noqa: I100, I202
+from nitter_scraper.schema import Tweet
+from nitter_scraper.session import NitterSession
+from nitter_scraper.tweets import as_utc, get_tweets, UTC
+
+ORDERS = ["time", "arrival"]
+"""* How get_tweets_sharded merges the shards: "time" yields the newest shard first, each shard
+in its own order, "arrival" yields tweets as soon as any shard finds them."""
+
+_DONE = object()
+
+
+def shard_window(
+    since_time: datetime, until_time: datetime, shard: timedelta = timedelta(days=1)
+) -> List[Tuple[datetime, datetime]]:
+    """Splits a time window into shards, aligned on midnight UTC.
+
+    Args:
+        since_time: Start of the window. Naive datetimes are taken as UTC.
+        until_time: End of the window. Naive datetimes are taken as UTC.
+        shard: Length of a shard, a whole number of days.
+
+    Returns:
+        The (start, end) of every shard, newest first. The first and last shards are cut to
+        the window.
+
+    Raises:
+        ValueError: If the shard isn't a whole number of days, or the window is empty.
+    """
+    if shard <= timedelta(0) or shard % timedelta(days=1):
+        raise ValueError(
+            "Search shards must be a whole number of days, the since and until parameters "
+            "of nitter searches are dates"
+        )
+
+    since_time = as_utc(since_time).astimezone(UTC)
+    until_time = as_utc(until_time).astimezone(UTC)
+    if since_time >= until_time:
+        raise ValueError("The since_time must be before the until_time")
+
+    shards = []
+    start = since_time
+    while start < until_time:
+        midnight = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        end = min(midnight + shard, until_time)
+        shards.append((start, end))
+        start = end
+    shards.reverse()
+    return shards
+
+
+def get_tweets_sharded(
+    search: str,
+    since_time: datetime,
+    until_time: datetime,
+    shard: timedelta = timedelta(days=1),
+    workers: int = 4,
+    order: str = "time",
+    pages: int = 25,
+    limit: int = None,
+    address: str = "https://nitter.net",
+    original_urls: bool = False,
+    session: NitterSession = None,
+    parser: str = "requests_html",
+    dedup: Union[bool, LRUSet, BloomFilter] = True,
+    validate: bool = True,
+) -> Iterator[Tweet]:
+    """Searches tweets in a time window, crawling its shards concurrently.
+
+    Args:
+        search: Search query.
+        since_time: The earliest time to search tweets from. Naive datetimes are taken as UTC.
+        until_time: The latest time to search tweets from. Naive datetimes are taken as UTC.
+        shard: Length of a shard, a whole number of days.
+        workers: Number of shards crawled at once.
+        order: "time" yields the shards newest first, buffering the tweets of shards that
+            finish early. "arrival" yields the tweets in the order they are found, and buffers
+            nothing.
+        pages: Max number of pages to crawl per shard.
+        limit: Max number of tweets to yield. The crawl stops once it is reached.
+        address: The address to scrape from.
+        original_urls: If True, the original urls will be used instead of the nitter, piped,
+            teddit alternatives.
+        session: A shared NitterSession. If None, a session with a connection per worker is
+            created and closed for this call.
+        parser: The html parser backend, "requests_html" or the faster "lxml".
+        dedup: Drops tweets found by more than one shard, shared by every shard. True uses a
+            new LRUSet. Pass an LRUSet or BloomFilter to also drop tweets seen by other calls.
+        validate: If False, Tweet objects are built without pydantic validation.
+
+    Yields:
+        Tweet Objects
+
+    Example:
+    ```
+        since, until = datetime(2020, 8, 1), datetime(2020, 9, 1)
+        for tweet in get_tweets_sharded("bitcoin", since, until, workers=8):
+            print(tweet.time, tweet.text)
+    ```
+    """
+    if order not in ORDERS:
+        raise ValueError(f"Unknown order {order!r}, choose from {ORDERS}")
+
+    shards = shard_window(since_time, until_time, shard)
+    if isinstance(dedup, bool):
+        dedup = LRUSet() if dedup else None
+
+    owns_session = session is None
+    if owns_session:
+        session = NitterSession(original_urls=original_urls, pool_maxsize=workers)
+
+    results = queue.Queue()
+    stop = threading.Event()
+
+    def crawl(index: int, start: datetime, end: datetime):
+        try:
+            if stop.is_set():
+                return
+            tweets = get_tweets(
+                search=search,
+                pages=pages,
+                address=address,
+                original_urls=original_urls,
+                since_time=start,
+                until_time=end,
+                session=session,
+                parser=parser,
+                dedup=dedup,
+                validate=validate,
+            )
+            for tweet in tweets:
+                if stop.is_set():
+                    tweets.close()
+                    break
+                results.put((index, tweet))
+        except Exception as error:  # noqa: B902
+            results.put((index, error))
+        finally:
+            results.put((index, _DONE))
+
+    executor = ThreadPoolExecutor(workers, thread_name_prefix="nitter-shard")
+    for index, (start, end) in enumerate(shards):
+        executor.submit(crawl, index, start, end)
+
+    buffers = {index: [] for index in range(len(shards))}
+    done = set()
+    current = 0
+    yielded = 0
+
+    try:
+        while len(done) < len(shards):
+            index, item = results.get()
+            if item is _DONE:
+                done.add(index)
+            elif isinstance(item, Exception):
+                raise item
+            elif order == "arrival" or index == current:
+                yield item
+                yielded += 1
+            else:
+                buffers[index].append(item)
+
+            # In time order, move on to the next shards once the current one is done.
+            while order == "time" and current in done and current + 1 < len(shards):
+                current += 1
+                for tweet in buffers.pop(current):
+                    if limit and yielded >= limit:
+                        break
+                    yield tweet
+                    yielded += 1
+
+            if limit and yielded >= limit:
+                return
+
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
+        if owns_session:
+            session.close()
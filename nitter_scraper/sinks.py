@@ -0,0 +1,318 @@
+"""Module for writing scraped tweets to files in batches.
+
+A sink takes tweets one by one, or a whole get_tweets generator, buffers them and writes each
+batch with a single call. Files can be rotated once they reach a size or an age, and JSONL and
+CSV files can be gzip compressed.
+
+* JSONLSink writes one JSON object per line, with the same fields as tweet.json().
+* CSVSink writes one row per tweet, the entries lists are JSON encoded.
+* ParquetSink writes one row group per batch. It needs the optional pyarrow package.
+
+Rows are built straight from the fields of the Tweet objects and encoded with a shared encoder,
+which is about three times cheaper than calling tweet.json() for every tweet. See
+benchmarks/sinks.py.
+"""
+import abc
+import csv
+from datetime import datetime
+import gzip
+import io
+import json
+from pathlib import Path
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from nitter_scraper.schema import Tweet  # noqa: I100, I202
+from nitter_scraper.tweets import LazyTweet
+
+ENTRY_FIELDS = ["hashtags", "cashtags", "urls", "photos", "videos"]
+"""* Fields of the tweet entries, flattened into columns by the CSV and Parquet sinks."""
+
+TWEET_FIELDS = [name for name in Tweet.__fields__ if name != "entries"]
+"""* Fields of a tweet, without the entries."""
+
+
+def isoformat(value: Optional[datetime]) -> Optional[str]:
+    """Formats a tweet time like tweet.json(), None for tweets built without a time."""
+    return value.isoformat() if value is not None else None
+
+
+def tweet_row(tweet: Tweet) -> Dict[str, Any]:
+    """Builds a JSON ready dict of a tweet, like tweet.dict() with the time as a string."""
+    row = dict(tweet.__dict__)
+    row["time"] = isoformat(tweet.time)
+    row["entries"] = dict(tweet.entries.__dict__)
+    return row
+
+
+def flat_row(tweet: Tweet) -> Dict[str, Any]:
+    """Builds a flat dict of a tweet, with the entries lists as columns."""
+    row = {name: tweet.__dict__[name] for name in TWEET_FIELDS}
+    row.update(tweet.entries.__dict__)
+    return row
+
+
+class Sink(abc.ABC):
+    """Base class of the tweet sinks, takes care of batching and rotation.
+
+    Subclasses implement _write_batch, and _open_file and _close_file for other file types.
+
+    Args:
+        path: The file to write. With rotation, each file is named after the path, the time
+            it was opened and a counter, like tweets-20200807T203624-00001.jsonl.
+        batch_size: Number of tweets buffered before they are written.
+        max_bytes: Rotates to a new file once it takes this many bytes on disk, compressed for
+            gzip files. None disables it.
+        max_seconds: Rotates to a new file once it was opened this many seconds ago. None
+            disables it.
+        compression: "gzip", or None to write plain files.
+
+    Attributes:
+        files: Paths of the files written so far.
+        count: Number of tweets written so far.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        batch_size: int = 1000,
+        max_bytes: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        compression: Optional[str] = None,
+    ):
+        if compression not in (None, "gzip"):
+            raise ValueError(f"Unknown compression {compression!r}, choose from gzip or None.")
+
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.compression = compression
+        self.files: List[Path] = []
+        self.count = 0
+
+        self._buffer = []
+        self._file = None
+        self._bytes = 0
+        self._opened = 0.0
+
+    @property
+    def rotates(self) -> bool:
+        return self.max_bytes is not None or self.max_seconds is not None
+
+    def _next_path(self) -> Path:
+        if not self.rotates:
+            path = self.path
+        else:
+            stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+            name = f"{self.path.stem}-{stamp}-{len(self.files):05d}{self.path.suffix}"
+            path = self.path.with_name(name)
+        if self.compression == "gzip":
+            path = path.with_name(path.name + ".gz")
+        return path
+
+    def _should_rotate(self) -> bool:
+        if self.max_bytes is not None and self._bytes >= self.max_bytes:
+            return True
+        if self.max_seconds is not None and time.monotonic() - self._opened >= self.max_seconds:
+            return True
+        return False
+
+    def write(self, tweet: Tweet):
+        """Buffers a tweet, writing the buffer once it holds batch_size tweets.
+
+        LazyTweet proxies are parsed into Tweet objects, without validation.
+        """
+        if isinstance(tweet, LazyTweet):
+            tweet = tweet.to_tweet(validate=False)
+        self._buffer.append(tweet)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def write_all(self, tweets: Iterable[Tweet]) -> int:
+        """Writes every tweet of an iterable, like a get_tweets generator.
+
+        Returns:
+            Number of tweets written.
+        """
+        count = 0
+        for tweet in tweets:
+            self.write(tweet)
+            count += 1
+        self.flush()
+        return count
+
+    def flush(self):
+        """Writes the buffered tweets."""
+        if not self._buffer:
+            return
+
+        if self._file is not None and self.rotates and self._should_rotate():
+            self._close_file()
+
+        if self._file is None:
+            path = self._next_path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self._open_file(path)
+            self.files.append(path)
+            self._bytes = 0
+            self._opened = time.monotonic()
+
+        batch, self._buffer = self._buffer, []
+        self._bytes += self._write_batch(batch)
+        self.count += len(batch)
+
+    def close(self):
+        """Writes the buffered tweets and closes the current file."""
+        self.flush()
+        if self._file is not None:
+            self._close_file()
+
+    def _open_file(self, path: Path):
+        if self.compression == "gzip":
+            return gzip.open(path, "wb")
+        return open(path, "wb")
+
+    def _disk_position(self) -> int:
+        if self.compression == "gzip":
+            return self._file.fileobj.tell()
+        return self._file.tell()
+
+    def _write_text(self, data: str) -> int:
+        """Writes text encoded in UTF-8, returns the number of bytes it added on disk."""
+        start = self._disk_position()
+        self._file.write(data.encode("utf-8"))
+        if self.compression == "gzip":
+            # Empties the compressor, which would hold back the end of the batch. It costs a
+            # few bytes per batch.
+            self._file.flush()
+        return self._disk_position() - start
+
+    def _close_file(self):
+        self._file.close()
+        self._file = None
+
+    @abc.abstractmethod
+    def _write_batch(self, batch: List[Tweet]) -> int:
+        """Writes a batch to the current file, returns the number of bytes it added on disk."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class JSONLSink(Sink):
+    """Writes tweets as JSON lines.
+
+    Example:
+    ```
+        with JSONLSink("tweets.jsonl", max_bytes=512 * 1024 ** 2, compression="gzip") as sink:
+            sink.write_all(get_tweets("dgnsrekt", pages=10))
+    ```
+    """
+
+    _encoder = json.JSONEncoder(ensure_ascii=False)
+
+    def _write_batch(self, batch: List[Tweet]) -> int:
+        encode = self._encoder.encode
+        data = "".join([encode(tweet_row(tweet)) + "\n" for tweet in batch])
+        return self._write_text(data)
+
+
+class CSVSink(Sink):
+    """Writes tweets as CSV rows, with a header at the top of every file.
+
+    The entries are flattened into hashtags, cashtags, urls, photos and videos columns, each
+    holding a JSON list.
+    """
+
+    columns = TWEET_FIELDS + ENTRY_FIELDS
+
+    def _open_file(self, path: Path):
+        self._header = True
+        return super()._open_file(path)
+
+    def _write_batch(self, batch: List[Tweet]) -> int:
+        buffer = io.StringIO()
+        if self._header:
+            buffer.write(",".join(self.columns) + "\r\n")
+            self._header = False
+        writer = csv.writer(buffer)
+        encode = JSONLSink._encoder.encode
+        time_index = TWEET_FIELDS.index("time")
+
+        rows = []
+        for tweet in batch:
+            fields, entries = tweet.__dict__, tweet.entries.__dict__
+            row = [fields[name] for name in TWEET_FIELDS]
+            row[time_index] = isoformat(row[time_index])
+            row.extend([encode(entries[name]) for name in ENTRY_FIELDS])
+            rows.append(row)
+        writer.writerows(rows)
+
+        return self._write_text(buffer.getvalue())
+
+
+class ParquetSink(Sink):
+    """Writes tweets to Parquet files, one row group per batch.
+
+    Needs the pyarrow package. The compression is done by Parquet itself, so the compression
+    argument takes a Parquet codec: "snappy" (the default), "gzip", "zstd" or None.
+    """
+
+    def __init__(self, path: Union[str, Path], compression: Optional[str] = "snappy", **kwargs):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError(
+                "The ParquetSink needs pyarrow, install it with "
+                "pip install nitter_scraper[parquet]"
+            )
+
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.codec = compression or "none"
+        self._output = None
+        super().__init__(path, **kwargs)
+
+        strings = pyarrow.list_(pyarrow.string())
+        self.schema = pyarrow.schema(
+            [
+                ("tweet_id", pyarrow.int64()),
+                ("tweet_url", pyarrow.string()),
+                ("username", pyarrow.string()),
+                ("is_retweet", pyarrow.bool_()),
+                ("is_pinned", pyarrow.bool_()),
+                ("time", pyarrow.timestamp("us", tz="UTC")),
+                ("text", pyarrow.string()),
+                ("replies", pyarrow.int64()),
+                ("retweets", pyarrow.int64()),
+                ("quotes", pyarrow.int64()),
+                ("likes", pyarrow.int64()),
+            ]
+            + [(name, strings) for name in ENTRY_FIELDS]
+        )
+
+    def _open_file(self, path: Path):
+        # The writer gets an unbuffered file, whose position is the size of the file on disk.
+        self._output = self._pa.OSFile(str(path), "wb")
+        return self._pq.ParquetWriter(self._output, self.schema, compression=self.codec)
+
+    def _disk_position(self) -> int:
+        return self._output.tell()
+
+    def _close_file(self):
+        super()._close_file()
+        self._output.close()
+        self._output = None
+
+    def _write_batch(self, batch: List[Tweet]) -> int:
+        rows = [flat_row(tweet) for tweet in batch]
+        columns = {name: [row[name] for row in rows] for name in self.schema.names}
+        table = self._pa.table(columns, schema=self.schema)
+        start = self._disk_position()
+        self._file.write_table(table)
+        return self._disk_position() - start
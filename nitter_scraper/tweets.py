@@ -1,13 +1,24 @@
 """Module for scraping tweets"""
-from datetime import datetime
+from collections.abc import Mapping
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import queue
 import re
-from typing import Dict, Optional
+import threading
 import time
-import dateutil.parser
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
-from requests_html import HTMLSession
+from loguru import logger
 
-from nitter_scraper.schema import Tweet  # noqa: I100, I202
+from nitter_scraper.checkpoint import CheckpointStore  # noqa: I100, I202
+from nitter_scraper.dedup import BloomFilter, LRUSet
+from nitter_scraper.metrics import Hooks
+from nitter_scraper.parsers import get_backend
+from nitter_scraper.retry import DEFAULT_RETRY_POLICY, fetch
+from nitter_scraper.schema import Entries, Tweet
+from nitter_scraper.session import NitterSession, preference_cookies
+
+UTC = timezone.utc
 
 
 def link_parser(tweet_link):
@@ -20,34 +31,71 @@ def link_parser(tweet_link):
     return tweet_id, username, tweet_url
 
 
-def date_parser(tweet_date):
-    try:
-        # Check if the date uses the new format with the funky little dot
-        if "·" in tweet_date:
-            dt = dateutil.parser.parse(tweet_date.replace("·", "-").replace("Â", ""))
-            return dt
+MONTHS = {
+    name: number
+    for number, name in enumerate(
+        ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], 1
+    )
+}
+
+# The current format, like "Aug 7, 2020 · 8:36 PM UTC". The dot can come out as "Â·".
+NEW_DATE_FORMAT = re.compile(
+    r"([A-Z][a-z]{2}) (\d{1,2}), (\d{4}) \S*· (\d{1,2}):(\d{2})(?::(\d{2}))? ([AP]M) UTC$"
+)
+
+# The older format, like "27/4/2019, 05:45:08".
+OLD_DATE_FORMAT = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4}), (\d{1,2}):(\d{2}):(\d{2})$")
+
+
+@lru_cache(maxsize=4096)
+def parse_date(tweet_date: str) -> datetime:
+    """Parses the title of a tweet date link into a timezone aware datetime.
+
+    Nitter renders every date in UTC. Parsed strings are memoized, as the same strings come
+    back on every page of a timeline that is crawled again.
+
+    Args:
+        tweet_date: The date in either of the formats Nitter uses.
 
-        # Else use the old format
-        else:
-            split_datetime = tweet_date.split(",")
+    Returns:
+        The date in UTC.
 
-            day, month, year = split_datetime[0].strip().split("/")
-            hour, minute, second = split_datetime[1].strip().split(":")
+    Raises:
+        ValueError: The date is in neither format.
+    """
+    tweet_date = tweet_date.strip()
+
+    match = NEW_DATE_FORMAT.match(tweet_date)
+    if match:
+        month, day, year, hour, minute, second, meridiem = match.groups()
+        hour = int(hour) % 12 + (12 if meridiem == "PM" else 0)
+        if month not in MONTHS:
+            raise ValueError(f"Unknown month in tweet date {tweet_date!r}")
+        return datetime(
+            int(year), MONTHS[month], int(day), hour, int(minute), int(second or 0), tzinfo=UTC
+        )
+
+    match = OLD_DATE_FORMAT.match(tweet_date)
+    if match:
+        day, month, year, hour, minute, second = map(int, match.groups())
+        return datetime(year, month, day, hour, minute, second, tzinfo=UTC)
 
-            data = {}
+    raise ValueError(f"Unknown tweet date format {tweet_date!r}")
 
-            data["day"] = int(day)
-            data["month"] = int(month)
-            data["year"] = int(year)
 
-            data["hour"] = int(hour)
-            data["minute"] = int(minute)
-            data["second"] = int(second)
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Takes naive datetimes as UTC, like the tweet dates, and returns aware ones unchanged."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value
 
-            return datetime(**data)
-    except Exception as e:
-        print(e)
-        print("Error parsing date:", tweet_date)
+
+def date_parser(tweet_date):
+    """Parses a tweet date with parse_date, logging a warning and returning None on failure."""
+    try:
+        return parse_date(tweet_date)
+    except ValueError as exc:
+        logger.warning(f"Error parsing date: {exc}")
         return None
 
 
@@ -137,6 +185,131 @@ def parse_tweet(html) -> Dict:
     return data
 
 
+class LazyTweet(Mapping):
+    """A tweet that parses its fields from its timeline item on first access.
+
+    Reading one field only parses that field, and fields parsed together, like the id, url
+    and username of the tweet link, are cached together. Code that only looks at `tweet_id`
+    and `time` before dropping most tweets skips the text, stats and entries parsing.
+
+    Items are read like the dicts of parse_tweet, `tweet["tweet_id"]` is the id string, and
+    `dict(tweet)` parses every field into the same dict. Attributes are read like a Tweet,
+    `tweet.tweet_id` is an int and `tweet.entries` an Entries object.
+
+    The proxy holds on to the parsed page of its timeline item until it is converted with
+    to_tweet().
+
+    Args:
+        html: A timeline item element, as found by timeline_parser.
+    """
+
+    __slots__ = ("html", "_values", "_body", "_content")
+
+    _parsers = {
+        "tweet_id": "_parse_link",
+        "tweet_url": "_parse_link",
+        "username": "_parse_link",
+        "is_retweet": "_parse_retweet",
+        "is_pinned": "_parse_pinned",
+        "time": "_parse_time",
+        "text": "_parse_text",
+        "replies": "_parse_stats",
+        "retweets": "_parse_stats",
+        "quotes": "_parse_stats",
+        "likes": "_parse_stats",
+        "entries": "_parse_entries",
+    }
+
+    def __init__(self, html):
+        self.html = html
+        self._values = {}
+        self._body = None
+        self._content = None
+
+    def __getitem__(self, key: str):
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        if key not in self._parsers:
+            raise KeyError(key)
+        getattr(self, self._parsers[key])()
+        return self._values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._parsers)
+
+    def __len__(self) -> int:
+        return len(self._parsers)
+
+    def __getattr__(self, name: str):
+        if name not in self._parsers:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        value = self[name]
+        if name == "tweet_id":
+            return int(value)
+        if name == "entries":
+            return Entries.construct(**value)
+        return value
+
+    def __repr__(self) -> str:
+        return f"LazyTweet({self._values!r})"
+
+    def to_tweet(self, validate: bool = True) -> Tweet:
+        """Parses the remaining fields into a Tweet object.
+
+        Args:
+            validate: If False, the Tweet is built without pydantic validation.
+        """
+        return Tweet.from_dict(dict(self), validate=validate)
+
+    def _tweet_body(self):
+        if self._body is None:
+            self._body = self.html.find(".tweet-body", first=True)
+        return self._body
+
+    def _tweet_content(self):
+        if self._content is None:
+            self._content = self._tweet_body().find(".tweet-content", first=True)
+        return self._content
+
+    def _parse_link(self):
+        tweet_id, username, url = link_parser(self.html.find(".tweet-link", first=True))
+        self._values.update(tweet_id=tweet_id, tweet_url=url, username=username)
+
+    def _parse_retweet(self):
+        retweet = self.html.find(".retweet-header .icon-container .icon-retweet", first=True)
+        self._values["is_retweet"] = True if retweet else False
+
+    def _parse_pinned(self):
+        self._values["is_pinned"] = self._tweet_body().find(".pinned", first=True) is not None
+
+    def _parse_time(self):
+        date = self._tweet_body().find(".tweet-date a", first=True).attrs["title"]
+        self._values["time"] = date_parser(date)
+
+    def _parse_text(self):
+        self._values["text"] = self._tweet_content().text
+
+    def _parse_stats(self):
+        stats = stats_parser(self.html.find(".tweet-stats", first=True))
+        self._values["replies"] = clean_stat(stats.get("comment", "0"))
+        self._values["retweets"] = clean_stat(stats.get("retweet", "0"))
+        self._values["quotes"] = clean_stat(stats.get("quote", "0"))
+        self._values["likes"] = clean_stat(stats.get("heart", "0"))
+
+    def _parse_entries(self):
+        content = self._tweet_content()
+        photos, videos = attachment_parser(self._tweet_body().find(".attachments", first=True))
+        self._values["entries"] = {
+            "hashtags": hashtag_parser(content.text),
+            "cashtags": cashtag_parser(content.text),
+            "urls": url_parser(content.links),
+            "photos": photos,
+            "videos": videos,
+        }
+
+
 def timeline_parser(html):
     return html.find(".timeline", first=True)
 
@@ -151,51 +324,95 @@ def pagination_parser(timeline, address, endpoint) -> str:
     return f"{address}/{endpoint}{next_page}"
 
 
-def get_with_retry(session, url, retries=5):
-    time.sleep(0.2)
-    response = session.get(url)
-    if (
+def is_valid_response(response, parser: str = "requests_html") -> bool:
+    """Checks if a response holds a usable timeline page.
+
+    Args:
+        response: Response returned by a session.
+        parser: The parser backend used to inspect the page, see nitter_scraper.parsers.
+
+    Returns:
+        True if the response was successful and the timeline is not empty, otherwise False.
+    """
+    return bool(
         response
         and response.status_code == 200
-        and not response.html.find(".timeline-none", first=True)
-    ):
-        return response
-    if retries > 0:
-        print(f"Retrying {url}... {retries} retries left")
-        time.sleep(0.5)
-        return get_with_retry(session, url, retries=retries - 1)
-    else:
-        return None
+        and not get_backend(parser).page(response).find(".timeline-none", first=True)
+    )
 
 
-def get_tweets(
+def get_with_retry(session, url, retries=None, parser="requests_html", **kwargs):
+    """Fetches a timeline page, retrying failed requests and empty timelines.
+
+    Retries follow the session's retry policy and requests are spaced by the session's rate
+    limiter, see nitter_scraper.retry.
+
+    Args:
+        session: Session used to fetch the page.
+        url: The url of the page.
+        retries: Overrides the max number of retries of the retry policy.
+        parser: The parser backend used to inspect the page, see nitter_scraper.parsers.
+        **kwargs: Passed on to session.get().
+
+    Returns:
+        The response if a usable timeline page was fetched, otherwise None.
+    """
+    policy = getattr(session, "retry_policy", None) or DEFAULT_RETRY_POLICY
+    if retries is not None:
+        policy = policy.copy(update={"max_retries": retries})
+
+    def validate(response):
+        return is_valid_response(response, parser)
+
+    return fetch(session, url, retry_policy=policy, validate=validate, **kwargs)
+
+
+def seek_query(username: str) -> str:
+    """Builds the search query that seeks the tweets of a user.
+
+    A timeline can only be read from its newest tweet, so reaching a time window far in the
+    past means fetching every page in between. A search for the users tweets is limited to the
+    window by its since and until parameters, so its first page is already in the window.
+
+    Twitter searches leave retweets out unless asked for, they are included so the search
+    finds the same tweets as the timeline. Search results don't mark the pinned tweet, it is
+    found at its own time, with is_pinned False.
+
+    Args:
+        username: Targeted users username.
+
+    Returns:
+        The search query.
+    """
+    return f"from:{username} include:nativeretweets"
+
+
+def build_timeline_url(
+    address: str,
     username: str = None,
     search: str = None,
-    pages: int = 25,
-    limit: int = None,
-    break_on_tweet_id: Optional[int] = None,
-    address="https://nitter.net",
-    original_urls: bool = False,
     since_time: datetime = None,
     until_time: datetime = None,
-) -> Tweet:
-    """Gets the target users tweets
+    seek: bool = False,
+) -> Tuple[str, str, str]:
+    """Builds the first page url of a user timeline or a search.
 
     Args:
+        address: The address to scrape from.
         username: Targeted users username.
-        pages: Max number of pages to lookback starting from the latest tweet.
-        break_on_tweet_id: Gives the ability to break out of a loop if a tweets id is found.
-        address: The address to scrape from. The default is https://nitter.net which should
-            be used as a fallback address.
-        original_urls: If True, the original urls will be used instead of the nitter, piped, teddit alternatives
-        since_time: The earliest time to scrape tweets from
-        until_time: The latest time to scrape tweets from
-
-    Yields:
-        Tweet Objects
-
+        search: Search query, used instead of a username.
+        since_time: The earliest time to search tweets from.
+        until_time: The latest time to search tweets from.
+        seek: If True and a time window is set, a user timeline is read from a search for the
+            users tweets in the window, see seek_query.
+
+    Returns:
+        The address without a trailing slash, the url of the first page and the endpoint
+        used to build pagination urls.
+
+    Raises:
+        ValueError: If neither or both of username and search are provided.
     """
-
     # If the address ends with a slash, remove it
     if address[-1] == "/":
         address = address[:-1]
@@ -206,6 +423,9 @@ def get_tweets(
     if username and search:
         raise ValueError("Only one of username or search can be provided")
 
+    if seek and username and (since_time or until_time):
+        username, search = None, seek_query(username)
+
     if username:
         url = f"{address}/{username}"
         endpoint = username
@@ -215,83 +435,565 @@ def get_tweets(
         url = f"{address}/search?f=tweets&q={search}"
         # If the since or until time is set, add it to the url as ISO date (no time)
         if since_time:
-            url += f"&since={since_time.date().isoformat()}"
+            url += f"&since={as_utc(since_time).astimezone(UTC).date().isoformat()}"
         if until_time:
-            url += f"&until={until_time.date().isoformat()}"
+            # The until date is exclusive, so the day of until_time is included unless it
+            # starts at midnight. Tweets past until_time are dropped by the TweetFilter.
+            until_time = as_utc(until_time).astimezone(UTC)
+            until_date = until_time.date()
+            if until_time.time() != datetime.min.time():
+                until_date += timedelta(days=1)
+            url += f"&until={until_date.isoformat()}"
         endpoint = "search"
 
-    session = HTMLSession()
+    return address, url, endpoint
+
 
-    cookies = "infiniteScroll=; stickyProfile=; mp4Playback=; hlsPlayback=; proxyVideos=; autoplayGifs="
-    if original_urls:
-        cookies += "replaceTwitter=; replaceYouTube=; replaceReddit="
-    session.headers.update({"Cookie": cookies})
+def iter_pages(
+    session, url: str, address: str, endpoint: str, pages: int, parser="requests_html", **kwargs
+) -> Iterator[Tuple[object, Optional[str]]]:
+    """Fetches timeline pages one after the other, following the pagination cursors.
 
-    def gen_tweets(pages):
-        response = get_with_retry(session, url)
+    The next page is only fetched once the caller asks for it.
+
+    Args:
+        session: Session used to fetch the pages.
+        url: Url of the first page.
+        address: The address to scrape from, used to build pagination urls.
+        endpoint: The username or "search", as returned by build_timeline_url.
+        pages: Max number of pages to fetch.
+        parser: The parser backend, see nitter_scraper.parsers.
+        **kwargs: Passed on to session.get().
+
+    Yields:
+        Tuples of the parsed timeline and the url of the next page, or None on the last page.
+    """
+    backend = get_backend(parser)
+    next_url = url
+
+    for _ in range(pages):
+        response = get_with_retry(session, next_url, parser=backend, **kwargs)
         if not response:
             return
 
-        num_yielded = 0
-
-        while pages > 0:
-            if response and response.status_code == 200:
-                timeline = timeline_parser(response.html)
-
-                next_url = pagination_parser(timeline, address, endpoint)
-
-                timeline_items = timeline.find(".timeline-item")
-
-                for item in timeline_items:
-                    if "show-more" in item.attrs["class"]:
-                        continue
-
-                    tweet_data = parse_tweet(item)
-                    tweet = Tweet.from_dict(tweet_data)
-
-                    if tweet.tweet_id == break_on_tweet_id:
-                        pages = 0
-                        break
-
-                    if (
-                        endpoint != "search"
-                        and since_time
-                        and tweet.time.timestamp() < since_time.timestamp()
-                        and not tweet.is_pinned
-                        and not tweet.is_retweet
-                    ):
-                        # Too old, break
-                        # Note: We don't break on pinned or retweets because they can be old
-                        # Note: For search, we let the search endpoint handle the since_time
-                        pages = 0
-                        break
-
-                    if (
-                        until_time
-                        and tweet.time.timestamp() > until_time.timestamp()
-                    ):
-                        # Too new, continue
-                        continue
-
-                    # Only yield if time if between since and until
-                    if (
-                        not since_time
-                        or tweet.time.timestamp() >= since_time.timestamp()
-                    ) and (
-                        not until_time
-                        or tweet.time.timestamp() <= until_time.timestamp()
-                    ):
-                        yield tweet
-                        num_yielded += 1
-
-                        # Check if we've reached the limit
-                        if limit and num_yielded >= limit:
-                            pages = 0
-                            break
-
-            response = get_with_retry(session, next_url)
-            if not response:
+        timeline = timeline_parser(backend.page(response))
+        next_url = pagination_parser(timeline, address, endpoint)
+
+        yield timeline, next_url
+
+        if not next_url:
+            return
+
+
+def prefetch_pages(
+    session,
+    url: str,
+    address: str,
+    endpoint: str,
+    pages: int,
+    depth: int = 1,
+    parser="requests_html",
+    **kwargs,
+) -> Iterator[Tuple[object, Optional[str]]]:
+    """Same as iter_pages, but fetches pages ahead on a background thread.
+
+    The next page is requested as soon as its cursor is known, so the network wait overlaps
+    with the caller parsing the current page. At most `depth` pages are fetched ahead of the
+    caller. When the caller stops early, closing this generator stops the background thread;
+    a request already in flight is finished and discarded.
+
+    Args:
+        session: Session used to fetch the pages.
+        url: Url of the first page.
+        address: The address to scrape from, used to build pagination urls.
+        endpoint: The username or "search", as returned by build_timeline_url.
+        pages: Max number of pages to fetch.
+        depth: Max number of pages fetched ahead of the caller.
+        parser: The parser backend, see nitter_scraper.parsers.
+        **kwargs: Passed on to session.get().
+
+    Yields:
+        Tuples of the parsed timeline and the url of the next page, or None on the last page.
+    """
+    if depth < 1:
+        raise ValueError("The prefetch depth must be at least 1")
+
+    results = queue.Queue()
+    slots = threading.Semaphore(depth)
+    stop = threading.Event()
+
+    def fetch_ahead():
+        try:
+            for page in iter_pages(session, url, address, endpoint, pages, parser, **kwargs):
+                results.put(page)
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+        except Exception as error:  # noqa: B902
+            results.put(error)
+        finally:
+            results.put(None)
+
+    slots.acquire()
+    thread = threading.Thread(target=fetch_ahead, name="nitter-prefetch", daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            result = results.get()
+            if result is None:
+                return
+            if isinstance(result, Exception):
+                raise result
+
+            slots.release()
+            yield result
+
+    finally:
+        stop.set()
+
+
+class TweetFilter:
+    """Applies the get_tweets stop conditions and time window to parsed timelines.
+
+    The filter keeps its state between pages, so one instance is used for a whole crawl.
+
+    Args:
+        endpoint: The username or "search", as returned by build_timeline_url.
+        limit: Max number of tweets to yield.
+        break_on_tweet_id: Stops the crawl when a tweet with this id is found.
+        since_time: The earliest time to scrape tweets from. Naive datetimes are taken as UTC.
+        until_time: The latest time to scrape tweets from. Naive datetimes are taken as UTC.
+        since_tweet_id: Only yields tweets with a higher id, and stops the crawl at the first
+            tweet with a lower or equal id. Pinned tweets and retweets can be older than the
+            tweets below them, so they are skipped instead of stopping the crawl.
+        dedup: An LRUSet or BloomFilter of the tweet ids already yielded, see
+            nitter_scraper.dedup. Tweets found in it are dropped.
+        validate: If False, Tweet objects are built without pydantic validation.
+        hooks: Instrumentation hooks, called with the outcome of every tweet parsed. See
+            nitter_scraper.metrics.
+        lazy: If True, yields LazyTweet proxies instead of Tweet objects and parsed dicts, and
+            the filters only parse the fields they check.
+
+    Attributes:
+        done: True once a stop condition has been hit.
+        num_yielded: Number of tweets yielded so far.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        limit: int = None,
+        break_on_tweet_id: Optional[int] = None,
+        since_time: datetime = None,
+        until_time: datetime = None,
+        since_tweet_id: Optional[int] = None,
+        dedup: Union[LRUSet, BloomFilter] = None,
+        validate: bool = True,
+        hooks: Hooks = None,
+        lazy: bool = False,
+    ):
+        self.endpoint = endpoint
+        self.limit = limit
+        self.break_on_tweet_id = break_on_tweet_id
+        self.since_time = as_utc(since_time)
+        self.until_time = as_utc(until_time)
+        self.since_tweet_id = since_tweet_id
+        self.dedup = dedup
+        self.validate = validate
+        self.hooks = hooks
+        self.lazy = lazy
+        self.done = False
+        self.num_yielded = 0
+
+    def filter(self, timeline) -> Iterator[Tweet]:
+        """Parses and filters the items of a single timeline page.
+
+        Args:
+            timeline: Timeline element returned by timeline_parser.
+
+        Yields:
+            Tweet Objects, or LazyTweet proxies in lazy mode.
+        """
+        if self.lazy:
+            yield from self.filter_dicts(timeline)
+            return
+
+        for tweet_data in self.filter_dicts(timeline):
+            yield Tweet.from_dict(tweet_data, validate=self.validate)
+
+    def filter_dicts(self, timeline) -> Iterator[Dict]:
+        """Same as filter, but yields the parsed dicts instead of Tweet objects.
+
+        Args:
+            timeline: Timeline element returned by timeline_parser.
+
+        Yields:
+            Tweet dicts as returned by parse_tweet, or LazyTweet proxies in lazy mode.
+        """
+        since_time, until_time = self.since_time, self.until_time
+        hooks = self.hooks
+        parse = LazyTweet if self.lazy else parse_tweet
+
+        for item in timeline.find(".timeline-item"):
+            if "show-more" in item.attrs["class"]:
+                continue
+
+            tweet_data = parse(item)
+            tweet_id = int(tweet_data["tweet_id"])
+            # Lazy tweets only parse the fields that are read, the time and the pinned and
+            # retweet flags are only read when a filter needs them.
+            tweet_time = tweet_data["time"] if since_time or until_time else None
+
+            if tweet_id == self.break_on_tweet_id:
+                if hooks is not None:
+                    hooks.on_tweet(tweet_data, "break")
+                self.done = True
+                return
+
+            if self.since_tweet_id is not None and tweet_id <= self.since_tweet_id:
+                if hooks is not None:
+                    hooks.on_tweet(tweet_data, "seen")
+                if tweet_data["is_pinned"] or tweet_data["is_retweet"]:
+                    continue
+                self.done = True
+                return
+
+            if (
+                self.endpoint != "search"
+                and since_time
+                and tweet_time.timestamp() < since_time.timestamp()
+                and not tweet_data["is_pinned"]
+                and not tweet_data["is_retweet"]
+            ):
+                # Too old, break
+                # Note: We don't break on pinned or retweets because they can be old
+                # Note: For search, we let the search endpoint handle the since_time
+                if hooks is not None:
+                    hooks.on_tweet(tweet_data, "too_old")
+                self.done = True
+                return
+
+            if until_time and tweet_time.timestamp() > until_time.timestamp():
+                # Too new, continue
+                if hooks is not None:
+                    hooks.on_tweet(tweet_data, "too_new")
+                continue
+
+            # Only yield if time if between since and until
+            if (not since_time or tweet_time.timestamp() >= since_time.timestamp()) and (
+                not until_time or tweet_time.timestamp() <= until_time.timestamp()
+            ):
+                # Duplicates are dropped before the Tweet is validated.
+                if self.dedup is not None and not self.dedup.add(tweet_id):
+                    if hooks is not None:
+                        hooks.on_tweet(tweet_data, "duplicate")
+                    continue
+
+                if hooks is not None:
+                    hooks.on_tweet(tweet_data, "yielded")
+                yield tweet_data
+                self.num_yielded += 1
+
+                # Check if we've reached the limit
+                if self.limit and self.num_yielded >= self.limit:
+                    self.done = True
+                    return
+
+            elif hooks is not None:
+                hooks.on_tweet(tweet_data, "too_old")
+
+
+class TimelineCrawl:
+    """The paging and checkpoint state of a crawl, shared by get_tweets and async_get_tweets.
+
+    If the checkpoint store holds a checkpoint for the crawl, the crawl resumes from it.
+
+    Args:
+        url: Url of the first page.
+        address: The address to scrape from, used to build pagination urls.
+        endpoint: The username or "search", as returned by build_timeline_url.
+        pages: Max number of pages, the pages of earlier runs included.
+        tweet_filter: The filter of the crawl.
+        parser: The parser backend, see nitter_scraper.parsers.
+        hooks: Instrumentation hooks, called with the parse time of every page.
+        checkpoint: A CheckpointStore the position of the crawl is saved to after every page.
+        checkpoint_key: Identifies the crawl in the checkpoint store. Defaults to url.
+
+    Attributes:
+        next_url: Url of the next page to fetch, None once the crawl is over.
+        pages_done: Number of pages crawled, the pages of earlier runs included.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        address: str,
+        endpoint: str,
+        pages: int,
+        tweet_filter: TweetFilter,
+        parser="requests_html",
+        hooks: Hooks = None,
+        checkpoint: CheckpointStore = None,
+        checkpoint_key: str = None,
+    ):
+        self.address = address
+        self.endpoint = endpoint
+        self.pages = pages
+        self.tweet_filter = tweet_filter
+        self.backend = get_backend(parser)
+        self.hooks = hooks
+        self.checkpoint = checkpoint
+        self.checkpoint_key = checkpoint_key or url
+        self.next_url = url
+        self.pages_done = 0
+
+        if checkpoint is not None:
+            saved = checkpoint.load(self.checkpoint_key)
+            if saved is not None:
+                # A finished crawl has no next page, nothing is fetched.
+                self.next_url = saved.next_url
+                self.pages_done = pages if saved.finished else saved.pages
+                tweet_filter.num_yielded = saved.num_yielded
+
+        if self.pages_done >= pages:
+            self.next_url = None
+
+    @property
+    def pages_left(self) -> int:
+        """Number of pages left to fetch."""
+        return self.pages - self.pages_done if self.next_url else 0
+
+    def filter_page(self, timeline) -> List[Dict]:
+        """Filters the tweets of a parsed timeline page, see TweetFilter.filter_dicts."""
+        if self.hooks is None:
+            return list(self.tweet_filter.filter_dicts(timeline))
+
+        parse_started = time.perf_counter()
+        tweet_page = list(self.tweet_filter.filter_dicts(timeline))
+        seconds = time.perf_counter() - parse_started
+        self.hooks.on_page_parsed(self.pages_done + 1, len(tweet_page), seconds)
+        return tweet_page
+
+    def parse_page(self, response) -> Tuple[List[Dict], Optional[str]]:
+        """Parses and filters the timeline page of a response.
+
+        Returns:
+            The tweets that passed the filters and the url of the next page, or None on the
+            last page.
+        """
+        timeline = timeline_parser(self.backend.page(response))
+        next_url = pagination_parser(timeline, self.address, self.endpoint)
+        return self.filter_page(timeline), next_url
+
+    def page_done(self, next_url: Optional[str]) -> Optional[str]:
+        """Counts the page just crawled and saves its checkpoint.
+
+        Args:
+            next_url: The url of the next page, None on the last page.
+
+        Returns:
+            The url of the next page to fetch, None once the crawl is over.
+        """
+        self.pages_done += 1
+        if self.tweet_filter.done:
+            next_url = None
+        if self.checkpoint is not None:
+            num_yielded = self.tweet_filter.num_yielded
+            self.checkpoint.save(self.checkpoint_key, next_url, num_yielded, self.pages_done)
+
+        self.next_url = next_url if self.pages_done < self.pages else None
+        return self.next_url
+
+
+def get_tweets(
+    username: str = None,
+    search: str = None,
+    pages: int = 25,
+    limit: int = None,
+    break_on_tweet_id: Optional[int] = None,
+    address="https://nitter.net",
+    original_urls: bool = False,
+    since_time: datetime = None,
+    until_time: datetime = None,
+    session: NitterSession = None,
+    parser: str = "requests_html",
+    prefetch: int = 0,
+    since_tweet_id: Optional[int] = None,
+    checkpoint: CheckpointStore = None,
+    checkpoint_key: str = None,
+    dedup: Union[bool, LRUSet, BloomFilter] = None,
+    validate: bool = True,
+    seek: bool = False,
+    lazy: bool = False,
+) -> Tweet:
+    """Gets the target users tweets
+
+    Args:
+        username: Targeted users username.
+        search: Search query, used instead of a username.
+        pages: Max number of pages to lookback starting from the latest tweet.
+        limit: Max number of tweets to yield.
+        break_on_tweet_id: Gives the ability to break out of a loop if a tweets id is found.
+        address: The address to scrape from. The default is https://nitter.net which should
+            be used as a fallback address.
+        original_urls: If True, the original urls will be used instead of the nitter, piped, teddit alternatives
+        since_time: The earliest time to scrape tweets from
+        until_time: The latest time to scrape tweets from
+        session: A shared NitterSession. If None, a session is created and closed for this call.
+        parser: The html parser backend, "requests_html" or the faster "lxml".
+            See nitter_scraper.parsers.
+        prefetch: Number of pages to fetch ahead on a background thread while the current page
+            is parsed. 0 (the default) fetches each page only once it is needed.
+        since_tweet_id: Only yields tweets newer than this id, and stops at the first older
+            tweet. Unlike break_on_tweet_id, the crawl stops even if that tweet was deleted.
+        checkpoint: A CheckpointStore the position of the crawl is saved to after every page.
+            If it holds a checkpoint for the crawl, the crawl resumes from it, and the pages
+            and limit count the pages and tweets of the earlier runs.
+        checkpoint_key: Identifies the crawl in the checkpoint store. Defaults to the url of
+            the first page, which holds the username or search and the time window.
+        dedup: Drops tweets that were already yielded. True drops the duplicates of this call.
+            Pass a shared LRUSet or BloomFilter to drop tweets seen by other calls, on other
+            accounts or, once saved and loaded, by earlier runs. See nitter_scraper.dedup.
+        validate: If False, Tweet objects are built from the parsed pages without pydantic
+            validation, which is about three times faster. .dict() and .json() still work.
+        seek: If True, a user timeline with a since_time or until_time is read from a search
+            for the users tweets in the window, instead of paging back from the newest tweet.
+            The pages fetched then depend on the size of the window, not on how far back it
+            is. Search results don't mark the pinned tweet, see seek_query.
+        lazy: If True, yields LazyTweet proxies that parse each field on first access, and
+            become Tweet objects with to_tweet(). Callers that read only a few fields, like
+            `tweet_id` and `time`, skip most of the parsing.
+
+    Yields:
+        Tweet Objects, or LazyTweet proxies in lazy mode.
+
+    """
+    tweet_pages = iter_tweet_pages(
+        username=username,
+        search=search,
+        pages=pages,
+        limit=limit,
+        break_on_tweet_id=break_on_tweet_id,
+        address=address,
+        original_urls=original_urls,
+        since_time=since_time,
+        until_time=until_time,
+        session=session,
+        parser=parser,
+        prefetch=prefetch,
+        since_tweet_id=since_tweet_id,
+        checkpoint=checkpoint,
+        checkpoint_key=checkpoint_key,
+        dedup=dedup,
+        seek=seek,
+        lazy=lazy,
+    )
+
+    try:
+        for tweet_page in tweet_pages:
+            if lazy:
+                yield from tweet_page
+                continue
+            for tweet_data in tweet_page:
+                yield Tweet.from_dict(tweet_data, validate=validate)
+
+    finally:
+        tweet_pages.close()
+
+
+def iter_tweet_pages(
+    username: str = None,
+    search: str = None,
+    pages: int = 25,
+    limit: int = None,
+    break_on_tweet_id: Optional[int] = None,
+    address="https://nitter.net",
+    original_urls: bool = False,
+    since_time: datetime = None,
+    until_time: datetime = None,
+    session: NitterSession = None,
+    parser: str = "requests_html",
+    prefetch: int = 0,
+    since_tweet_id: Optional[int] = None,
+    checkpoint: CheckpointStore = None,
+    checkpoint_key: str = None,
+    dedup: Union[bool, LRUSet, BloomFilter] = None,
+    seek: bool = False,
+    lazy: bool = False,
+) -> Iterator[List[Dict]]:
+    """Crawls a timeline like get_tweets, but yields the parsed tweet dicts page by page.
+
+    This is the crawl behind get_tweets and get_tweets_batches. The checkpoint of a page is
+    saved when the next page is asked for.
+
+    Args:
+        See get_tweets().
+
+    Yields:
+        Lists of the tweet dicts of each page that passed the filters, as returned by
+        parse_tweet, or of LazyTweet proxies in lazy mode.
+    """
+    address, url, endpoint = build_timeline_url(
+        address, username, search, since_time, until_time, seek
+    )
+
+    owns_session = session is None
+    if owns_session:
+        session = NitterSession(original_urls=original_urls)
+
+    # The session already carries the default preferences, only override them when needed.
+    headers = {"Cookie": preference_cookies(original_urls)} if original_urls else {}
+
+    if isinstance(dedup, bool):
+        dedup = LRUSet() if dedup else None
+    hooks = getattr(session, "metrics", None)
+    tweet_filter = TweetFilter(
+        endpoint,
+        limit,
+        break_on_tweet_id,
+        since_time,
+        until_time,
+        since_tweet_id,
+        dedup,
+        hooks=hooks,
+        lazy=lazy,
+    )
+    crawl = TimelineCrawl(
+        url, address, endpoint, pages, tweet_filter, parser, hooks, checkpoint, checkpoint_key
+    )
+
+    if prefetch:
+        timeline_pages = prefetch_pages(
+            session,
+            crawl.next_url,
+            address,
+            endpoint,
+            crawl.pages_left,
+            prefetch,
+            crawl.backend,
+            headers=headers,
+        )
+    else:
+        timeline_pages = iter_pages(
+            session,
+            crawl.next_url,
+            address,
+            endpoint,
+            crawl.pages_left,
+            crawl.backend,
+            headers=headers,
+        )
+
+    try:
+        for timeline, next_url in timeline_pages:
+            yield crawl.filter_page(timeline)
+            if crawl.page_done(next_url) is None:
                 break
-            pages -= 1
 
-    yield from gen_tweets(pages)
+    finally:
+        timeline_pages.close()
+        if owns_session:
+            session.close()
@@ -1,32 +1,39 @@
-"""Module for scraping tweets"""
-from datetime import datetime
+"""Module for helpers around nitter usernames"""
 import re
-from typing import Dict, Optional
+from typing import Optional
 
-from requests_html import HTMLSession
+from nitter_scraper.profile import profile_exists  # noqa: I100, I202
+from nitter_scraper.session import NitterSession
+
+TWITTER_USERNAME = re.compile(
+    r"(?:https?:\/\/)?(?:www\.)?(?:mobile\.)?twitter\.com\/([a-zA-Z0-9_]+)"
+)
+"""* A twitter profile url, capturing the username."""
 
-from nitter_scraper.schema import Tweet  # noqa: I100, I202
 
 def user_exists(
     username: str,
     address="https://nitter.net",
+    session: NitterSession = None,
 ) -> bool:
-    """ Checks if a user exists on nitter """
-    
-    url = f"{address}/{username}"
-    session = HTMLSession()
-
-    response = session.get(url)
-    title = response.html.find("title", first=True).text
-    return not title == "Error | nitter"
-    
-def username_from_url(url: str) -> str:
-    """ Extracts a username from a url """
+    """Checks if a user exists on nitter, see nitter_scraper.profile.profile_exists."""
+    return profile_exists(username, address=address, session=session)
+
+
+def username_from_url(url: str) -> Optional[str]:
+    """Extracts a username from a twitter url.
+
+    Args:
+        url: A twitter profile url, or a bare username.
+
+    Returns:
+        The username, or None if the url isn't a twitter profile url.
+    """
     if "/" not in url:
         # If the url contains no slashes, it is probably a username
         return url
-    username = re.search(r"(?:https?:\/\/)?(?:www\.)?(?:mobile\.)?twitter\.com\/([a-zA-Z0-9_]+)", url)
+    username = TWITTER_USERNAME.search(url)
     if username:
         return username.group(1)
     else:
-        return None
\ No newline at end of file
+        return None
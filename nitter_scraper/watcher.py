@@ -0,0 +1,341 @@
+"""Module for watching many accounts for new tweets"""
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+from queue import Queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from loguru import logger
+from pydantic import BaseModel as Base
+
+from nitter_scraper.dedup import BloomFilter, LRUSet  # noqa: I100, I202
+from nitter_scraper.probe import probe_timeline
+from nitter_scraper.schema import Tweet
+from nitter_scraper.session import NitterSession
+from nitter_scraper.tweets import get_tweets, LazyTweet
+
+
+class AccountState(Base):
+    """The polling state of a watched account.
+
+    Attributes:
+        username: The watched account.
+        last_tweet_id: The high-water mark, the highest tweet id seen so far. None until the
+            first poll.
+        rate: Estimated number of new tweets per second.
+        interval: Seconds between two polls of the account.
+        next_poll: time.monotonic() of the next poll.
+        last_poll: time.monotonic() of the last poll, if any.
+        polls: Number of polls made.
+        errors: Number of consecutive failed polls.
+    """
+
+    username: str
+    last_tweet_id: Optional[int] = None
+    rate: float = 0.0
+    interval: float
+    next_poll: float = 0.0
+    last_poll: Optional[float] = None
+    polls: int = 0
+    errors: int = 0
+
+
+class Watcher:
+    """Watches many accounts and delivers their new tweets.
+
+    Each account keeps the highest tweet id seen so far, and each poll stops at the first
+    tweet at or below it, so a poll usually costs a single page request. The time between two
+    polls of an account follows how often it posts: the posting rate is estimated with an
+    exponential moving average, and the next poll is scheduled for when about one new tweet is
+    expected, within min_interval and max_interval. Quiet accounts are polled rarely, so the
+    request volume follows the activity of the accounts instead of their number.
+
+    New tweets are delivered oldest first, to the callback and/or the queue. The callback is
+    called from the worker threads.
+
+    Args:
+        usernames: The accounts to watch.
+        callback: Called with every new tweet.
+        queue: A Queue every new tweet is put on.
+        address: The address to scrape from.
+        session: A shared NitterSession. If None, a session is created and closed with the
+            watcher.
+        min_interval: Min seconds between two polls of an account.
+        max_interval: Max seconds between two polls of an account.
+        smoothing: Weight of the latest poll in the posting rate estimate, between 0 and 1.
+        pages: Max number of pages fetched by a poll, when an account posted a lot since the
+            last one.
+        workers: Number of accounts polled at once.
+        include_retweets: If False, retweets are not delivered.
+        deliver_initial: If True, the tweets found by the first poll of an account are
+            delivered. By default the first poll only sets the high-water mark.
+        parser: The html parser backend, "requests_html" or the faster "lxml".
+        dedup: An LRUSet or BloomFilter of the delivered tweet ids, shared by every account.
+            Drops retweets of a tweet already delivered from another account. Ids are added
+            once their tweet is delivered.
+        probe: If True, the first page of a poll is scanned for new tweet ids with
+            nitter_scraper.probe before anything is parsed. Polls that find nothing new skip
+            the html parsing, and the ones that do parse the page they already fetched.
+
+    Example:
+    ```
+        with Watcher(["dgnsrekt", "NielsOerbaek"], callback=print) as watcher:
+            watcher.join()
+    ```
+    """
+
+    def __init__(
+        self,
+        usernames: Iterable[str] = (),
+        callback: Callable[[Tweet], None] = None,
+        queue: Queue = None,
+        address: str = "https://nitter.net",
+        session: NitterSession = None,
+        min_interval: float = 60.0,
+        max_interval: float = 3600.0,
+        smoothing: float = 0.3,
+        pages: int = 5,
+        workers: int = 4,
+        include_retweets: bool = True,
+        deliver_initial: bool = False,
+        parser: str = "requests_html",
+        dedup: Union[LRUSet, BloomFilter] = None,
+        probe: bool = False,
+    ):
+        if callback is None and queue is None:
+            raise ValueError("A callback or a queue is needed to deliver tweets")
+
+        self.callback = callback
+        self.queue = queue
+        self.address = address
+        self.owns_session = session is None
+        self.session = session or NitterSession(pool_maxsize=workers)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.smoothing = smoothing
+        self.pages = pages
+        self.workers = workers
+        self.include_retweets = include_retweets
+        self.deliver_initial = deliver_initial
+        self.parser = parser
+        self.dedup = dedup
+        self.probe = probe
+
+        self.accounts: Dict[str, AccountState] = {}
+        self._schedule = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pool = None
+
+        for username in usernames:
+            self.add(username)
+
+    @property
+    def marks(self) -> Dict[str, Optional[int]]:
+        """The high-water mark of every account, to save and pass back to add() later."""
+        with self._lock:
+            return {name: state.last_tweet_id for name, state in self.accounts.items()}
+
+    def add(self, username: str, last_tweet_id: Optional[int] = None):
+        """Starts watching an account.
+
+        Args:
+            username: The account to watch.
+            last_tweet_id: A saved high-water mark. Only tweets above it are delivered.
+        """
+        with self._lock:
+            state = AccountState(
+                username=username,
+                last_tweet_id=last_tweet_id,
+                interval=self.min_interval,
+                next_poll=time.monotonic(),
+            )
+            self.accounts[username] = state
+            heapq.heappush(self._schedule, (state.next_poll, username))
+        self._wakeup.set()
+
+    def remove(self, username: str):
+        """Stops watching an account."""
+        with self._lock:
+            self.accounts.pop(username, None)
+
+    def _reschedule(self, state: AccountState, interval: float):
+        state.interval = min(max(interval, self.min_interval), self.max_interval)
+        state.next_poll = time.monotonic() + state.interval
+        with self._lock:
+            if self.accounts.get(state.username) is state:
+                heapq.heappush(self._schedule, (state.next_poll, state.username))
+
+    def _update_rate(self, state: AccountState, new_tweets: int, now: float):
+        if state.last_poll is not None and now > state.last_poll:
+            observed = new_tweets / (now - state.last_poll)
+            state.rate = self.smoothing * observed + (1 - self.smoothing) * state.rate
+        state.last_poll = now
+
+    def next_interval(self, state: AccountState) -> float:
+        """Seconds until about one new tweet is expected from an account."""
+        return 1 / state.rate if state.rate > 0 else self.max_interval
+
+    def poll(self, username: str) -> List[Tweet]:
+        """Polls an account once, delivers its new tweets and schedules its next poll.
+
+        Args:
+            username: A watched account.
+
+        Returns:
+            The new tweets, oldest first.
+        """
+        with self._lock:
+            state = self.accounts.get(username)
+        if state is None:
+            # Removed since it was scheduled.
+            return []
+        first_poll = state.last_tweet_id is None
+        now = time.monotonic()
+
+        try:
+            tweets = self._fetch(state)
+            if first_poll and not self.deliver_initial:
+                delivered = []
+            else:
+                # The tweets are lazy, only the delivered ones are fully parsed.
+                converted = [
+                    tweet.to_tweet()
+                    for tweet in reversed(tweets)
+                    if (self.include_retweets or not tweet.is_retweet)
+                    and (self.dedup is None or tweet.tweet_id not in self.dedup)
+                ]
+                delivered = []
+                for tweet in converted:
+                    if self.dedup is not None and tweet.tweet_id in self.dedup:
+                        continue
+                    self._deliver(tweet)
+                    # Only delivered ids are remembered, so a failed poll delivers them later.
+                    if self.dedup is not None:
+                        self.dedup.add(tweet.tweet_id)
+                    delivered.append(tweet)
+        except Exception as exc:
+            state.errors += 1
+            logger.warning(f"Polling {username} failed ({exc}), error {state.errors}")
+            self._reschedule(state, self.min_interval * 2 ** state.errors)
+            return []
+
+        # The mark only moves once the tweets are delivered, so a failed poll is retried.
+        state.polls += 1
+        state.errors = 0
+        if tweets:
+            state.last_tweet_id = max(tweet.tweet_id for tweet in tweets)
+
+        if first_poll and not self.deliver_initial:
+            state.last_poll = now
+            self._reschedule(state, self.min_interval)
+            return []
+
+        self._update_rate(state, len(delivered), now)
+        self._reschedule(state, self.next_interval(state))
+        return delivered
+
+    def _fetch(self, state: AccountState) -> List[LazyTweet]:
+        pages = 1 if state.last_tweet_id is None else self.pages
+        if self.probe:
+            probe = probe_timeline(state.username, address=self.address, session=self.session)
+            if probe is None or not probe.new_tweets(state.last_tweet_id):
+                return []
+            # Only crawl further pages if the new tweets don't fit on the first one.
+            if pages == 1 or probe.reaches(state.last_tweet_id):
+                return probe.parse(state.last_tweet_id, parser=self.parser, lazy=True)
+
+        return list(
+            get_tweets(
+                state.username,
+                pages=pages,
+                since_tweet_id=state.last_tweet_id,
+                address=self.address,
+                session=self.session,
+                parser=self.parser,
+                lazy=True,
+            )
+        )
+
+    def _deliver(self, tweet: Tweet):
+        if self.callback is not None:
+            try:
+                self.callback(tweet)
+            except Exception:
+                logger.exception(f"Watcher callback failed for tweet {tweet.tweet_id}")
+        if self.queue is not None:
+            self.queue.put(tweet)
+
+    def _pop_due(self) -> List[str]:
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            while self._schedule and self._schedule[0][0] <= now:
+                next_poll, username = heapq.heappop(self._schedule)
+                state = self.accounts.get(username)
+                # Skip entries of removed accounts and of accounts scheduled again since.
+                if state is not None and state.next_poll == next_poll:
+                    due.append(username)
+        return due
+
+    def seconds_until_next_poll(self) -> Optional[float]:
+        """Seconds until the next account is due, or None if no account is watched."""
+        with self._lock:
+            if not self._schedule:
+                return None
+            return max(self._schedule[0][0] - time.monotonic(), 0.0)
+
+    def run_pending(self) -> int:
+        """Polls every account that is due.
+
+        Returns:
+            Number of accounts polled.
+        """
+        due = self._pop_due()
+        if due:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="nitter-watch")
+            list(self._pool.map(self.poll, due))
+        return len(due)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            # Cleared before polling, so an add() or stop() made meanwhile isn't missed.
+            self._wakeup.clear()
+            self.run_pending()
+            wait = self.seconds_until_next_poll()
+            self._wakeup.wait(self.max_interval if wait is None else wait)
+
+    def start(self):
+        """Starts polling on a background thread."""
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="nitter-watcher", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: float = None):
+        """Waits for the background thread, which runs until stop() is called."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stop(self):
+        """Stops polling and closes the session if the watcher created it."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self.owns_session:
+            self.session.close()
+
+    def __enter__(self) -> "Watcher":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -22,7 +22,7 @@ def cover(session):
     session.run("coverage", "erase")
 
 
-lint_files = ["nitter_scraper", "tests", "noxfile.py", "examples"]
+lint_files = ["nitter_scraper", "tests", "noxfile.py", "examples", "benchmarks"]
 
 
 @nox.session
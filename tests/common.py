@@ -1,4 +1,7 @@
-from nitter_scraper.paths import TEST_DIRECTORY
+import socket
+
+from nitter_scraper.mock import MockNitter
+from nitter_scraper.paths import DATA_DIRECTORY
 import pytest
 from requests_html import HTML
 
@@ -7,12 +10,25 @@ USERNAME = "dgnsrekt"
 ADDRESS = f"{URL}/{USERNAME}"
 
 
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
 @pytest.fixture
 def profile_page_fixture():
-    test_page_path = TEST_DIRECTORY / "testpage.html"
+    test_page_path = DATA_DIRECTORY / "testpage.html"
 
     assert test_page_path.exists()
 
     with open(test_page_path, mode="r") as file:
         html = HTML(html=file.read(), url=ADDRESS, default_encoding="utf-8")
     return html
+
+
+@pytest.fixture
+def mock_nitter_fixture():
+    """A MockNitter serving the test page for dgnsrekt, with a chain of pages no test exhausts."""
+    with MockNitter(pages=100, usernames=[USERNAME]) as nitter:
+        yield nitter
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+from nitter_scraper.aio import async_get_profile, async_get_tweets, AsyncSession
+from nitter_scraper.archive import PageArchive
+from nitter_scraper.cache import ResponseCache
+from nitter_scraper.checkpoint import CheckpointStore
+from nitter_scraper.tweets import TimelineCrawl
+import pytest
+
+from .common import mock_nitter_fixture, USERNAME  # noqa: F401
+
+
+async def collect(tweets):
+    return [tweet async for tweet in tweets]
+
+
+def test_async_get_tweets_pages(mock_nitter_fixture):  # noqa: F811
+    tweets = asyncio.run(
+        collect(async_get_tweets(USERNAME, pages=2, address=mock_nitter_fixture.address))
+    )
+    assert len(tweets) == 40
+    assert len(mock_nitter_fixture.requests) == 2
+    assert "?cursor=" in mock_nitter_fixture.requests[1]
+
+
+def test_async_get_tweets_limit(mock_nitter_fixture):  # noqa: F811
+    tweets = asyncio.run(
+        collect(async_get_tweets(USERNAME, limit=5, address=mock_nitter_fixture.address))
+    )
+    assert len(tweets) == 5
+    assert len(mock_nitter_fixture.requests) == 1
+
+
+def test_async_get_tweets_checkpoint(mock_nitter_fixture):  # noqa: F811
+    address = mock_nitter_fixture.address
+    store = CheckpointStore()
+
+    first = asyncio.run(
+        collect(async_get_tweets(USERNAME, pages=1, address=address, checkpoint=store))
+    )
+    checkpoint = store.load(f"{address}/{USERNAME}")
+    assert checkpoint.pages == 1
+    assert checkpoint.num_yielded == 20
+
+    rest = asyncio.run(
+        collect(async_get_tweets(USERNAME, pages=2, address=address, checkpoint=store))
+    )
+    assert len(first + rest) == 40
+    assert "?cursor=" in mock_nitter_fixture.requests[1]
+    assert len(mock_nitter_fixture.requests) == 2
+
+
+def test_async_get_tweets_shared_session(mock_nitter_fixture):  # noqa: F811
+    async def run():
+        async with AsyncSession(concurrency=2) as session:
+            coros = [
+                collect(
+                    async_get_tweets(
+                        USERNAME, pages=1, address=mock_nitter_fixture.address, session=session
+                    )
+                )
+                for _ in range(4)
+            ]
+            return await asyncio.gather(*coros)
+
+    results = asyncio.run(run())
+    assert [len(tweets) for tweets in results] == [20, 20, 20, 20]
+
+
+def test_async_get_profile_not_found(mock_nitter_fixture):  # noqa: F811
+    address = mock_nitter_fixture.address
+    assert asyncio.run(async_get_profile("nobody", not_found_ok=True, address=address)) is None
+
+    with pytest.raises(ValueError):
+        asyncio.run(async_get_profile("nobody", address=address))
+
+
+def test_async_parsing_runs_off_the_event_loop(mock_nitter_fixture, monkeypatch):  # noqa: F811
+    threads = []
+    parse_page = TimelineCrawl.parse_page
+
+    def record_thread(self, response):
+        threads.append(threading.current_thread())
+        return parse_page(self, response)
+
+    monkeypatch.setattr(TimelineCrawl, "parse_page", record_thread)
+    address = mock_nitter_fixture.address
+    tweets = asyncio.run(collect(async_get_tweets(USERNAME, pages=2, address=address)))
+
+    assert len(tweets) == 40
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+
+
+def test_async_cache_off_the_loop(mock_nitter_fixture, monkeypatch, tmp_path):  # noqa: F811
+    threads = {}
+
+    def record_thread(cls, name):
+        method = getattr(cls, name)
+
+        def recorded(self, *args, **kwargs):
+            threads[name] = threading.current_thread()
+            return method(self, *args, **kwargs)
+
+        monkeypatch.setattr(cls, name, recorded)
+
+    record_thread(ResponseCache, "get")
+    record_thread(ResponseCache, "set")
+    record_thread(PageArchive, "add")
+
+    async def crawl(address):
+        session = AsyncSession(cache=ResponseCache(), archive=PageArchive(tmp_path))
+        async with session:
+            tweets = async_get_tweets(USERNAME, pages=1, address=address, session=session)
+            return await collect(tweets)
+
+    assert len(asyncio.run(crawl(mock_nitter_fixture.address))) == 20
+    assert sorted(threads) == ["add", "get", "set"]
+    assert threading.main_thread() not in threads.values()
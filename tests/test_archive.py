@@ -0,0 +1,80 @@
+from nitter_scraper.archive import describe_url, mount_replay, PageArchive
+from nitter_scraper.mock import MockNitter
+from nitter_scraper.session import NitterSession
+from nitter_scraper.tweets import get_tweets
+import pytest
+import requests
+
+from .common import closed_port, USERNAME
+
+
+def test_describe_url():
+    assert describe_url(f"http://nitter/{USERNAME}?cursor=page-1") == {
+        "path": f"/{USERNAME}?cursor=page-1",
+        "username": USERNAME,
+        "cursor": "page-1",
+        "kind": "timeline",
+    }
+    assert describe_url("http://nitter/search?f=tweets&q=btc")["kind"] == "search"
+
+
+def test_archive_and_replay_a_crawl(tmp_path):
+    archive = PageArchive(tmp_path)
+    with MockNitter(pages=3) as nitter:
+        with NitterSession(archive=archive) as session:
+            tweets = list(get_tweets(USERNAME, address=nitter.address, session=session))
+        served = requests.get(f"{nitter.address}/{USERNAME}?cursor=page-1").content
+
+    pages = list(archive.pages(username=USERNAME.upper()))
+    assert [page.cursor for page in pages] == [None, "page-1", "page-2"]
+    assert archive.read(pages[1]) == served
+    assert pages[1].length < pages[1].size
+    assert list(archive.pages(since=pages[2].fetched)) == pages[2:]
+    assert list(archive.pages(cursor="page-1")) == [pages[1]]
+    assert list(archive.pages(username=USERNAME, cursor="page-9")) == []
+
+    # Replayed from another address, the crawl makes no request.
+    address = f"http://127.0.0.1:{closed_port()}"
+    with NitterSession() as session:
+        mount_replay(session, archive)
+        assert list(get_tweets(USERNAME, address=address, session=session)) == tweets
+        assert session.get(f"{address}/nobody").status_code == 404
+
+
+def test_archive_indexes(tmp_path):
+    with PageArchive(tmp_path) as archive:
+        rows = archive._db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        indexes = {name for (name,) in rows}
+    assert {f"pages_{column}" for column in ["url", "username", "cursor", "fetched"]} <= indexes
+
+
+def test_archive_segments(tmp_path):
+    with MockNitter(pages=3) as nitter:
+        with PageArchive(tmp_path, segment_bytes=1) as archive:
+            with NitterSession(archive=archive) as session:
+                list(get_tweets(USERNAME, pages=2, address=nitter.address, session=session))
+
+        # A reopened archive keeps the pages and appends new ones.
+        with PageArchive(tmp_path) as archive:
+            with NitterSession(archive=archive) as session:
+                list(get_tweets(USERNAME, pages=1, address=nitter.address, session=session))
+            pages = list(archive.pages())
+            assert len(archive) == 3
+            assert [archive.read(page)[:15] for page in pages] == [b"<!DOCTYPE html>"] * 3
+
+    # One page per full segment, then appended to the last one with room left.
+    names = sorted(path.name for path in tmp_path.glob("segment-*"))
+    assert names == ["segment-000001.gz", "segment-000002.gz"]
+
+
+def test_archive_compressions(tmp_path):
+    with pytest.raises(ValueError):
+        PageArchive(tmp_path, compression="lzma")
+
+    pytest.importorskip("zstandard")
+    with MockNitter(pages=1) as nitter:
+        with PageArchive(tmp_path, compression="zstd") as archive:
+            response = requests.get(f"{nitter.address}/{USERNAME}")
+            page = archive.add(response.url, response)
+            assert page.segment.endswith(".zst")
+            assert archive.read(page) == response.content
@@ -0,0 +1,95 @@
+from nitter_scraper.batches import get_tweets_batches, ListColumn, StringColumn, TweetBatch
+from nitter_scraper.checkpoint import CheckpointStore
+from nitter_scraper.tweets import get_tweets, parse_tweet, timeline_parser
+import pytest
+
+from .common import mock_nitter_fixture, profile_page_fixture, USERNAME  # noqa: F401
+
+
+@pytest.fixture
+def tweet_dicts_fixture(profile_page_fixture):  # noqa: F811
+    timeline = timeline_parser(profile_page_fixture)
+    items = [item for item in timeline.find(".timeline-item")]
+    return [parse_tweet(item) for item in items if "show-more" not in item.attrs["class"]]
+
+
+def test_string_column():
+    column = StringColumn()
+    for value in ["a", "", "ünïcode", "end"]:
+        column.append(value)
+
+    assert len(column) == 4
+    assert list(column) == ["a", "", "ünïcode", "end"]
+    assert column[-1] == "end"
+
+
+def test_list_column():
+    column = ListColumn()
+    for items in [["a", "b"], [], ["c"]]:
+        column.append(items)
+
+    assert len(column) == 3
+    assert list(column) == [["a", "b"], [], ["c"]]
+    assert len(column.values) == 3
+
+
+def test_tweet_batch_matches_tweets(tweet_dicts_fixture):
+    batch = TweetBatch()
+    for data in tweet_dicts_fixture:
+        batch.append(data)
+
+    assert len(batch) == 20
+    rows = batch.to_pylist()
+    for row, data in zip(rows, tweet_dicts_fixture):
+        assert row["tweet_id"] == int(data["tweet_id"])
+        assert row["time"] == int(data["time"].timestamp())
+        assert row["is_pinned"] == data["is_pinned"]
+        assert row["text"] == data["text"]
+        assert row["photos"] == data["entries"]["photos"]
+
+
+def test_tweet_batch_to_arrow(tweet_dicts_fixture):
+    pytest.importorskip("pyarrow")
+    batch = TweetBatch()
+    for data in tweet_dicts_fixture:
+        batch.append(data)
+
+    record_batch = batch.to_arrow()
+    assert record_batch.num_rows == 20
+    assert record_batch.column("urls").to_pylist() == list(batch.urls)
+    assert str(record_batch.schema.field("time").type) == "timestamp[s, tz=UTC]"
+
+
+def test_tweet_batch_missing_time(tweet_dicts_fixture):
+    batch = TweetBatch()
+    batch.append(tweet_dicts_fixture[0])
+    batch.append(dict(tweet_dicts_fixture[1], time=None))
+
+    assert list(batch.time_valid) == [1, 0]
+    rows = batch.to_pylist()
+    assert rows[0]["time"] == int(tweet_dicts_fixture[0]["time"].timestamp())
+    assert rows[1]["time"] is None
+
+    pytest.importorskip("pyarrow")
+    record_batch = batch.to_arrow()
+    assert record_batch.column("time").null_count == 1
+    assert record_batch.column("time").to_pylist()[1] is None
+
+
+def test_get_tweets_batches(mock_nitter_fixture):  # noqa: F811
+    address = mock_nitter_fixture.address
+    expected = [tweet.tweet_id for tweet in get_tweets(USERNAME, pages=2, address=address)]
+
+    batches = list(get_tweets_batches(USERNAME, pages=2, batch_size=15, address=address))
+    assert [len(batch) for batch in batches] == [15, 15, 10]
+    assert [tweet_id for batch in batches for tweet_id in batch.tweet_id] == expected
+
+
+def test_get_tweets_batches_checkpoint(mock_nitter_fixture):  # noqa: F811
+    address = mock_nitter_fixture.address
+    store = CheckpointStore()
+    kwargs = dict(pages=2, batch_size=15, address=address, checkpoint=store)
+
+    batches = list(get_tweets_batches(USERNAME, **kwargs))
+    assert [len(batch) for batch in batches] == [15, 5, 15, 5]
+    assert list(get_tweets_batches(USERNAME, **kwargs)) == []
@@ -0,0 +1,115 @@
+import time
+
+from nitter_scraper.cache import page_kind, ResponseCache
+from nitter_scraper.mock import MockNitter
+from nitter_scraper.retry import fetch
+from nitter_scraper.session import NitterSession
+from nitter_scraper.tweets import get_tweets
+import pytest
+
+from .common import mock_nitter_fixture, USERNAME  # noqa: F401
+
+
+class FakeResponse:
+    def __init__(self, url, content=b"<html></html>"):
+        self.url = url
+        self.status_code = 200
+        self.headers = {"Content-Type": "text/html"}
+        self.encoding = "utf-8"
+        self.content = content
+
+
+def test_page_kind():
+    assert page_kind("https://nitter.net/dgnsrekt") == "timeline"
+    assert page_kind("https://nitter.net/search?f=tweets&q=python") == "search"
+    assert page_kind("https://nitter.net/search?f=tweets&q=python&cursor=abc") == "cursor"
+    assert page_kind("https://nitter.net/dgnsrekt?cursor=abc") == "cursor"
+
+
+def test_key_includes_cookies():
+    assert ResponseCache.key("a") == "a"
+    assert ResponseCache.key("a", {"Cookie": "x="}) != ResponseCache.key("a")
+
+
+def test_memory_tier_lru():
+    cache = ResponseCache(max_entries=2)
+    for url in ["a", "b", "c"]:
+        cache.set(url, FakeResponse(url))
+
+    assert cache.get("a") is None
+    assert cache.get("c").url == "c"
+    assert cache.stats.evictions == 1
+    assert cache.stats.memory_hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_ttl_expires_entries():
+    cache = ResponseCache(ttls={"timeline": 0.05})
+    cache.set("https://nitter.net/dgnsrekt", FakeResponse("https://nitter.net/dgnsrekt"))
+    cache.set("https://nitter.net/dgnsrekt?cursor=a", FakeResponse("cursor"))
+    time.sleep(0.1)
+
+    assert cache.get("https://nitter.net/dgnsrekt") is None
+    assert cache.get("https://nitter.net/dgnsrekt?cursor=a") is not None
+
+
+def test_disk_tier(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = ResponseCache(path=path)
+    cache.set("a", FakeResponse("a", b"<p>cached</p>"))
+    cache.close()
+
+    cache = ResponseCache(path=path)
+    response = cache.get("a")
+    assert response.content == b"<p>cached</p>"
+    assert response.headers["content-type"] == "text/html"
+    assert response.html.find("p", first=True).text == "cached"
+    assert cache.stats.disk_hits == 1
+
+    assert cache.get("a") is response
+    assert cache.stats.memory_hits == 1
+
+
+def test_disk_tier_size_eviction(tmp_path):
+    cache = ResponseCache(path=tmp_path / "cache.sqlite", max_entries=0, max_bytes=25)
+    for url in ["a", "b", "c"]:
+        cache.set(url, FakeResponse(url, b"0123456789"))
+        time.sleep(0.01)
+
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert cache.get("c") is not None
+    assert cache.stats.evictions >= 1
+
+
+@pytest.mark.parametrize("parser", ["requests_html", "lxml"])
+def test_cached_fetches(mock_nitter_fixture, parser):  # noqa: F811
+    address = mock_nitter_fixture.address
+    cache = ResponseCache()
+
+    with NitterSession(cache=cache) as session:
+        kwargs = dict(pages=1, address=address, session=session, parser=parser)
+        first = list(get_tweets(USERNAME, **kwargs))
+        second = list(get_tweets(USERNAME, **kwargs))
+        assert fetch(session, f"{address}/nobody").status_code == 404
+        assert fetch(session, f"{address}/nobody").status_code == 404
+
+    assert first == second
+    assert mock_nitter_fixture.requests == [f"/{USERNAME}", "/nobody", "/nobody"]
+    assert cache.stats.hits == 1
+
+
+def test_rejected_hits_are_fetched_again():
+    cache = ResponseCache()
+    with MockNitter(pages=1, faults=["timeline_none"]) as nitter:
+        with NitterSession(cache=cache) as session:
+            url = f"{nitter.address}/{USERNAME}"
+            assert b"timeline-none" in fetch(session, url).content
+            tweets = list(get_tweets(USERNAME, pages=1, address=nitter.address, session=session))
+            assert tweets
+            assert fetch(session, url) is not None
+
+    assert nitter.stats == {"timeline_none": 1, "ok": 1}
+    assert cache.stats.misses == 2
+    assert cache.stats.hits == 1
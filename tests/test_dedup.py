@@ -0,0 +1,68 @@
+from nitter_scraper.dedup import BloomFilter, LRUSet
+from nitter_scraper.tweets import get_tweets
+import pytest
+
+from .common import mock_nitter_fixture, USERNAME  # noqa: F401
+
+
+def test_lru_set():
+    lru = LRUSet(maxsize=2)
+    assert lru.add(1)
+    assert not lru.add(1)
+    assert lru.add(2)
+    assert lru.add(3)
+    assert 1 not in lru
+    assert len(lru) == 2
+
+
+def test_lru_set_save_and_load(tmp_path):
+    path = tmp_path / "seen.txt"
+    assert len(LRUSet.load(path)) == 0
+
+    lru = LRUSet()
+    lru.update([1, 2, 3])
+    lru.save(path)
+    assert not LRUSet.load(path).add(2)
+    assert list(LRUSet.load(path, maxsize=2)._keys) == [2, 3]
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    added = sum(bloom.add(key) for key in range(1000))
+    assert added > 980  # a few unseen keys may already look seen
+    assert all(key in bloom for key in range(1000))
+    assert not bloom.add(10)
+    assert len(bloom) == added
+
+    false_positives = sum(key in bloom for key in range(1000, 11000))
+    assert false_positives < 300
+
+
+def test_bloom_filter_save_and_load(tmp_path):
+    path = tmp_path / "seen.bloom"
+    bloom = BloomFilter(capacity=100, error_rate=0.05)
+    bloom.update(range(50))
+    bloom.save(path)
+
+    loaded = BloomFilter.load(path)
+    assert (loaded.capacity, loaded.error_rate, len(loaded)) == (100, 0.05, 50)
+    assert all(key in loaded for key in range(50))
+
+
+def test_bloom_filter_error_rate():
+    with pytest.raises(ValueError):
+        BloomFilter(error_rate=1)
+
+
+def test_get_tweets_dedup(mock_nitter_fixture):  # noqa: F811
+    # The local server returns the same page for every cursor.
+    address = mock_nitter_fixture.address
+    assert len(list(get_tweets(USERNAME, pages=2, address=address))) == 40
+    assert len(list(get_tweets(USERNAME, pages=2, address=address, dedup=True))) == 20
+
+
+@pytest.mark.parametrize("seen", [LRUSet(), BloomFilter(capacity=1000)])
+def test_get_tweets_shared_dedup(mock_nitter_fixture, seen):  # noqa: F811
+    address = mock_nitter_fixture.address
+    assert len(list(get_tweets(USERNAME, pages=1, address=address, dedup=seen))) == 20
+    assert list(get_tweets(USERNAME, pages=1, address=address, dedup=seen)) == []
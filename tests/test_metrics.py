@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime
+
+from nitter_scraper.aio import async_get_tweets, AsyncSession
+from nitter_scraper.cache import ResponseCache
+from nitter_scraper.metrics import Histogram, Metrics
+from nitter_scraper.mock import MockNitter
+from nitter_scraper.retry import RetryPolicy
+from nitter_scraper.session import NitterSession
+from nitter_scraper.tweets import get_tweets
+
+from .common import USERNAME
+
+FAST_RETRIES = RetryPolicy(backoff=0, jitter=0)
+
+
+def test_metrics_count_a_crawl():
+    metrics = Metrics()
+    with MockNitter(pages=2, faults=["rate_limit", "error", "timeline_none"]) as nitter:
+        with NitterSession(retry_policy=FAST_RETRIES, metrics=metrics) as session:
+            tweets = list(get_tweets(USERNAME, address=nitter.address, session=session))
+
+    assert len(tweets) == 40
+    host = nitter.address.split("//")[1]
+    assert metrics.requests.get(host=host) == 5
+    assert metrics.responses.get(status="200") == 3
+    assert metrics.responses.get(status="429") == 1
+    assert metrics.retries.get(reason="429") == 1
+    assert metrics.retries.get(reason="invalid") == 1
+    assert metrics.retries.total() == 3
+    assert metrics.pages.total() == 2
+    assert metrics.tweets.get(outcome="yielded") == 40
+    assert metrics.fetch_seconds.count == 5
+    assert metrics.parse_seconds.count == 2
+
+
+def test_metrics_tweet_outcomes():
+    metrics = Metrics()
+    until_time = datetime(2020, 8, 1)
+    with MockNitter(pages=2) as nitter:
+        with NitterSession(metrics=metrics) as session:
+            address = nitter.address
+            tweets = list(
+                get_tweets(USERNAME, until_time=until_time, address=address, session=session)
+            )
+
+    outcomes = {labels[0][1]: value for labels, value in metrics.tweets.values.items()}
+    assert outcomes["yielded"] == len(tweets)
+    assert outcomes["too_new"] > 0
+    assert sum(outcomes.values()) == 40
+
+
+def test_metrics_cached_responses():
+    metrics = Metrics()
+    with MockNitter(pages=1) as nitter:
+        with NitterSession(cache=ResponseCache(), metrics=metrics) as session:
+            for _ in range(2):
+                list(get_tweets(USERNAME, address=nitter.address, session=session))
+
+    assert metrics.responses.get(status="cached") == 1
+    assert metrics.requests.total() == 1
+    assert metrics.tweets.get(outcome="yielded") == 40
+
+
+def test_metrics_async_crawl():
+    metrics = Metrics()
+
+    async def crawl(address):
+        async with AsyncSession(metrics=metrics) as session:
+            return [t async for t in async_get_tweets(USERNAME, address=address, session=session)]
+
+    with MockNitter(pages=3) as nitter:
+        tweets = asyncio.run(crawl(nitter.address))
+
+    assert len(tweets) == 60
+    assert metrics.requests.total() == 3
+    assert metrics.pages.total() == 3
+    assert metrics.tweets.get(outcome="yielded") == 60
+
+
+def test_histogram_buckets():
+    histogram = Histogram("latency_seconds", "Latency.", buckets=[0.1, 1.0])
+    for value in [0.05, 0.1, 0.5, 2.0]:
+        histogram.observe(value)
+
+    assert [sample[2] for sample in histogram.samples()] == [2, 3, 4, 2.65, 4]
+
+
+def test_to_prometheus():
+    metrics = Metrics(buckets=[0.5])
+    metrics.on_retry("http://nitter/u", 1, 0.0, "503")
+    metrics.on_retry("http://nitter/u", 2, 0.0, "503")
+    metrics.on_page_parsed(1, 20, 0.25)
+
+    text = metrics.to_prometheus()
+    assert "# TYPE nitter_retries_total counter\n" in text
+    assert 'nitter_retries_total{reason="503"} 2\n' in text
+    assert "# TYPE nitter_parse_seconds histogram\n" in text
+    assert 'nitter_parse_seconds_bucket{le="0.5"} 1\n' in text
+    assert 'nitter_parse_seconds_bucket{le="+Inf"} 1\n' in text
+    assert "nitter_parse_seconds_sum 0.25\n" in text
+    assert "nitter_parse_seconds_count 1\n" in text
@@ -0,0 +1,76 @@
+from nitter_scraper.mock import MockNitter, recorded_page
+from nitter_scraper.profile import get_profile
+from nitter_scraper.retry import RetryPolicy
+from nitter_scraper.session import NitterSession
+from nitter_scraper.tweets import get_tweets
+import pytest
+import requests
+
+from .common import USERNAME
+
+FAST_RETRIES = RetryPolicy(max_retries=5, backoff=0, jitter=0)
+
+
+def test_mock_nitter_timeline_pagination():
+    with MockNitter(pages=3) as nitter:
+        tweets = list(get_tweets(USERNAME, pages=10, address=nitter.address))
+
+    assert len(tweets) == 60
+    assert nitter.requests == [
+        f"/{USERNAME}",
+        f"/{USERNAME}?cursor=page-1",
+        f"/{USERNAME}?cursor=page-2",
+    ]
+    assert nitter.stats == {"ok": 3}
+
+
+def test_mock_nitter_search_keeps_query():
+    with MockNitter(pages=2) as nitter:
+        tweets = list(get_tweets(search="bitcoin", pages=10, address=nitter.address))
+
+    assert len(tweets) == 40
+    assert nitter.requests == [
+        "/search?f=tweets&q=bitcoin",
+        "/search?f=tweets&q=bitcoin&cursor=page-1",
+    ]
+
+
+def test_mock_nitter_profile_and_missing_user():
+    # The banner url of the recorded page is not understood by parse_user_id_from_banner.
+    page = recorded_page().replace(b'class="profile-banner"', b'class="banner"')
+    with MockNitter(page=page, usernames=[USERNAME]) as nitter:
+        assert requests.get(nitter.address).status_code == 200
+        assert get_profile(USERNAME, address=nitter.address).username == "DGNSREKT"
+        assert get_profile("someone_else", not_found_ok=True, address=nitter.address) is None
+
+    assert nitter.stats == {"home": 1, "ok": 1, "not_found": 1}
+
+
+def test_mock_nitter_faults_are_retried():
+    faults = ["rate_limit", "error", "timeline_none"]
+    with MockNitter(pages=1, faults=faults) as nitter:
+        with NitterSession(retry_policy=FAST_RETRIES) as session:
+            tweets = list(get_tweets(USERNAME, address=nitter.address, session=session))
+
+    assert len(tweets) == 20
+    assert nitter.stats == {"rate_limit": 1, "error": 1, "timeline_none": 1, "ok": 1}
+
+
+def test_mock_nitter_seeded_rates_repeat():
+    def run():
+        options = dict(pages=5, error_rate=0.2, rate_limit_rate=0.2, timeline_none_rate=0.2)
+        with MockNitter(seed=7, **options) as nitter:
+            with NitterSession(retry_policy=FAST_RETRIES.copy(update={"max_retries": 20})) as s:
+                address = nitter.address
+                list(get_tweets(USERNAME, address=address, session=s, parser="lxml"))
+        return nitter.stats
+
+    stats = run()
+    assert stats["ok"] == 5
+    assert stats["error"] + stats["rate_limit"] + stats["timeline_none"] > 0
+    assert run() == stats
+
+
+def test_mock_nitter_rejects_unknown_faults():
+    with pytest.raises(ValueError):
+        MockNitter(faults=["boom"])
@@ -0,0 +1,270 @@
+from nitter_scraper.nitter import DockerBase, Nitter, NitterPool, Redis, redis_cache
+from nitter_scraper.retry import RetryPolicy
+from nitter_scraper.session import NitterSession
+import pytest
+import requests
+
+from .common import closed_port, mock_nitter_fixture, USERNAME  # noqa: F401
+
+
+@pytest.fixture
+def pool_fixture(mock_nitter_fixture):  # noqa: F811
+    ports = [mock_nitter_fixture.port, closed_port()]
+    session = NitterSession(retry_policy=RetryPolicy(max_retries=0))
+    yield NitterPool.from_ports(
+        host="127.0.0.1", ports=ports, session=session, health_check_interval=None
+    )
+    session.close()
+
+
+def test_is_healthy(mock_nitter_fixture):  # noqa: F811
+    assert Nitter(host="127.0.0.1", port=mock_nitter_fixture.port).is_healthy()
+    assert not Nitter(host="127.0.0.1", port=closed_port()).is_healthy(timeout=0.5)
+
+
+def test_wait_until_ready(mock_nitter_fixture):  # noqa: F811
+    Nitter(host="127.0.0.1", port=mock_nitter_fixture.port).wait_until_ready(timeout=1)
+
+    with pytest.raises(TimeoutError):
+        Nitter(host="127.0.0.1", port=closed_port()).wait_until_ready(timeout=0.3)
+
+
+def test_pool_round_robin():
+    pool = NitterPool.from_ports(host="127.0.0.1", ports=[1, 2, 3])
+    assert [pool.choose().port for _ in range(4)] == [1, 2, 3, 1]
+
+    pool.healthy[2] = False
+    assert [pool.choose().port for _ in range(3)] == [3, 1, 3]
+
+
+def test_pool_least_loaded():
+    pool = NitterPool.from_ports(host="127.0.0.1", ports=[1, 2, 3], strategy="least_loaded")
+    pool.load.update({1: 3, 2: 1, 3: 2})
+    assert pool.choose().port == 2
+
+    with pytest.raises(ValueError):
+        NitterPool.from_ports(ports=[1], strategy="random")
+
+
+def test_pool_without_healthy_instances():
+    pool = NitterPool.from_ports(host="127.0.0.1", ports=[1])
+    pool.healthy[1] = False
+    with pytest.raises(RuntimeError):
+        pool.choose()
+
+
+def test_pool_health_check(pool_fixture, mock_nitter_fixture):  # noqa: F811
+    alive, dead = [instance.port for instance in pool_fixture.instances]
+    assert pool_fixture.check_health(timeout=0.5) == {alive: True, dead: False}
+
+    tweets = list(pool_fixture.get_tweets(USERNAME, pages=1))
+    tweets += list(pool_fixture.get_tweets(USERNAME, pages=1))
+    assert len(tweets) == 40
+    assert mock_nitter_fixture.requests == ["/", f"/{USERNAME}", f"/{USERNAME}"]
+    assert pool_fixture.load == {alive: 0, dead: 0}
+
+
+def test_pool_connection_error_marks_unhealthy(pool_fixture):
+    dead = pool_fixture.instances[1]
+    pool_fixture.choose()
+
+    with pytest.raises(requests.ConnectionError):
+        pool_fixture.get_profile("nobody", not_found_ok=True)
+
+    assert pool_fixture.healthy[dead.port] is False
+    assert pool_fixture.get_profile("nobody", not_found_ok=True) is None
+
+
+class FakeContainer:
+    def __init__(self, name, labels=None):
+        self.name = name
+        self.labels = labels or {}
+        self.short_id = "abc123"
+        self.stopped = False
+
+    def stop(self, timeout=None):
+        self.stopped = True
+
+
+class FakeNetworks:
+    def __init__(self):
+        self.created = []
+
+    def list(self, names):
+        return [name for name in names if name in self.created]
+
+    def create(self, name, driver):
+        self.created.append(name)
+
+
+class FakeContainers:
+    def __init__(self):
+        self.runs = []
+        self.running = []
+
+    def list(self, filters):
+        running = [container for container in self.running if not container.stopped]
+        if "label" in filters:
+            key, value = filters["label"].split("=")
+            return [container for container in running if container.labels.get(key) == value]
+        name = filters["name"].strip("^$")
+        return [container for container in running if container.name == name]
+
+    def run(self, **kwargs):
+        self.runs.append(kwargs)
+        container = FakeContainer(kwargs.get("name", "nitter"), kwargs.get("labels"))
+        self.running.append(container)
+        return container
+
+
+class FakeDockerClient:
+    def __init__(self):
+        self.networks = FakeNetworks()
+        self.containers = FakeContainers()
+
+    def ping(self):
+        return True
+
+
+def test_render_config_without_redis():
+    config = Nitter(host="0.0.0.0", port=8080)._render_config()
+    assert '#redisHost = "nitter_redis"' in config
+    assert "listMinutes = 240" in config
+    assert "redisConnections = 20" in config
+
+
+def test_render_config_with_redis():
+    nitter = Nitter(host="0.0.0.0", port=8080, redis_host="cache", redis_port=6380, rss_minutes=5)
+    config = nitter._render_config()
+    assert 'redisHost = "cache"\nredisPort = 6380\n' in config
+    assert "rssMinutes = 5" in config
+
+
+def test_redis_cache_settings():
+    with redis_cache() as cache:
+        assert cache == {}
+
+    with redis_cache(redis_host="10.0.0.2", redis_port=6380) as cache:
+        assert cache == {"redis_host": "10.0.0.2", "redis_port": 6380, "network": None}
+
+
+def test_redis_cache_sidecar(monkeypatch):
+    client = FakeDockerClient()
+    monkeypatch.setattr(DockerBase, "client", client)
+
+    with redis_cache(redis=True) as cache:
+        assert cache == {
+            "redis_host": "nitter_redis",
+            "redis_port": 6379,
+            "network": "nitter_scraper",
+        }
+        assert client.networks.created == ["nitter_scraper"]
+        assert client.containers.runs[0]["network"] == "nitter_scraper"
+        assert client.containers.runs[0]["name"] == "nitter_redis"
+
+
+def test_config_key():
+    nitter = Nitter(host="0.0.0.0", port=8080)
+    assert nitter.config_key() == Nitter(host="0.0.0.0", port=8080).config_key()
+    assert nitter.config_key() != Nitter(host="0.0.0.0", port=8081).config_key()
+    assert nitter.config_key() != Nitter(host="0.0.0.0", port=8080, rss_minutes=5).config_key()
+
+
+def test_start_reuses_running_container(monkeypatch):
+    client = FakeDockerClient()
+    monkeypatch.setattr(DockerBase, "client", client)
+
+    first = Nitter(host="0.0.0.0", port=8080, reuse=True)
+    first.start(wait=False)
+    first.stop()
+    assert first.container.stopped is False
+    assert first.container.labels["nitter_scraper.config"] == first.config_key()
+    assert first.config_path.read_text() == first._render_config()
+
+    second = Nitter(host="0.0.0.0", port=8080, reuse=True)
+    second.start(wait=False)
+    assert second.container is first.container
+    assert len(client.containers.runs) == 1
+
+    other = Nitter(host="0.0.0.0", port=8081, reuse=True)
+    other.start(wait=False)
+    assert len(client.containers.runs) == 2
+
+    second.stop(force=True)
+    assert first.container.stopped is True
+
+
+def test_start_without_reuse(monkeypatch):
+    client = FakeDockerClient()
+    monkeypatch.setattr(DockerBase, "client", client)
+
+    for _ in range(2):
+        nitter = Nitter(host="0.0.0.0", port=8080)
+        nitter.start(wait=False)
+        nitter.stop()
+        assert nitter.container.stopped is True
+
+    assert len(client.containers.runs) == 2
+
+
+def test_redis_cache_reuse(monkeypatch):
+    client = FakeDockerClient()
+    monkeypatch.setattr(DockerBase, "client", client)
+
+    for _ in range(2):
+        with redis_cache(redis=True, reuse=True):
+            pass
+
+    assert len(client.containers.runs) == 1
+    assert client.containers.running[0].stopped is False
+
+
+def test_failed_start_stops_the_container(monkeypatch):
+    client = FakeDockerClient()
+    monkeypatch.setattr(DockerBase, "client", client)
+
+    nitter = Nitter(host="127.0.0.1", port=closed_port(), startup_timeout=0.3)
+    with pytest.raises(TimeoutError):
+        nitter.start()
+    assert client.containers.running[0].stopped is True
+    assert nitter.container is None
+
+
+def test_failed_pool_start_stops_every_container(monkeypatch, mock_nitter_fixture):  # noqa: F811
+    client = FakeDockerClient()
+    monkeypatch.setattr(DockerBase, "client", client)
+
+    ports = [mock_nitter_fixture.port, closed_port()]
+    pool = NitterPool.from_ports(
+        host="127.0.0.1",
+        ports=ports,
+        nitter_options={"startup_timeout": 0.3},
+        health_check_interval=None,
+    )
+    with pytest.raises(TimeoutError):
+        pool.start()
+    assert [container.stopped for container in client.containers.running] == [True, True]
+
+
+def test_redis_never_stops_a_container_it_did_not_start(monkeypatch):
+    client = FakeDockerClient()
+    monkeypatch.setattr(DockerBase, "client", client)
+    other_job = FakeContainer("nitter_redis")
+    client.containers.running.append(other_job)
+
+    with redis_cache(redis=True, reuse=True):
+        pass
+    assert other_job.stopped is False
+    assert client.containers.runs == []
+
+    redis = Redis(reuse=True)
+    redis.start()
+    redis.stop(force=True)
+    assert other_job.stopped is False
+
+    redis = Redis()
+    redis.start()
+    assert redis.container is not other_job
+    redis.stop()
+    assert redis.container.stopped is True
+    assert other_job.stopped is False
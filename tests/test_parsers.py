@@ -0,0 +1,63 @@
+from nitter_scraper.parsers import compile_selector, get_backend, LxmlBackend, LxmlElement
+from nitter_scraper.paths import DATA_DIRECTORY
+from nitter_scraper.profile import html_parser
+from nitter_scraper.tweets import get_tweets, pagination_parser, parse_tweet, timeline_parser
+import pytest
+
+from .common import mock_nitter_fixture, profile_page_fixture, URL, USERNAME  # noqa: F401
+
+
+@pytest.fixture
+def lxml_page_fixture():
+    return get_backend("lxml").parse((DATA_DIRECTORY / "testpage.html").read_bytes())
+
+
+def test_get_backend():
+    assert isinstance(get_backend("lxml"), LxmlBackend)
+    assert get_backend(get_backend("lxml")) is get_backend("lxml")
+
+    with pytest.raises(ValueError):
+        get_backend("nope")
+
+
+def test_compile_selector_is_cached():
+    assert compile_selector(".tweet-link") is compile_selector(".tweet-link")
+
+
+def test_lxml_find(lxml_page_fixture):
+    timeline = timeline_parser(lxml_page_fixture)
+    assert isinstance(timeline, LxmlElement)
+    assert timeline.find(".does-not-exist", first=True) is None
+    assert timeline.find(".does-not-exist") == []
+
+
+def test_lxml_timeline_matches(profile_page_fixture, lxml_page_fixture):  # noqa: F811
+    expected = timeline_parser(profile_page_fixture)
+    timeline = timeline_parser(lxml_page_fixture)
+
+    assert timeline.text == expected.text
+    assert pagination_parser(timeline, URL, USERNAME) == pagination_parser(expected, URL, USERNAME)
+
+    expected_items = expected.find(".timeline-item")
+    items = timeline.find(".timeline-item")
+    assert len(items) == len(expected_items) == 20
+
+    for item, expected_item in zip(items, expected_items):
+        assert item.attrs == expected_item.attrs
+        assert parse_tweet(item) == parse_tweet(expected_item)
+
+
+def test_lxml_profile_matches(profile_page_fixture, lxml_page_fixture):  # noqa: F811
+    expected = html_parser(profile_page_fixture)
+    elements = html_parser(lxml_page_fixture)
+
+    assert elements.keys() == expected.keys()
+    assert {k: v.text for k, v in elements.items()} == {k: v.text for k, v in expected.items()}
+    assert {k: v.links for k, v in elements.items()} == {k: v.links for k, v in expected.items()}
+
+
+def test_get_tweets_with_lxml(mock_nitter_fixture):  # noqa: F811
+    address = mock_nitter_fixture.address
+    expected = list(get_tweets(USERNAME, pages=1, address=address))
+    tweets = list(get_tweets(USERNAME, pages=1, address=address, parser="lxml"))
+    assert tweets == expected
@@ -0,0 +1,46 @@
+from nitter_scraper.mock import MockNitter
+from nitter_scraper.parsers import get_backend
+from nitter_scraper.paths import DATA_DIRECTORY
+from nitter_scraper.probe import probe_timeline, scan_timeline
+from nitter_scraper.retry import RetryPolicy
+from nitter_scraper.session import NitterSession
+from nitter_scraper.tweets import get_tweets, parse_tweet, timeline_parser
+
+from .common import USERNAME
+
+PAGE = (DATA_DIRECTORY / "testpage.html").read_bytes()
+MARK = 1291108608910991366
+
+
+def test_scan_timeline_matches_parse_tweet():
+    timeline = timeline_parser(get_backend("lxml").parse(PAGE))
+    items = [item for item in timeline.find(".timeline-item")]
+    expected = [parse_tweet(item) for item in items if "show-more" not in item.attrs["class"]]
+
+    stubs = scan_timeline(PAGE)
+    assert len(stubs) == len(expected) == 20
+    for stub, tweet_data in zip(stubs, expected):
+        assert stub.tweet_id == int(tweet_data["tweet_id"])
+        assert stub.username == tweet_data["username"]
+        assert stub.time == tweet_data["time"]
+        assert stub.is_pinned == tweet_data["is_pinned"]
+        assert stub.is_retweet == tweet_data["is_retweet"]
+
+
+def test_probe_timeline():
+    with MockNitter(pages=2) as nitter:
+        probe = probe_timeline(USERNAME, address=nitter.address)
+        expected = list(get_tweets(USERNAME, pages=1, since_tweet_id=MARK, address=nitter.address))
+
+    assert probe.latest_tweet_id == 1291835605643599878
+    assert [stub.tweet_id for stub in probe.new_tweets(MARK)] == [1291835605643599878]
+    assert probe.new_tweets(probe.latest_tweet_id) == []
+    assert probe.reaches(MARK)
+    assert not probe.reaches(1)
+    assert probe.parse(since_tweet_id=MARK) == expected
+
+
+def test_probe_timeline_without_a_timeline():
+    with MockNitter(faults=["timeline_none"]) as nitter:
+        with NitterSession(retry_policy=RetryPolicy(max_retries=0)) as session:
+            assert probe_timeline(USERNAME, address=nitter.address, session=session) is None
@@ -1,14 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from nitter_scraper.mock import MockNitter, recorded_page
 from nitter_scraper.profile import (
     html_parser,
     parse_user_id_from_banner,
+    profile_exists,
     profile_parser,
+    ProfileCache,
     stat_cleaner,
     username_cleaner,
 )
+from nitter_scraper.retry import RetryPolicy
+from nitter_scraper.schema import Profile
+from nitter_scraper.session import NitterSession
 import pytest
 from pytest_regressions import data_regression  # noqa: F401
 
-from .common import profile_page_fixture  # noqa: F401
+from .common import profile_page_fixture, USERNAME  # noqa: F401
+
+PAGE = recorded_page()
 
 
 @pytest.mark.parametrize(
@@ -43,3 +54,75 @@ def test_profile_parser(data_regression, profile_page_fixture):  # noqa: F811
     elements = html_parser(profile_page_fixture)
     results = profile_parser(elements)
     data_regression.check(results)
+
+
+def test_profile_from_dict_without_validation(profile_page_fixture):  # noqa: F811
+    elements = html_parser(profile_page_fixture)
+    elements.pop("banner_photo", None)
+    elements = profile_parser(elements)
+    elements["user_id"] = "2474416796"
+
+    profile = Profile.from_dict(elements, validate=False)
+    assert profile == Profile.from_dict(elements)
+    assert profile.user_id == 2474416796
+
+
+def test_profile_exists():
+    with MockNitter(page=PAGE, usernames=[USERNAME]) as nitter:
+        assert profile_exists(USERNAME, address=nitter.address)
+        assert not profile_exists("someone_else", address=nitter.address)
+
+
+def test_profile_cache_hits_and_negative_entries():
+    cache = ProfileCache()
+    with MockNitter(page=PAGE, usernames=[USERNAME]) as nitter:
+        with NitterSession() as session:
+            options = dict(address=nitter.address, session=session)
+            profile = cache.get(USERNAME, **options)
+            assert cache.get(f"@{USERNAME.upper()}", **options) == profile
+            assert cache.exists(USERNAME, **options)
+
+            assert not cache.exists("someone_else", **options)
+            assert cache.get("someone_else", not_found_ok=True, **options) is None
+            with pytest.raises(ValueError):
+                cache.get("someone_else", **options)
+
+    assert len(nitter.requests) == 2
+    assert cache.stats.misses == 2
+    assert cache.stats.hits == 4
+
+
+def test_profile_cache_ttl_and_size():
+    cache = ProfileCache(ttl=0.05, max_entries=1)
+    with MockNitter(page=PAGE) as nitter:
+        assert cache.exists("first", address=nitter.address)
+        time.sleep(0.1)
+        assert cache.exists("first", address=nitter.address)
+        assert cache.exists("second", address=nitter.address)
+        assert cache.exists("first", address=nitter.address)
+
+    assert len(nitter.requests) == 4
+    assert cache.stats.evictions == 2
+
+
+def test_profile_cache_skips_server_errors():
+    cache = ProfileCache()
+    with MockNitter(page=PAGE, faults=["error"]) as nitter:
+        with NitterSession(retry_policy=RetryPolicy(max_retries=0)) as session:
+            assert not cache.exists(USERNAME, address=nitter.address, session=session)
+            assert cache.exists(USERNAME, address=nitter.address, session=session)
+
+
+def test_profile_cache_single_flight():
+    cache = ProfileCache()
+    with MockNitter(page=PAGE, latency=0.2) as nitter:
+        with ThreadPoolExecutor(8) as executor:
+            lookups = [
+                executor.submit(cache.get, USERNAME, address=nitter.address) for _ in range(8)
+            ]
+            profiles = [lookup.result() for lookup in lookups]
+
+    assert len(nitter.requests) == 1
+    assert all(profile == profiles[0] for profile in profiles)
+    assert cache.stats.misses == 1
+    assert cache.stats.shared + cache.stats.hits == 7
@@ -0,0 +1,132 @@
+import asyncio
+
+from nitter_scraper.cache import ResponseCache
+from nitter_scraper.retry import async_fetch, fetch, RateLimiter, RetryPolicy, TokenBucket
+import pytest
+import requests
+
+NO_WAIT = RetryPolicy(backoff=0, jitter=0, max_elapsed=None)
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, valid=True):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.valid = valid
+
+
+class FakeSession:
+    """Returns, or raises, the scripted results one after the other."""
+
+    def __init__(self, *results, retry_policy=None):
+        self.results = list(results)
+        self.calls = 0
+        self.retry_policy = retry_policy
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class FakeAsyncSession(FakeSession):
+    async def get(self, url, **kwargs):
+        return super().get(url, **kwargs)
+
+
+def test_backoff_grows_exponentially():
+    policy = RetryPolicy(backoff=0.5, backoff_factor=2, max_backoff=3, jitter=0)
+    assert [policy.delay(attempt) for attempt in range(4)] == [0.5, 1.0, 2.0, 3.0]
+
+
+def test_backoff_jitter():
+    policy = RetryPolicy(backoff=1, jitter=0.5)
+    delays = [policy.delay(0) for _ in range(50)]
+    assert all(0.5 <= delay <= 1 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_status_rules():
+    policy = RetryPolicy(jitter=0, status_backoff={429: 10})
+    assert policy.should_retry(FakeResponse(503))
+    assert policy.should_retry(FakeResponse(429))
+    assert not policy.should_retry(FakeResponse(404))
+    assert policy.should_retry(FakeResponse(200), valid=False)
+    assert not RetryPolicy(retry_invalid=False).should_retry(FakeResponse(200), valid=False)
+    assert policy.delay(0, FakeResponse(429)) == 10
+    assert policy.delay(0, FakeResponse(503, {"Retry-After": "2"})) == 2
+
+
+def test_give_up_after_max_elapsed():
+    policy = RetryPolicy(max_elapsed=1)
+    assert policy.give_up(0, started=0, delay=0)
+    assert RetryPolicy(max_retries=2).give_up(2, started=0, delay=0)
+
+
+def test_fetch_retries_until_success():
+    session = FakeSession(FakeResponse(503), requests.ConnectionError(), FakeResponse(200))
+    response = fetch(session, "http://nitter", retry_policy=NO_WAIT)
+    assert response.status_code == 200
+    assert session.calls == 3
+
+
+def test_fetch_does_not_retry_not_found():
+    session = FakeSession(FakeResponse(404), FakeResponse(200))
+    assert fetch(session, "http://nitter", retry_policy=NO_WAIT).status_code == 404
+    assert session.calls == 1
+
+
+def test_fetch_uses_session_policy_and_validator():
+    policy = NO_WAIT.copy(update={"max_retries": 1})
+    responses = [FakeResponse(200, valid=False) for _ in range(3)]
+    session = FakeSession(*responses, retry_policy=policy)
+    assert fetch(session, "http://nitter", validate=lambda response: response.valid) is None
+    assert session.calls == 2
+
+
+def test_fetch_raises_last_error():
+    session = FakeSession(requests.ConnectionError(), requests.ConnectionError())
+    with pytest.raises(requests.ConnectionError):
+        fetch(session, "http://nitter", retry_policy=NO_WAIT.copy(update={"max_retries": 1}))
+
+
+def test_async_fetch_retries_until_success():
+    session = FakeAsyncSession(FakeResponse(502), FakeResponse(200))
+    response = asyncio.run(async_fetch(session, "http://nitter", retry_policy=NO_WAIT))
+    assert response.status_code == 200
+    assert session.calls == 2
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=10, burst=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0, 0]
+    assert waits[2] == pytest.approx(0.1, abs=0.01)
+    assert waits[3] == pytest.approx(0.2, abs=0.01)
+
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_rate_limiter_buckets_per_host():
+    limiter = RateLimiter(rate=10, host_rates={"nitter.net": 1})
+    assert limiter.bucket("https://nitter.net/a") is limiter.bucket("https://nitter.net/b")
+    assert limiter.bucket("https://nitter.net/a").rate == 1
+    assert limiter.bucket("http://127.0.0.1:8080/a").rate == 10
+
+
+def test_fetch_validates_each_response_once():
+    checked = []
+
+    def validate(response):
+        checked.append(response)
+        return response.valid
+
+    cache = ResponseCache()
+    session = FakeSession(FakeResponse(200, valid=False), FakeResponse(200))
+    response = fetch(session, "nitter", retry_policy=NO_WAIT, validate=validate, cache=cache)
+    assert response.valid
+    assert len(checked) == 2
+    assert cache.stats.stores == 1
@@ -0,0 +1,32 @@
+from nitter_scraper.profile import get_profile
+from nitter_scraper.session import NitterSession, preference_cookies
+from nitter_scraper.tweets import get_tweets
+from nitter_scraper.utils import user_exists
+
+from .common import mock_nitter_fixture, USERNAME  # noqa: F401
+
+
+def test_preference_cookies():
+    assert "replaceTwitter" not in preference_cookies()
+    assert preference_cookies(original_urls=True).endswith(
+        "autoplayGifs=; replaceTwitter=; replaceYouTube=; replaceReddit="
+    )
+
+
+def test_session_sets_cookies_once():
+    with NitterSession(original_urls=True) as session:
+        assert session.headers["Cookie"] == preference_cookies(original_urls=True)
+
+
+def test_shared_session_reuses_connections(mock_nitter_fixture):  # noqa: F811
+    address = mock_nitter_fixture.address
+
+    with NitterSession() as session:
+        for _ in range(3):
+            assert not user_exists("nobody", address=address, session=session)
+            profile = get_profile("nobody", not_found_ok=True, address=address, session=session)
+            assert profile is None
+            list(get_tweets(USERNAME, pages=1, address=address, session=session))
+
+    assert len(mock_nitter_fixture.requests) == 9
+    assert len(mock_nitter_fixture.connections) == 1
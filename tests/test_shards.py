@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+
+from nitter_scraper.mock import MockNitter
+from nitter_scraper.retry import RetryPolicy
+from nitter_scraper.session import NitterSession
+from nitter_scraper.shards import get_tweets_sharded, shard_window
+from nitter_scraper.tweets import get_tweets
+import pytest
+import requests
+
+from .common import closed_port
+
+SINCE = datetime(2020, 7, 1)
+UNTIL = datetime(2020, 8, 10, 12)
+
+
+def test_shard_window():
+    shards = shard_window(datetime(2020, 8, 1, 6), datetime(2020, 8, 3, 12))
+    utc = timezone.utc
+    assert shards == [
+        (datetime(2020, 8, 3, tzinfo=utc), datetime(2020, 8, 3, 12, tzinfo=utc)),
+        (datetime(2020, 8, 2, tzinfo=utc), datetime(2020, 8, 3, tzinfo=utc)),
+        (datetime(2020, 8, 1, 6, tzinfo=utc), datetime(2020, 8, 2, tzinfo=utc)),
+    ]
+
+    assert len(shard_window(SINCE, UNTIL, timedelta(days=7))) == 6
+
+
+@pytest.mark.parametrize("shard", [timedelta(hours=1), timedelta(days=1, hours=1), timedelta(0)])
+def test_shard_window_needs_whole_days(shard):
+    with pytest.raises(ValueError):
+        shard_window(SINCE, UNTIL, shard)
+
+
+def test_get_tweets_sharded_time_order():
+    with MockNitter(pages=1) as nitter:
+        expected = list(
+            get_tweets(search="btc", since_time=SINCE, until_time=UNTIL, address=nitter.address)
+        )
+        tweets = list(
+            get_tweets_sharded(
+                "btc", SINCE, UNTIL, shard=timedelta(days=7), pages=1, address=nitter.address
+            )
+        )
+        num_shards = len(shard_window(SINCE, UNTIL, timedelta(days=7)))
+        assert len(nitter.requests) == 1 + num_shards
+
+    assert sorted(t.tweet_id for t in tweets) == sorted(t.tweet_id for t in expected)
+    # Shards come newest first, the tweets of a shard in page order.
+    shards = shard_window(SINCE, UNTIL, timedelta(days=7))
+    indexes = [
+        next(index for index, (start, end) in enumerate(shards) if start <= tweet.time <= end)
+        for tweet in tweets
+    ]
+    assert indexes == sorted(indexes)
+
+
+def test_get_tweets_sharded_drops_boundary_duplicates():
+    # Every shard gets the same page, only the first shard to find a tweet yields it.
+    with MockNitter(pages=2) as nitter:
+        tweets = list(
+            get_tweets_sharded(
+                "btc", SINCE, UNTIL, order="arrival", address=nitter.address, parser="lxml"
+            )
+        )
+    ids = [tweet.tweet_id for tweet in tweets]
+    assert len(ids) == len(set(ids)) > 0
+
+
+def test_get_tweets_sharded_limit():
+    with MockNitter(pages=1) as nitter:
+        tweets = list(
+            get_tweets_sharded("btc", SINCE, UNTIL, pages=1, limit=3, address=nitter.address)
+        )
+    assert len(tweets) == 3
+
+
+def test_get_tweets_sharded_raises_shard_errors():
+    address = f"http://127.0.0.1:{closed_port()}"
+    with NitterSession(retry_policy=RetryPolicy(max_retries=0)) as session:
+        with pytest.raises(requests.ConnectionError):
+            list(get_tweets_sharded("btc", SINCE, UNTIL, address=address, session=session))
@@ -0,0 +1,128 @@
+import csv
+import gzip
+import json
+
+from nitter_scraper.schema import Tweet
+from nitter_scraper.sinks import CSVSink, JSONLSink, ParquetSink, Sink
+from nitter_scraper.tweets import parse_tweet, timeline_parser
+import pytest
+
+from .common import profile_page_fixture  # noqa: F401
+
+
+@pytest.fixture
+def tweets_fixture(profile_page_fixture):  # noqa: F811
+    timeline = timeline_parser(profile_page_fixture)
+    items = [item for item in timeline.find(".timeline-item")]
+    return [
+        Tweet.from_dict(parse_tweet(item))
+        for item in items
+        if "show-more" not in item.attrs["class"]
+    ]
+
+
+def test_jsonl_sink_matches_pydantic(tmp_path, tweets_fixture):
+    with JSONLSink(tmp_path / "tweets.jsonl", batch_size=7) as sink:
+        assert sink.write_all(tweets_fixture) == 20
+
+    lines = (tmp_path / "tweets.jsonl").read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [json.loads(t.json()) for t in tweets_fixture]
+    assert sink.files == [tmp_path / "tweets.jsonl"]
+
+
+def test_jsonl_sink_buffers(tmp_path, tweets_fixture):
+    sink = JSONLSink(tmp_path / "tweets.jsonl", batch_size=10)
+    for tweet in tweets_fixture[:9]:
+        sink.write(tweet)
+    assert sink.files == []
+
+    sink.write(tweets_fixture[9])
+    assert sink.count == 10
+    sink.close()
+
+
+def test_jsonl_sink_rotation_and_gzip(tmp_path, tweets_fixture):
+    sink = JSONLSink(tmp_path / "tweets.jsonl", batch_size=5, max_bytes=1, compression="gzip")
+    sink.write_all(tweets_fixture)
+    sink.close()
+
+    assert len(sink.files) == 4
+    assert all(path.name.endswith(".jsonl.gz") for path in sink.files)
+    lines = [line for path in sink.files for line in gzip.open(path, "rt").read().splitlines()]
+    assert [json.loads(line)["tweet_id"] for line in lines] == [t.tweet_id for t in tweets_fixture]
+
+
+def test_csv_sink(tmp_path, tweets_fixture):
+    with CSVSink(tmp_path / "tweets.csv", max_seconds=0) as sink:
+        sink.write_all(tweets_fixture[:10])
+        sink.write_all(tweets_fixture[10:])
+
+    assert len(sink.files) == 2
+    rows = [row for path in sink.files for row in csv.DictReader(path.open(newline=""))]
+    assert len(rows) == 20
+    assert rows[0]["tweet_id"] == str(tweets_fixture[0].tweet_id)
+    assert rows[0]["text"] == tweets_fixture[0].text
+    assert json.loads(rows[0]["urls"]) == tweets_fixture[0].entries.urls
+
+
+def test_parquet_sink(tmp_path, tweets_fixture):
+    parquet = pytest.importorskip("pyarrow.parquet")
+
+    with ParquetSink(tmp_path / "tweets.parquet", batch_size=8) as sink:
+        sink.write_all(tweets_fixture)
+
+    table = parquet.read_table(sink.files[0])
+    assert table.num_rows == 20
+    assert parquet.ParquetFile(sink.files[0]).num_row_groups == 3
+    assert table.column("tweet_id").to_pylist() == [t.tweet_id for t in tweets_fixture]
+
+
+def test_parquet_sink_rotation_counts_bytes_on_disk(tmp_path, tweets_fixture):
+    pytest.importorskip("pyarrow.parquet")
+
+    with ParquetSink(tmp_path / "tweets.parquet", batch_size=5) as sink:
+        sink.write_all(tweets_fixture)
+        assert sink._bytes == sink._output.tell() - len(b"PAR1")
+
+    with ParquetSink(tmp_path / "rotated.parquet", batch_size=5, max_bytes=1) as sink:
+        sink.write_all(tweets_fixture)
+    assert len(sink.files) == 4
+    assert all(path.stat().st_size > 0 for path in sink.files)
+
+
+def test_sink_needs_write_batch(tmp_path):
+    with pytest.raises(TypeError):
+        Sink(tmp_path / "tweets.txt")
+
+
+def test_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        JSONLSink(tmp_path / "tweets.jsonl", compression="bz2")
+
+
+def test_rotation_counts_bytes_on_disk(tmp_path, tweets_fixture):
+    tweets = [tweet.copy(update={"text": "ünïcödé " * 50}) for tweet in tweets_fixture]
+    with JSONLSink(tmp_path / "tweets.jsonl", batch_size=5) as sink:
+        sink.write_all(tweets)
+        sink._file.flush()
+        assert sink._bytes == sink.files[0].stat().st_size
+
+    plain = JSONLSink(tmp_path / "plain.jsonl", batch_size=5, max_bytes=4000)
+    plain.write_all(tweets * 5)
+    plain.close()
+    gzipped = JSONLSink(tmp_path / "gz.jsonl", batch_size=5, max_bytes=4000, compression="gzip")
+    gzipped.write_all(tweets * 5)
+    gzipped.close()
+    assert len(gzipped.files) < len(plain.files)
+
+
+def test_sinks_write_missing_times(tmp_path, tweets_fixture):
+    tweet = Tweet.construct(**{**tweets_fixture[0].__dict__, "time": None})
+    with JSONLSink(tmp_path / "tweets.jsonl") as sink:
+        sink.write(tweet)
+    assert json.loads((tmp_path / "tweets.jsonl").read_text())["time"] is None
+
+    with CSVSink(tmp_path / "tweets.csv") as sink:
+        sink.write(tweet)
+    rows = list(csv.DictReader((tmp_path / "tweets.csv").open(newline="")))
+    assert rows[0]["time"] == ""
@@ -1,9 +1,31 @@
+from datetime import datetime, timezone
+import threading
+import time
+
+from nitter_scraper.checkpoint import CheckpointStore
+from nitter_scraper.mock import MockNitter
 from nitter_scraper.paths import TEST_DIRECTORY
-from nitter_scraper.tweets import pagination_parser, parse_tweet, timeline_parser
+from nitter_scraper.schema import Tweet
+from nitter_scraper.tweets import (
+    build_timeline_url,
+    date_parser,
+    get_tweets,
+    LazyTweet,
+    pagination_parser,
+    parse_date,
+    parse_tweet,
+    timeline_parser,
+)
 import pytest
 from pytest_regressions import data_regression  # noqa: F401
 
-from .common import ADDRESS, profile_page_fixture, URL, USERNAME  # noqa: F401
+from .common import (  # noqa: F401
+    ADDRESS,
+    mock_nitter_fixture,
+    profile_page_fixture,
+    URL,
+    USERNAME,
+)
 
 
 @pytest.fixture
@@ -31,3 +53,208 @@ def test_pagination_parser(profile_page_fixture):  # noqa: F811
 def test_parse_tweets(data_regression, timeline_items_fixtures, index):  # noqa: F811
     results = parse_tweet(timeline_items_fixtures[index])
     data_regression.check(results)
+
+
+def test_get_tweets_pages(mock_nitter_fixture):  # noqa: F811
+    tweets = list(get_tweets(USERNAME, pages=2, address=mock_nitter_fixture.address))
+    assert len(tweets) == 40
+    assert len(mock_nitter_fixture.requests) == 2
+
+
+def test_get_tweets_limit(mock_nitter_fixture):  # noqa: F811
+    tweets = list(get_tweets(USERNAME, limit=25, address=mock_nitter_fixture.address))
+    assert len(tweets) == 25
+    assert len(mock_nitter_fixture.requests) == 2
+
+
+def test_get_tweets_break_on_tweet_id(mock_nitter_fixture):  # noqa: F811
+    address = mock_nitter_fixture.address
+    tweets = list(get_tweets(USERNAME, break_on_tweet_id=1291835605643599878, address=address))
+    assert [tweet.tweet_id for tweet in tweets] == [1122013789686325248, 1242382545955819521]
+
+
+def test_get_tweets_prefetch(mock_nitter_fixture):  # noqa: F811
+    address = mock_nitter_fixture.address
+    expected = list(get_tweets(USERNAME, pages=3, address=address))
+    tweets = list(get_tweets(USERNAME, pages=3, address=address, prefetch=2))
+    assert tweets == expected
+    assert len(mock_nitter_fixture.requests) == 6
+
+
+def test_get_tweets_prefetch_stops_early(mock_nitter_fixture):  # noqa: F811
+    address = mock_nitter_fixture.address
+    tweets = list(get_tweets(USERNAME, pages=25, limit=5, address=address, prefetch=2))
+    assert len(tweets) == 5
+
+    deadline = time.time() + 5
+    while any(t.name == "nitter-prefetch" for t in threading.enumerate()):
+        assert time.time() < deadline
+        time.sleep(0.05)
+
+    # The first page plus at most two pages fetched ahead.
+    assert len(mock_nitter_fixture.requests) <= 3
+
+
+def test_get_tweets_checkpoint_resume(mock_nitter_fixture):  # noqa: F811
+    address = mock_nitter_fixture.address
+    store = CheckpointStore()
+    expected = list(get_tweets(USERNAME, pages=3, address=address))
+
+    crawl = get_tweets(USERNAME, pages=3, address=address, checkpoint=store, checkpoint_key="a")
+    first_page = [next(crawl) for _ in range(20)]
+    next(crawl)  # finishes the first page and saves its checkpoint
+    crawl.close()
+
+    checkpoint = store.load("a")
+    assert checkpoint.pages == 1
+    assert checkpoint.num_yielded == 20
+    assert "cursor=" in checkpoint.next_url
+
+    kwargs = dict(pages=3, address=address, checkpoint=store, checkpoint_key="a")
+    rest = list(get_tweets(USERNAME, **kwargs))
+    assert first_page + rest == expected
+    assert len(mock_nitter_fixture.requests) == 3 + 2 + 2
+    assert store.load("a").pages == 3
+
+    assert list(get_tweets(USERNAME, **kwargs)) == []
+
+
+def test_get_tweets_checkpoint_finished_by_limit(mock_nitter_fixture):  # noqa: F811
+    address = mock_nitter_fixture.address
+    store = CheckpointStore()
+    tweets = list(get_tweets(USERNAME, limit=25, address=address, checkpoint=store))
+    assert len(tweets) == 25
+
+    key = f"{address}/{USERNAME}"
+    assert store.load(key).finished
+    assert list(get_tweets(USERNAME, limit=25, address=address, checkpoint=store)) == []
+
+    store.delete(key)
+    assert len(list(get_tweets(USERNAME, limit=25, address=address, checkpoint=store))) == 25
+
+
+def test_tweet_from_dict_without_validation(timeline_items_fixtures):
+    for item in timeline_items_fixtures:
+        if "show-more" in item.attrs["class"]:
+            continue
+        tweet_data = parse_tweet(item)
+        tweet = Tweet.from_dict(tweet_data, validate=False)
+        assert tweet == Tweet.from_dict(tweet_data)
+        assert tweet.json() == Tweet.from_dict(tweet_data).json()
+        assert isinstance(tweet.tweet_id, int)
+
+
+def test_get_tweets_without_validation(mock_nitter_fixture):  # noqa: F811
+    address = mock_nitter_fixture.address
+    expected = list(get_tweets(USERNAME, pages=1, address=address))
+    assert list(get_tweets(USERNAME, pages=1, address=address, validate=False)) == expected
+
+
+@pytest.mark.parametrize(
+    "tweet_date, expected",
+    [
+        ("27/4/2019, 05:45:08", datetime(2019, 4, 27, 5, 45, 8)),
+        ("Aug 7, 2020 · 8:36 PM UTC", datetime(2020, 8, 7, 20, 36)),
+        ("Aug 7, 2020 Â· 12:05 AM UTC", datetime(2020, 8, 7, 0, 5)),
+        ("Dec 31, 2020 · 12:59 PM UTC", datetime(2020, 12, 31, 12, 59)),
+    ],
+)
+def test_parse_date(tweet_date, expected):
+    assert parse_date(tweet_date) == expected.replace(tzinfo=timezone.utc)
+    assert parse_date(tweet_date).tzinfo is timezone.utc
+
+
+@pytest.mark.parametrize("tweet_date", ["", "Foo 7, 2020 · 8:36 PM UTC", "7 August 2020"])
+def test_date_parser_failure(tweet_date):
+    with pytest.raises(ValueError):
+        parse_date(tweet_date)
+    assert date_parser(tweet_date) is None
+
+
+def test_get_tweets_naive_since_time_is_utc(mock_nitter_fixture):  # noqa: F811
+    address = mock_nitter_fixture.address
+    since_time = datetime(2020, 3, 24, 2, 36, 14)
+    naive = list(get_tweets(USERNAME, pages=1, since_time=since_time, address=address))
+    aware = since_time.replace(tzinfo=timezone.utc)
+    assert naive == list(get_tweets(USERNAME, pages=1, since_time=aware, address=address))
+    assert naive
+    assert all(tweet.time >= aware for tweet in naive)
+
+
+@pytest.mark.parametrize(
+    "until_time, until",
+    [(datetime(2020, 8, 10), "2020-08-10"), (datetime(2020, 8, 10, 12), "2020-08-11")],
+)
+def test_build_timeline_url_includes_the_until_day(until_time, until):
+    since_time = datetime(2020, 8, 1, 12)
+    _, url, endpoint = build_timeline_url(
+        ADDRESS, search="btc", since_time=since_time, until_time=until_time
+    )
+    assert url == f"{ADDRESS}/search?f=tweets&q=btc&since=2020-08-01&until={until}"
+    assert endpoint == "search"
+
+
+def test_build_timeline_url_seek():
+    since_time = datetime(2020, 7, 1)
+    _, url, endpoint = build_timeline_url(ADDRESS, USERNAME, since_time=since_time, seek=True)
+    query = f"from:{USERNAME}%20include:nativeretweets"
+    assert url == f"{ADDRESS}/search?f=tweets&q={query}&since=2020-07-01"
+    assert endpoint == "search"
+
+    # Without a time window there is nothing to seek, the timeline is read.
+    _, url, endpoint = build_timeline_url(ADDRESS, USERNAME, seek=True)
+    assert (url, endpoint) == (f"{ADDRESS}/{USERNAME}", USERNAME)
+
+
+def test_get_tweets_seek():
+    since_time = datetime(2020, 7, 1, tzinfo=timezone.utc)
+    until_time = datetime(2020, 7, 20, tzinfo=timezone.utc)
+    with MockNitter(pages=2) as nitter:
+        tweets = list(
+            get_tweets(
+                USERNAME,
+                since_time=since_time,
+                until_time=until_time,
+                address=nitter.address,
+                parser="lxml",
+                seek=True,
+                dedup=True,
+            )
+        )
+
+    query = f"from:{USERNAME}%20include:nativeretweets&since=2020-07-01&until=2020-07-20"
+    assert nitter.requests[0] == f"/search?f=tweets&q={query}"
+    assert len(nitter.requests) == 2
+    assert len(tweets) == 6
+    assert all(since_time <= tweet.time <= until_time for tweet in tweets)
+
+
+def test_lazy_tweet_matches_parse_tweet(timeline_items_fixtures):
+    for item in timeline_items_fixtures:
+        assert dict(LazyTweet(item)) == parse_tweet(item)
+
+
+def test_lazy_tweet_parses_on_first_access(timeline_items_fixtures):
+    tweet = LazyTweet(timeline_items_fixtures[0])
+    expected = Tweet.from_dict(parse_tweet(timeline_items_fixtures[0]))
+
+    assert tweet.tweet_id == expected.tweet_id
+    assert tweet["tweet_id"] == str(expected.tweet_id)
+    assert set(tweet._values) == {"tweet_id", "tweet_url", "username"}
+
+    assert tweet.time == expected.time
+    assert tweet.entries == expected.entries
+    assert tweet.to_tweet() == expected
+    with pytest.raises(AttributeError):
+        tweet.nope
+
+
+def test_get_tweets_lazy():
+    since_time = datetime(2020, 7, 1, tzinfo=timezone.utc)
+    with MockNitter(pages=2) as nitter:
+        options = dict(since_time=since_time, address=nitter.address, parser="lxml")
+        expected = list(get_tweets(USERNAME, **options))
+        tweets = list(get_tweets(USERNAME, lazy=True, **options))
+
+    assert all(isinstance(tweet, LazyTweet) for tweet in tweets)
+    assert [tweet.to_tweet() for tweet in tweets] == expected
@@ -0,0 +1,170 @@
+from queue import Queue
+import re
+
+from nitter_scraper.dedup import LRUSet
+from nitter_scraper.mock import MockNitter, recorded_page
+from nitter_scraper.retry import RetryPolicy
+from nitter_scraper.session import NitterSession
+from nitter_scraper.tweets import get_tweets
+from nitter_scraper.watcher import AccountState, Watcher
+import pytest
+import requests
+
+from .common import closed_port, mock_nitter_fixture, USERNAME  # noqa: F401
+
+
+@pytest.fixture
+def watcher_fixture(mock_nitter_fixture):  # noqa: F811
+    watcher = Watcher(queue=Queue(), address=mock_nitter_fixture.address, min_interval=0)
+    yield watcher
+    watcher.stop()
+
+
+def test_get_tweets_since_tweet_id(mock_nitter_fixture):  # noqa: F811
+    address = mock_nitter_fixture.address
+    tweets = list(get_tweets(USERNAME, since_tweet_id=1291108608910991366, address=address))
+    assert [tweet.tweet_id for tweet in tweets] == [1291835605643599878]
+    assert len(mock_nitter_fixture.requests) == 1
+
+
+def test_watcher_needs_a_delivery_target():
+    with pytest.raises(ValueError):
+        Watcher(["dgnsrekt"])
+
+
+def test_first_poll_sets_the_mark(watcher_fixture):
+    watcher_fixture.add(USERNAME)
+    assert watcher_fixture.run_pending() == 1
+    assert watcher_fixture.queue.empty()
+    assert watcher_fixture.marks == {USERNAME: 1291835605643599878}
+
+
+def test_poll_delivers_new_tweets_oldest_first(watcher_fixture):
+    delivered = []
+    watcher_fixture.callback = delivered.append
+    watcher_fixture.add(USERNAME, last_tweet_id=1290000000000000000)
+
+    tweets = watcher_fixture.poll(USERNAME)
+    ids = [tweet.tweet_id for tweet in tweets]
+    assert ids == sorted(ids)
+    assert 1291835605643599878 in ids
+    assert [tweet.tweet_id for tweet in delivered] == ids
+    assert watcher_fixture.queue.qsize() == len(ids)
+    assert watcher_fixture.marks[USERNAME] == 1291835605643599878
+
+    assert watcher_fixture.poll(USERNAME) == []
+
+
+def test_interval_follows_activity(watcher_fixture):
+    watcher_fixture.min_interval = 10
+    watcher_fixture.max_interval = 1000
+    state = AccountState(username=USERNAME, interval=10, last_poll=0)
+
+    watcher_fixture._update_rate(state, 0, 100)
+    assert watcher_fixture.next_interval(state) == 1000
+
+    watcher_fixture._update_rate(state, 5, 200)
+    assert watcher_fixture.next_interval(state) == pytest.approx(200 / 3)
+
+    watcher_fixture._reschedule(state, 1)
+    assert state.interval == 10
+    watcher_fixture._reschedule(state, 10 ** 6)
+    assert state.interval == 1000
+
+
+def test_failed_poll_backs_off():
+    session = NitterSession(retry_policy=RetryPolicy(max_retries=0))
+    watcher = Watcher(callback=print, address=f"http://127.0.0.1:{closed_port()}", session=session)
+    watcher.add(USERNAME)
+
+    assert watcher.poll(USERNAME) == []
+    assert watcher.accounts[USERNAME].errors == 1
+    assert watcher.accounts[USERNAME].interval == 120
+    session.close()
+
+
+def test_removed_accounts_are_not_polled(watcher_fixture):
+    watcher_fixture.add(USERNAME)
+    watcher_fixture.remove(USERNAME)
+    assert watcher_fixture.run_pending() == 0
+
+
+def test_background_thread(watcher_fixture):
+    watcher_fixture.deliver_initial = True
+    watcher_fixture.add(USERNAME)
+    with watcher_fixture:
+        tweet = watcher_fixture.queue.get(timeout=5)
+    assert tweet.tweet_id
+
+
+def test_probe_polls_parse_only_new_pages(mock_nitter_fixture):  # noqa: F811
+    delivered = []
+    address = mock_nitter_fixture.address
+    watcher = Watcher(callback=delivered.append, address=address, probe=True)
+    watcher.add(USERNAME, last_tweet_id=1291108608910991366)
+    assert [tweet.tweet_id for tweet in watcher.poll(USERNAME)] == [1291835605643599878]
+    assert watcher.poll(USERNAME) == []
+    watcher.stop()
+
+    assert [tweet.tweet_id for tweet in delivered] == [1291835605643599878]
+    assert len(mock_nitter_fixture.requests) == 2
+
+
+def test_failed_delivery_keeps_the_mark():
+    page = recorded_page()
+    garbage = re.sub(rb'(status/1291835605643599878#m" title=")[^"]*', rb"\1garbage", page)
+    delivered = []
+    with MockNitter(page=garbage, pages=1) as nitter:
+        watcher = Watcher(callback=delivered.append, address=nitter.address, workers=1)
+        watcher.add(USERNAME, last_tweet_id=1291108608910991366)
+        assert watcher.run_pending() == 1
+        state = watcher.accounts[USERNAME]
+        assert state.errors == 1
+        assert state.last_tweet_id == 1291108608910991366
+        assert delivered == []
+
+        nitter.page = page
+        state.next_poll = 0
+        watcher._schedule = [(0, USERNAME)]
+        assert watcher.run_pending() == 1
+        watcher.stop()
+    assert [tweet.tweet_id for tweet in delivered] == [1291835605643599878]
+    assert watcher.marks[USERNAME] == 1291835605643599878
+
+
+def test_removed_during_poll(watcher_fixture):
+    watcher_fixture.add(USERNAME)
+    watcher_fixture.remove(USERNAME)
+    assert watcher_fixture.poll(USERNAME) == []
+
+
+def test_failed_poll_delivers_deduplicated_tweets_later():
+    dedup = LRUSet()
+    delivered = []
+    with MockNitter(pages=2) as nitter:
+        session = NitterSession(retry_policy=RetryPolicy(max_retries=0))
+        get = session.get
+        calls = []
+
+        def fail_second_page(url, **kwargs):
+            calls.append(url)
+            if len(calls) == 2:
+                raise requests.ConnectionError("second page lost")
+            return get(url, **kwargs)
+
+        session.get = fail_second_page
+        watcher = Watcher(
+            callback=delivered.append, address=nitter.address, session=session, dedup=dedup
+        )
+        watcher.add(USERNAME, last_tweet_id=1)
+
+        assert watcher.poll(USERNAME) == []
+        assert watcher.accounts[USERNAME].errors == 1
+        assert len(dedup) == 0
+
+        tweets = watcher.poll(USERNAME)
+        session.close()
+
+    assert len(tweets) == 20
+    assert [tweet.tweet_id for tweet in delivered] == [tweet.tweet_id for tweet in tweets]
+    assert len(dedup) == 20